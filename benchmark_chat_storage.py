@@ -0,0 +1,100 @@
+"""Compare append/read latency of embedded-array vs per-message chat storage.
+
+For sessions holding 10, 1k and 10k messages, measures:
+  * append: one more message ($push into chat_sessions vs insert into chat_messages)
+  * read:   the history fetched for a prompt (whole document vs last 20 messages)
+
+Runs against MONGODB_URL in a throwaway database that is dropped afterwards.
+
+Usage: MONGODB_URL=... python benchmark_chat_storage.py [samples]
+"""
+import asyncio
+import statistics
+import sys
+import time
+import logging
+from datetime import datetime
+from dotenv import load_dotenv
+from services.database_service import DatabaseService
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(name)s - %(message)s')
+
+SIZES = [10, 1_000, 10_000]
+BENCH_DB = "voiceAssistance_benchmark"
+MESSAGE = "This is a representative chat message of roughly average length for a voice turn."
+
+
+def _ms(samples):
+    return f"{statistics.median(samples) * 1000:8.2f} ms"
+
+
+async def _timed(coro_factory, samples: int):
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        await coro_factory()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def bench_size(db: DatabaseService, size: int, samples: int):
+    now = datetime.now()
+    seed = [{"role": "user" if i % 2 == 0 else "assistant", "content": MESSAGE, "timestamp": now} for i in range(size)]
+
+    # Embedded layout: one ever-growing document
+    legacy_id = f"legacy_{size}"
+    await db.db.chat_sessions_legacy.insert_one({"session_id": legacy_id, "messages": seed})
+
+    async def legacy_append():
+        await db.db.chat_sessions_legacy.update_one(
+            {"session_id": legacy_id},
+            {"$push": {"messages": {"role": "user", "content": MESSAGE, "timestamp": datetime.now()}}}
+        )
+
+    async def legacy_read():
+        await db.db.chat_sessions_legacy.find_one({"session_id": legacy_id})
+
+    # Per-message layout: chat_sessions metadata + chat_messages keyed by (session_id, seq)
+    session_id = f"split_{size}"
+    await db.db.chat_sessions.insert_one({"session_id": session_id, "message_count": size, "created_at": now})
+    await db.db.chat_messages.insert_many([dict(m, session_id=session_id, seq=i) for i, m in enumerate(seed, 1)])
+
+    async def split_append():
+        await db.add_message_to_history(session_id, "user", MESSAGE)
+
+    async def split_read():
+        # Measure the chat_messages read, not the session history cache in front of it
+        db.history_cache.invalidate(session_id)
+        await db.get_recent_chat_history(session_id, limit=20, token_budget=0)
+
+    return {
+        "embedded append": await _timed(legacy_append, samples),
+        "embedded read": await _timed(legacy_read, samples),
+        "split append": await _timed(split_append, samples),
+        "split read (last 20)": await _timed(split_read, samples),
+    }
+
+
+async def main(samples: int):
+    load_dotenv()
+    db = DatabaseService()
+    db.db_name = BENCH_DB
+    if not await db.connect():
+        print("❌ Could not connect to MongoDB (check MONGODB_URL)")
+        return False
+    try:
+        print(f"{'messages':>10} | {'operation':<22} | median")
+        for size in SIZES:
+            results = await bench_size(db, size, samples)
+            for name, timings in results.items():
+                print(f"{size:>10} | {name:<22} | {_ms(timings)}")
+        return True
+    finally:
+        await db.client.drop_database(BENCH_DB)
+        await db.close()
+
+
+if __name__ == "__main__":
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    success = asyncio.run(main(samples))
+    sys.exit(0 if success else 1)
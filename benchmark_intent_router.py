@@ -0,0 +1,109 @@
+"""Compare the compiled intent router against the previous per-table keyword scans.
+
+Routes a corpus of utterances with both implementations, checks that they agree
+on web search / news / query / category / language, and reports the time per
+utterance. A second pass pads the keyword tables with synthetic keywords to show
+that the router's cost does not grow with the number of keywords.
+
+Usage: python benchmark_intent_router.py [iterations]
+"""
+import sys
+import time
+import logging
+from services.skills_manager import (
+    IntentRouter, SEARCH_COMMANDS, SEARCH_QUESTION_PREFIXES, CURRENT_INFO_TOPICS,
+    SEARCH_QUERY_PHRASES, NEWS_KEYWORDS, NEWS_CATEGORIES
+)
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(name)s - %(message)s')
+
+CORPUS = [
+    "What is the capital of Australia?",
+    "search for cheap flights to goa next week",
+    "Tell me about the history of the Eiffel Tower",
+    "give me the latest technology news",
+    "any breaking news in sports today",
+    "how to bake sourdough bread at home",
+    "I just wanted to say thanks for the help earlier, you explained it really well",
+    "what's the weather like in Mumbai right now",
+    "नमस्ते, आज का मौसम कैसा है?",
+    "मुझे business news बताओ",
+    "look up the stock price of infosys",
+    "Can you explain recursion with a simple python example?",
+    "headlines about covid research please",
+    "who is the current president of france",
+    "find information about nasa's artemis missions and space research",
+    "play some relaxing music",
+    "details about the new movie releases this weekend",
+    "Write a short poem about the monsoon.",
+]
+
+
+def legacy_route(user_message: str, keyword_padding=()):
+    """The checks LLMService used to run, one keyword table at a time"""
+    lower = user_message.lower()
+    web_search = (
+        any(trigger in lower for trigger in SEARCH_COMMANDS)
+        or any(lower.startswith(trigger) for trigger in SEARCH_QUESTION_PREFIXES)
+        or any(topic in lower for topic in list(CURRENT_INFO_TOPICS) + list(keyword_padding))
+    )
+    query = None
+    if web_search:
+        query = user_message.strip()
+        for phrase in SEARCH_QUERY_PHRASES:
+            if phrase in lower:
+                query = lower.split(phrase, 1)[1].strip()
+                break
+    news = any(keyword in lower for keyword in NEWS_KEYWORDS)
+    category = None
+    if news:
+        category = "general"
+        for name, keywords in NEWS_CATEGORIES.items():
+            if any(keyword in lower for keyword in keywords):
+                category = name
+                break
+    language = "en"
+    for ch in user_message:
+        if '\u0900' <= ch <= '\u097F':
+            language = "hi"
+            break
+    return web_search, news, query, category, language
+
+
+def router_route(router: IntentRouter, user_message: str):
+    route = router.route(user_message)
+    return (route.wants_web_search, route.wants_news, route.arguments.get("query"),
+            route.arguments.get("category"), route.language)
+
+
+def timed(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for utterance in CORPUS:
+            fn(utterance)
+    return (time.perf_counter() - start) / (iterations * len(CORPUS)) * 1e6
+
+
+def main(iterations: int) -> bool:
+    router = IntentRouter()
+    mismatches = [u for u in CORPUS if legacy_route(u) != router_route(router, u)]
+    for utterance in mismatches:
+        print(f"❌ mismatch for {utterance!r}:\n   legacy {legacy_route(utterance)}\n   router {router_route(router, utterance)}")
+
+    print(f"{'keywords':>9} | {'legacy':>10} | {'router':>10}")
+    for padding in (0, 1_000, 10_000):
+        # Synthetic current-info topics that never occur in the corpus
+        extra = [f"zzkw{i:05d}" for i in range(padding)]
+        padded = IntentRouter()
+        for word in extra:
+            padded.add_keyword(word, "current_topic")
+        padded.route("")  # compile outside the timed loop
+        legacy_us = timed(lambda u: legacy_route(u, extra), iterations)
+        router_us = timed(lambda u: padded.route(u), iterations)
+        print(f"{len(padded._tags):>9} | {legacy_us:7.1f} µs | {router_us:7.1f} µs")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    sys.exit(0 if main(iterations) else 1)
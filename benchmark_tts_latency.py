@@ -0,0 +1,75 @@
+"""Compare Murf time-to-first-audio for batch vs incremental text streaming.
+
+Replays a simulated LLM token stream through a pooled Murf connection in both
+modes and reports how long it takes for the first audio chunk to arrive.
+
+Usage: MURF_API_KEY=... python benchmark_tts_latency.py [runs]
+"""
+import asyncio
+import os
+import statistics
+import sys
+import logging
+from dotenv import load_dotenv
+from services.murf_websocket_service import MurfWebSocketService
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(name)s - %(message)s')
+
+SAMPLE_ANSWER = (
+    "Sure! The Eiffel Tower was completed in 1889 for the World's Fair in Paris. "
+    "It is about 330 metres tall, and for forty-one years it was the tallest man-made structure in the world. "
+    "Today it welcomes millions of visitors every year, and you can take the lift or climb the stairs to the second floor. "
+    "Would you like some tips for visiting?"
+)
+TOKEN_DELAY = 0.03  # seconds between simulated LLM chunks
+
+
+async def simulated_llm_stream():
+    for word in SAMPLE_ANSWER.split(" "):
+        await asyncio.sleep(TOKEN_DELAY)
+        yield word + " "
+
+
+async def measure(service: MurfWebSocketService, mode: str) -> float:
+    async with service.turn() as murf_turn:
+        async for audio_response in murf_turn.stream_text_to_audio(simulated_llm_stream(), mode=mode):
+            if audio_response.get("type") == "audio_chunk" and audio_response.get("is_final"):
+                break
+        return murf_turn.first_audio_latency
+
+
+async def main(runs: int):
+    load_dotenv()
+    api_key = os.getenv("MURF_API_KEY")
+    if not api_key:
+        print("❌ MURF_API_KEY is not set")
+        return False
+
+    service = MurfWebSocketService(api_key, voice_id=os.getenv("MURF_VOICE_ID", "en-US-amara"), pool_size=1)
+    await service.start()
+    try:
+        results = {}
+        for mode in ("batch", "incremental"):
+            samples = []
+            for _ in range(runs):
+                latency = await measure(service, mode)
+                if latency is not None:
+                    samples.append(latency)
+            results[mode] = samples
+            if samples:
+                print(f"{mode:>12}: median {statistics.median(samples):.3f}s, min {min(samples):.3f}s over {len(samples)} runs")
+            else:
+                print(f"{mode:>12}: no audio received")
+
+        if results.get("batch") and results.get("incremental"):
+            saved = statistics.median(results["batch"]) - statistics.median(results["incremental"])
+            print(f"⏱️ Incremental mode starts speaking {saved:.3f}s earlier (median)")
+        return True
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    success = asyncio.run(main(runs))
+    sys.exit(0 if success else 1)
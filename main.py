@@ -1,6 +1,6 @@
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, UploadFile, File, Path, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import FastAPI, Request, UploadFile, File, Path, Query, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import os
@@ -8,6 +8,10 @@ import uuid
 import uvicorn
 import json
 import asyncio
+import base64
+import itertools
+import struct
+import time
 from datetime import datetime
 from dotenv import load_dotenv
 from typing import Dict, Optional
@@ -22,20 +26,27 @@ from models.schemas import (
     WebSearchResult
 )
 # auth schemas removed — authentication functionality has been stripped
-from services.stt_service import STTService
-from services.llm_service import LLMService
-from services.tts_service import TTSService
-from services.database_service import DatabaseService
-from services.assemblyai_streaming_service import AssemblyAIStreamingService
-from services.murf_websocket_service import MurfWebSocketService
+from services.service_registry import (
+    ServiceRegistry,
+    build_service_registry,
+    close_service_registry,
+    RETIRE_GRACE_SECONDS
+)
 # new services
 from services.custom_web_search_service import custom_web_search_service as web_search_service
 from services.skills_manager import skills_manager
 from services.auth_service import auth_service
-from services.email_service import EmailService
 # pymongo.errors import removed (used only by auth code which is stripped)
 from utils.logging_config import setup_logging, get_logger
 from utils.constants import get_fallback_message
+from utils.json_utils import DateTimeEncoder
+from utils.audio_cache import TTS_CACHE_DIR
+from utils.ws_outbox import SocketOutbox
+from utils.chunk_coalescer import ChunkCoalescer
+from utils.audio_archive import audio_archive
+from utils.range_response import RangeFileResponse, RangeNotSatisfiable
+from utils.audio_cache import shared_audio_cache
+from utils.metrics import stage_metrics
 from authlib.integrations.starlette_client import OAuth
 
 # Load environment variables
@@ -52,18 +63,12 @@ from contextlib import asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Starting Voice Agent application...")
-    config = initialize_services()
-    if database_service:
-        try:
-            db_connected = await database_service.connect()
-            if db_connected:
-                logger.info("✅ Database service connected successfully")
-            else:
-                logger.warning("⚠️ Database service running in fallback mode")
-        except Exception as e:
-            logger.error(f"❌ Database service initialization error: {e}")
-    else:
+    activate_service_registry(await build_service_registry())
+    if service_registry.database is None:
         logger.error("❌ Database service not initialized")
+    await skills_manager.start()
+    await audio_archive.start()
+    register_metrics_collectors()
 
     logger.info("✅ Application startup completed")
 
@@ -72,8 +77,9 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down Voice Agent application...")
 
-    if database_service:
-        await database_service.close()
+    await close_service_registry(service_registry)
+    await skills_manager.close()
+    await audio_archive.close()
 
     # Clean up session locks
     global session_locks
@@ -90,116 +96,30 @@ app = FastAPI(
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
+# Content-addressed TTS audio cache (see utils/audio_cache.py)
+os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+app.mount("/tts-cache", StaticFiles(directory=TTS_CACHE_DIR), name="tts-cache")
 templates = Jinja2Templates(directory="templates")
-stt_service: Optional[STTService] = None
-llm_service: Optional[LLMService] = None
-tts_service: Optional[TTSService] = None
-database_service: Optional[DatabaseService] = None
-assemblyai_streaming_service: Optional[AssemblyAIStreamingService] = None
-murf_websocket_service: Optional[MurfWebSocketService] = None
-email_service: Optional[EmailService] = None
 
+# Current generation of service clients. Built once in lifespan and replaced as a whole by
+# /api/config; handlers read this reference once and never rebuild clients per request.
+service_registry: ServiceRegistry = ServiceRegistry(config=APIKeyConfig(), generation=0)
+config_lock = asyncio.Lock()
 
-def initialize_services(config: APIKeyConfig = None) -> APIKeyConfig:
-    """Initialize all services with API keys from the provided config or environment variables.
 
-    This is a minimal, safe initializer used at startup and when updating configuration.
-    It will attempt to construct each service and fallback to None on error, logging failures.
-    """
-    global stt_service, llm_service, tts_service, database_service, assemblyai_streaming_service, murf_websocket_service
-
-    # Build config from environment if not provided
-    if config is None:
-        config = APIKeyConfig(
-            personas=["default", "pirate", "developer", "cowboy", "robot"],
-            selected_persona=os.getenv("AGENT_PERSONA", "default"),
-            gemini_api_key=os.getenv("GEMINI_API_KEY"),
-            assemblyai_api_key=os.getenv("ASSEMBLYAI_API_KEY"),
-            murf_api_key=os.getenv("MURF_API_KEY"),
-            murf_voice_id=os.getenv("MURF_VOICE_ID", "en-US-amara"),
-            mongodb_url=os.getenv("MONGODB_URL")
-        )
+def activate_service_registry(registry: ServiceRegistry) -> ServiceRegistry:
+    """Atomically publish a prebuilt registry and return the generation it replaced"""
+    global service_registry
+    previous = service_registry
+    service_registry = registry
 
-    # Initialize each service defensively
+    # Wire auth service to database if available
     try:
-        if config.assemblyai_api_key:
-            try:
-                stt_service = STTService(config.assemblyai_api_key)
-            except Exception as e:
-                logger.error(f"Failed to initialize STTService: {e}")
-                stt_service = None
-
-            try:
-                assemblyai_streaming_service = AssemblyAIStreamingService(config.assemblyai_api_key)
-            except Exception as e:
-                logger.error(f"Failed to initialize AssemblyAIStreamingService: {e}")
-                assemblyai_streaming_service = None
-        else:
-            stt_service = None
-            assemblyai_streaming_service = None
-
-        if config.gemini_api_key:
-            try:
-                llm_service = LLMService(config.gemini_api_key, persona=config.selected_persona)
-            except Exception as e:
-                logger.error(f"Failed to initialize LLMService: {e}")
-                llm_service = None
-        else:
-            llm_service = None
-
-        if config.murf_api_key:
-            try:
-                tts_service = TTSService(config.murf_api_key, voice_id=config.murf_voice_id)
-            except Exception as e:
-                logger.error(f"Failed to initialize TTSService: {e}")
-                tts_service = None
-            try:
-                murf_websocket_service = MurfWebSocketService(config.murf_api_key, voice_id=config.murf_voice_id)
-            except Exception as e:
-                logger.error(f"Failed to initialize MurfWebSocketService: {e}")
-                murf_websocket_service = None
-        else:
-            tts_service = None
-            murf_websocket_service = None
+        auth_service.db = registry.database
+    except Exception:
+        pass
 
-        try:
-            database_service = DatabaseService(config.mongodb_url)
-        except Exception as e:
-            logger.error(f"Failed to initialize DatabaseService: {e}")
-            database_service = None
-
-        # Initialize email service
-        try:
-            email_service = EmailService()
-        except Exception as e:
-            logger.error(f"Failed to initialize EmailService: {e}")
-            email_service = None
-
-        # Wire auth service to database if available
-        try:
-            auth_service.db = database_service
-        except Exception:
-            pass
-
-        # If persona provided, set it on the LLM service
-        if llm_service and config.selected_persona:
-            try:
-                llm_service.set_persona(config.selected_persona)
-            except Exception:
-                pass
-
-        return config
-
-    except Exception as e:
-        logger.error(f"Unexpected error while initializing services: {e}")
-        # Ensure globals are at least defined
-        stt_service = stt_service if 'stt_service' in globals() else None
-        llm_service = llm_service if 'llm_service' in globals() else None
-        tts_service = tts_service if 'tts_service' in globals() else None
-        database_service = database_service if 'database_service' in globals() else None
-        assemblyai_streaming_service = assemblyai_streaming_service if 'assemblyai_streaming_service' in globals() else None
-        murf_websocket_service = murf_websocket_service if 'murf_websocket_service' in globals() else None
-        return config
+    return previous
 
 
 # Initialize OAuth (Authlib) with Google configuration
@@ -245,10 +165,15 @@ async def root(request: Request):
 
 
 @app.get("/agent/chat/{session_id}/history", response_model=ChatHistoryResponse)
-async def get_chat_history_endpoint(session_id: str = Path(..., description="Session ID")):
-    """Get chat history for a session"""
+async def get_chat_history_endpoint(
+    session_id: str = Path(..., description="Session ID"),
+    before_seq: Optional[int] = Query(None, ge=1, description="Return messages older than this seq"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; omit both parameters for the full history")
+):
+    """Get chat history for a session, optionally one page at a time (newest page first)"""
+    services = service_registry
     try:
-        if not database_service:
+        if not services.database:
             return ChatHistoryResponse(
                 success=False,
                 session_id=session_id,
@@ -257,12 +182,20 @@ async def get_chat_history_endpoint(session_id: str = Path(..., description="Ses
                 error="Database service not available"
             )
             
-        chat_history = await database_service.get_chat_history(session_id)
+        if before_seq is None and limit is None:
+            chat_history = await services.database.get_chat_history(session_id)
+            next_before_seq = None
+        else:
+            chat_history, next_before_seq = await services.database.get_chat_history_page(
+                session_id, before_seq=before_seq, limit=limit or 50
+            )
         return ChatHistoryResponse(
             success=True,
             session_id=session_id,
             messages=chat_history,
-            message_count=len(chat_history)
+            message_count=len(chat_history),
+            next_before_seq=next_before_seq,
+            has_more=next_before_seq is not None
         )
     except Exception as e:
         logger.error(f"Error getting chat history for session {session_id}: {str(e)}")
@@ -279,18 +212,25 @@ from fastapi import Request as FastAPIRequest
 
 
 @app.get("/agent/chat/all")
-async def get_all_chat_histories_endpoint(request: FastAPIRequest):
-    """Get all chat histories across sessions (used by frontend conversation history viewer).
+async def get_all_chat_histories_endpoint(
+    request: FastAPIRequest,
+    limit: int = Query(20, ge=1, le=100, description="Sessions per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_messages: bool = Query(False, description="Attach full message lists to each session"),
+    format: str = Query("json", description="'json' or 'ndjson' (one session per line, then the cursor)")
+):
+    """List chat sessions, most recently active first (used by frontend conversation history viewer).
 
     If an Authorization: Bearer <token> header is provided, the endpoint will verify the token
     and return only sessions attributed to that user (by user_id). Otherwise returns all sessions.
+    Results are paginated with an opaque cursor and contain summaries (with a first-message
+    preview) unless include_messages is set.
     """
+    services = service_registry
     try:
-        if not database_service:
+        if not services.database:
             return {"success": False, "chat_histories": [], "error": "Database service not available"}
 
-        histories = await database_service.get_all_chat_histories()
-
         # read optional Authorization header
         auth = request.headers.get("authorization") or request.headers.get("Authorization")
         user_id = None
@@ -300,59 +240,23 @@ async def get_all_chat_histories_endpoint(request: FastAPIRequest):
             if payload and payload.get("user_id"):
                 user_id = payload.get("user_id")
 
-        if user_id:
-            filtered = []
-            for s in histories:
-                sid_user = None
-                # support both MongoDB document shape and the in-memory shapes we use as fallback
-                if isinstance(s, dict):
-                    sid_user = s.get("user_id")
-                    # some older records might store metadata under different keys
-                    if not sid_user:
-                        sid_user = s.get("session_owner") or s.get("owner")
-                    # if in-memory structure uses nested dict
-                    if not sid_user and isinstance(s.get("messages"), dict):
-                        sid_user = s.get("messages").get("user_id")
-
-                if sid_user == user_id:
-                    filtered.append(s)
-
-            histories = filtered
-
-        # Ensure returned data is JSON serializable (datetime -> isoformat)
-        def normalize_session(sess):
-            try:
-                sess_copy = dict(sess)
-            except Exception:
-                return sess
-
-            msgs = sess_copy.get("messages") or []
-            norm_msgs = []
-            for m in msgs:
-                try:
-                    m_copy = dict(m)
-                except Exception:
-                    m_copy = m
-                ts = m_copy.get("timestamp")
-                try:
-                    if hasattr(ts, "isoformat"):
-                        m_copy["timestamp"] = ts.isoformat()
-                except Exception:
-                    pass
-                norm_msgs.append(m_copy)
-            sess_copy["messages"] = norm_msgs
-
-            lu = sess_copy.get("last_updated")
-            try:
-                if hasattr(lu, "isoformat"):
-                    sess_copy["last_updated"] = lu.isoformat()
-            except Exception:
-                pass
-
-            return sess_copy
-
-        normalized = [normalize_session(s) for s in histories]
-        return {"success": True, "chat_histories": normalized}
+        try:
+            sessions, next_cursor = await services.database.list_chat_sessions(
+                user_id=user_id, limit=limit, cursor=cursor, include_messages=include_messages
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        if format == "ndjson":
+            def ndjson_lines():
+                for sess in sessions:
+                    yield json.dumps(sess, cls=DateTimeEncoder) + "\n"
+                yield json.dumps({"next_cursor": next_cursor}) + "\n"
+            return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+        return {"success": True, "chat_histories": sessions, "next_cursor": next_cursor}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting all chat histories: {str(e)}")
         return {"success": False, "chat_histories": [], "error": str(e)}
@@ -360,11 +264,12 @@ async def get_all_chat_histories_endpoint(request: FastAPIRequest):
 @app.delete("/agent/chat/{session_id}/history")
 async def clear_session_history(session_id: str = Path(..., description="Session ID")):
     """Clear chat history for a specific session"""
+    services = service_registry
     try:
-        if not database_service:
+        if not services.database:
             return {"success": False, "message": "Database service not available"}
             
-        success = await database_service.clear_session_history(session_id)
+        success = await services.database.clear_session_history(session_id)
         if success:
             logger.info(f"Chat history cleared for session: {session_id}")
             return {"success": True, "message": f"Chat history cleared for session {session_id}"}
@@ -375,24 +280,99 @@ async def clear_session_history(session_id: str = Path(..., description="Session
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+def register_metrics_collectors():
+    """Export the stats components already keep as gauges on /metrics"""
+    stage_metrics.register_collector("websocket", manager.stats)
+    stage_metrics.register_collector(
+        "storage", lambda: service_registry.database.storage_stats() if service_registry.database else None
+    )
+    stage_metrics.register_collector(
+        "stt_sessions", lambda: {"active": service_registry.assemblyai_sessions.active_sessions}
+        if service_registry.assemblyai_sessions else None
+    )
+    stage_metrics.register_collector("web_search_cache", web_search_service.cache_stats)
+    stage_metrics.register_collector("tts_cache", lambda: shared_audio_cache().stats())
+    stage_metrics.register_collector("audio_archive", audio_archive.stats)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Stage latency histograms and component gauges in the Prometheus text format"""
+    return PlainTextResponse(stage_metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+async def require_session_owner(request: Request, session_id: str):
+    """Reject requests without a valid bearer token for the user the session belongs to"""
+    auth_header = request.headers.get('authorization') or request.headers.get('Authorization')
+    payload = None
+    if auth_header and isinstance(auth_header, str) and auth_header.lower().startswith('bearer '):
+        token = auth_header.split(None, 1)[1]
+        payload = auth_service.verify_token(token)
+    if not payload or not payload.get('user_id'):
+        raise HTTPException(status_code=401, detail="Authentication required")
+    database = service_registry.database
+    owner = await database.get_session_owner(session_id) if database else None
+    if owner != payload.get('user_id'):
+        raise HTTPException(status_code=403, detail="Not allowed to access this session")
+
+
+@app.get("/agent/chat/{session_id}/recordings")
+async def list_session_recordings(request: Request, session_id: str = Path(..., description="Session ID")):
+    """List a session's archived microphone recordings, oldest first (owner only)"""
+    await require_session_owner(request, session_id)
+    recordings = audio_archive.session_recordings(session_id)
+    return {
+        "success": True,
+        "session_id": session_id,
+        "recordings": [
+            {
+                "index": i,
+                "started_at": datetime.fromtimestamp(recording.started_at).isoformat(),
+                "bytes": recording.length,
+                "url": f"/agent/chat/{session_id}/recordings/{i}"
+            }
+            for i, recording in enumerate(recordings)
+        ]
+    }
+
+
+@app.get("/agent/chat/{session_id}/recordings/{index}")
+async def get_session_recording(
+    request: Request,
+    session_id: str = Path(..., description="Session ID"),
+    index: int = Path(..., ge=0, description="Recording number from the recordings list")
+):
+    """Serve one archived recording as WAV, with Range support for seeking (owner only)"""
+    await require_session_owner(request, session_id)
+    recordings = audio_archive.session_recordings(session_id)
+    if index >= len(recordings):
+        raise HTTPException(status_code=404, detail="Recording not found")
+    recording = recordings[index]
+    try:
+        return RangeFileResponse(
+            audio_archive.recording_path(recording), recording.offset, recording.length,
+            range_header=request.headers.get("range"), media_type="audio/wav"
+        )
+    except RangeNotSatisfiable:
+        raise HTTPException(status_code=416, detail="Range not satisfiable",
+                            headers={"Content-Range": f"bytes */{recording.length}"})
+
+
 @app.post("/api/config")
 async def update_configuration(config: APIKeyConfig):
     """Update API key configuration"""
     try:
-        # Reinitialize services with the new configuration
-        initialize_services(config)
+        # Build the complete new generation off to the side, then swap it in atomically.
+        # Requests already running keep the snapshot they started with.
+        async with config_lock:
+            new_registry = await build_service_registry(config, previous=service_registry)
+            previous = activate_service_registry(new_registry)
+        asyncio.create_task(close_service_registry(previous, successor=new_registry, grace_seconds=RETIRE_GRACE_SECONDS))
         
         return {
             "success": True,
             "message": "Configuration updated successfully",
-            "services_initialized": {
-                "stt": stt_service is not None,
-                "llm": llm_service is not None,
-                "tts": tts_service is not None,
-                "database": database_service is not None,
-                "assemblyai_streaming": assemblyai_streaming_service is not None,
-                "murf_websocket": murf_websocket_service is not None
-            }
+            "services_initialized": new_registry.status()
         }
     except Exception as e:
         logger.error(f"Error updating configuration: {str(e)}")
@@ -402,6 +382,7 @@ async def update_configuration(config: APIKeyConfig):
 @app.post("/auth/signup")
 async def signup(request: Request):
     """Register a new user and send welcome email"""
+    services = service_registry
     body = await request.json()
     email = body.get("email", "").strip().lower()
     first_name = body.get("first_name", "")
@@ -442,11 +423,11 @@ async def signup(request: Request):
 
     # Send welcome email in background if email service configured
     try:
-        if email_service and email_service.is_configured():
+        if services.email and services.email.is_configured():
             subject = "Welcome to TalkEasy"
             body_text = f"Hi {first_name or ''},\n\nThanks for signing up for TalkEasy. Your account has been created.\n\nRegards,\nTalkEasy Team"
             loop = asyncio.get_event_loop()
-            loop.run_in_executor(None, email_service.send_email, normalized_email, subject, body_text)
+            loop.run_in_executor(None, services.email.send_email, normalized_email, subject, body_text)
         else:
             logger.info("EmailService not configured - skipping welcome email")
     except Exception as e:
@@ -464,15 +445,15 @@ async def signup(request: Request):
                     logger.warning(f"Email deliverability check failed for {email_to_check}: {reason}")
                     # Optionally persist this metadata to DB if available
                     try:
-                        if database_service and database_service.is_connected():
-                            await database_service.db.users.update_one({'email': email_to_check}, {'$set': {'email_deliverable': False, 'email_deliverable_reason': reason}})
+                        if services.database and services.database.is_connected():
+                            await services.database.db.users.update_one({'email': email_to_check}, {'$set': {'email_deliverable': False, 'email_deliverable_reason': reason}})
                     except Exception:
                         pass
                 else:
                     # Mark deliverable
                     try:
-                        if database_service and database_service.is_connected():
-                            await database_service.db.users.update_one({'email': email_to_check}, {'$set': {'email_deliverable': True}})
+                        if services.database and services.database.is_connected():
+                            await services.database.db.users.update_one({'email': email_to_check}, {'$set': {'email_deliverable': True}})
                     except Exception:
                         pass
             except Exception as ex:
@@ -540,6 +521,7 @@ async def register_page(request: Request):
 @app.post('/auth/logout')
 async def logout(request: Request):
     """Logout endpoint. Accepts Authorization header or JSON body with token."""
+    services = service_registry
     try:
         token = None
         auth_header = request.headers.get('authorization')
@@ -584,7 +566,7 @@ async def logout(request: Request):
 
             # Persist revoked token to database immediately if DB is available
             try:
-                if database_service and database_service.is_connected():
+                if services.database and services.database.is_connected():
                     # Determine expiry timestamp from payload if available
                     exp_ts = None
                     try:
@@ -594,7 +576,7 @@ async def logout(request: Request):
 
                     try:
                         # Use the DatabaseService helper to persist revoked token
-                        await database_service.add_revoked_token(token, exp_ts)
+                        await services.database.add_revoked_token(token, exp_ts)
                         logger.info('Persisted revoked token to DB')
                     except Exception as db_e:
                         logger.warning(f'Failed to persist revoked token to DB: {db_e}')
@@ -603,8 +585,8 @@ async def logout(request: Request):
 
         # Optionally update last login/logout metadata in DB
         try:
-            if payload and database_service and payload.get('user_id'):
-                await database_service.update_user_last_login(payload.get('user_id'))
+            if payload and services.database and payload.get('user_id'):
+                await services.database.update_user_last_login(payload.get('user_id'))
         except Exception:
             pass
 
@@ -626,6 +608,7 @@ async def auth_login_google(request: Request):
 @app.get('/auth/callback/google', response_class=HTMLResponse)
 async def auth_callback_google(request: Request):
     """Handle Google OAuth callback, create user if needed, return tokens via a small redirect page."""
+    services = service_registry
     if not oauth:
         raise HTTPException(status_code=503, detail="OAuth not configured")
 
@@ -656,9 +639,9 @@ async def auth_callback_google(request: Request):
         try:
             user = await auth_service.create_user(email, first, last, os.urandom(16).hex())
             # mark email verified
-            if database_service and database_service.is_connected():
+            if services.database and services.database.is_connected():
                 try:
-                    await database_service.db.users.update_one({'email': email}, {'$set': {'email_verified': True}})
+                    await services.database.db.users.update_one({'email': email}, {'$set': {'email_verified': True}})
                 except Exception:
                     pass
         except Exception as e:
@@ -705,6 +688,7 @@ async def migrate_session(request: Request):
 @app.post("/api/persona/switch")
 async def switch_persona(request: Request):
     """Switch the AI persona"""
+    services = service_registry
     try:
         # Parse the JSON body
         body = await request.json()
@@ -713,8 +697,8 @@ async def switch_persona(request: Request):
         if not persona:
             raise HTTPException(status_code=400, detail="Persona not provided")
         
-        if llm_service:
-            llm_service.set_persona(persona)
+        if services.llm:
+            services.llm.set_persona(persona)
             return {
                 "success": True,
                 "message": f"Persona switched to {persona}",
@@ -786,18 +770,19 @@ async def chat_with_agent(
     audio: UploadFile = File(..., description="Audio file for voice input")
 ):
     """Chat with the voice agent using audio input"""
+    services = service_registry
     transcribed_text = ""
     response_text = ""
     audio_url = None
-    temp_audio_path = None
+    turn_started = time.perf_counter()
     
     try:
         # Validate services availability
-        config = initialize_services()
+        config = services.config
         if not config.are_keys_valid:
             missing_keys = config.validate_keys()
             error_message = get_fallback_message(ErrorType.API_KEYS_MISSING)
-            fallback_audio = await tts_service.generate_fallback_audio(error_message) if tts_service else None
+            fallback_audio = await services.tts.generate_fallback_audio(error_message) if services.tts else None
             return VoiceChatResponse(
                 success=False,
                 message=error_message,
@@ -821,36 +806,32 @@ async def chat_with_agent(
             if payload and payload.get('user_id'):
                 user_id = payload.get('user_id')
 
-        # Process audio file
-        audio_content = await audio.read()
-        temp_audio_path = f"temp_audio_{session_id}_{uuid.uuid4().hex}.wav"
-        
-        with open(temp_audio_path, "wb") as temp_file:
-            temp_file.write(audio_content)
-        
-        # Transcribe audio
-        transcribed_text = await stt_service.transcribe_audio(temp_audio_path)
+        # Transcribe straight from the upload's spooled buffer (in memory for small
+        # files) on the STT worker pool; nothing is copied to a temp file
+        with stage_metrics.timer("stt", path="rest"):
+            transcribed_text = await services.stt.transcribe_audio(audio.file)
         
         # Generate LLM response with chat history
-        if not database_service:
+        if not services.database:
             chat_history = []
-            user_save_success = False
-            assistant_save_success = False
         else:
-            chat_history = await database_service.get_chat_history(session_id)
-            
-            # Save user message to chat history
-            user_save_success = await database_service.add_message_to_history(session_id, "user", transcribed_text, user_id=user_id)
-        
-        response_text = await llm_service.generate_response(transcribed_text, chat_history)
+            with stage_metrics.timer("history_read", path="rest"):
+                chat_history = await services.database.get_recent_chat_history(session_id)
         
-        if database_service:
-            # Save assistant response to chat history (include user_id if available)
-            assistant_save_success = await database_service.add_message_to_history(session_id, "assistant", response_text, user_id=user_id)
+        try:
+            with stage_metrics.timer("llm", path="rest"):
+                response_text = await services.llm.generate_response(transcribed_text, chat_history)
+        finally:
+            if services.database:
+                # Queue the user message and reply together for write-behind persistence;
+                # the user message is kept even if the LLM call failed
+                services.database.enqueue_turn(session_id, transcribed_text, response_text, user_id=user_id)
         
         # Generate TTS audio
-        audio_url = await tts_service.generate_audio(response_text, session_id)
+        with stage_metrics.timer("tts", path="rest"):
+            audio_url = await services.tts.generate_speech(response_text)
         
+        stage_metrics.observe("turn", time.perf_counter() - turn_started, "ok", path="rest")
         return VoiceChatResponse(
             success=True,
             message="Voice chat processed successfully",
@@ -862,6 +843,7 @@ async def chat_with_agent(
         
     except Exception as e:
         logger.error(f"Error in chat_with_agent for session {session_id}: {str(e)}")
+        stage_metrics.observe("turn", time.perf_counter() - turn_started, "error", path="rest")
         
         # Generate appropriate error response based on the stage where error occurred
         if not transcribed_text:
@@ -877,7 +859,7 @@ async def chat_with_agent(
             error_type = ErrorType.GENERAL_ERROR
             error_message = get_fallback_message(ErrorType.GENERAL_ERROR)
         
-        fallback_audio = await tts_service.generate_fallback_audio(error_message) if tts_service else None
+        fallback_audio = await services.tts.generate_fallback_audio(error_message) if services.tts else None
         
         return VoiceChatResponse(
             success=False,
@@ -888,61 +870,137 @@ async def chat_with_agent(
             session_id=session_id,
             error_type=error_type
         )
-    
-    finally:
-        # Clean up temporary file
-        if temp_audio_path and os.path.exists(temp_audio_path):
-            try:
-                os.remove(temp_audio_path)
-            except Exception as e:
-                logger.warning(f"Failed to delete temp file {temp_audio_path}: {str(e)}")
         
 
+# Per-connection outbound queue bounds and the longest a single send may take
+WS_SEND_QUEUE_MAX_MESSAGES = int(os.getenv("WS_SEND_QUEUE_MAX_MESSAGES", "512"))
+WS_SEND_QUEUE_MAX_BYTES = int(os.getenv("WS_SEND_QUEUE_MAX_BYTES", str(8 * 1024 * 1024)))
+WS_SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+
+
 class ConnectionManager:
+    """Registry of open WebSockets, each with its own outbound queue and writer task.
+
+    Sending only enqueues, so the LLM and TTS pipelines never wait on a slow
+    client; see SocketOutbox for the coalesce/drop policy when a queue is full.
+    """
+
     def __init__(self):
-        self.active_connections: list[WebSocket] = []
+        self.active_connections: Dict[WebSocket, SocketOutbox] = {}
+        # Counters of connections that have already gone away
+        self.totals = {"sent": 0, "dropped": 0, "coalesced": 0, "slow_disconnects": 0}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections[websocket] = SocketOutbox(
+            websocket, WS_SEND_QUEUE_MAX_MESSAGES, WS_SEND_QUEUE_MAX_BYTES, WS_SEND_TIMEOUT,
+            on_failure=self.disconnect, on_overflow=self._disconnect_slow
+        )
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
+        outbox = self.active_connections.pop(websocket, None)
+        if outbox is not None:
+            # Let the writer finish what is already queued; it stops on the first failed send
+            outbox.close()
+            self.totals["sent"] += outbox.sent
+            self.totals["dropped"] += outbox.dropped
+            self.totals["coalesced"] += outbox.coalesced
         logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+
+    def _disconnect_slow(self, websocket: WebSocket):
+        self.totals["slow_disconnects"] += 1
+        self.disconnect(websocket)
+        asyncio.create_task(self._close_quietly(websocket, 1013))
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    async def close(self, websocket: WebSocket, code: int = 1000, timeout: float = 2.0):
+        """Deliver what is queued (waiting at most ``timeout``), then close the socket"""
+        outbox = self.active_connections.get(websocket)
+        self.disconnect(websocket)
+        if outbox is not None:
+            await outbox.wait_closed(timeout)
+        await self._close_quietly(websocket, code)
     
     def is_connected(self, websocket: WebSocket) -> bool:
         """Check if a WebSocket is still in active connections"""
         return websocket in self.active_connections
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        if self.is_connected(websocket):
-            try:
-                await websocket.send_text(message)
-            except Exception as e:
-                logger.error(f"Error sending personal message: {e}")
-                self.disconnect(websocket)
-        else:
+    def _enqueue(self, payload, websocket: WebSocket, coalesce_key: Optional[str], droppable: bool) -> bool:
+        outbox = self.active_connections.get(websocket)
+        if outbox is None:
             logger.debug("Attempted to send message to disconnected WebSocket")
+            return False
+        return outbox.put(payload, coalesce_key, droppable)
+
+    def queue_message(self, message: str, websocket: WebSocket,
+                      coalesce_key: Optional[str] = None, droppable: bool = False) -> bool:
+        """Queue a text message. ``coalesce_key`` replaces a still-queued message with the
+        same key; ``droppable`` messages are discarded rather than queued when full."""
+        return self._enqueue(message, websocket, coalesce_key, droppable)
+
+    async def send_personal_message(self, message: str, websocket: WebSocket,
+                                    coalesce_key: Optional[str] = None, droppable: bool = False) -> bool:
+        return self.queue_message(message, websocket, coalesce_key, droppable)
+
+    async def send_personal_bytes(self, data: bytes, websocket: WebSocket) -> bool:
+        return self._enqueue(data, websocket, None, False)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to WebSocket: {e}")
-                self.disconnect(connection)
+        # Each connection's writer sends on its own, under its own timeout
+        for websocket in list(self.active_connections):
+            self._enqueue(message, websocket, None, False)
+
+    def stats(self) -> Dict:
+        outboxes = list(self.active_connections.values())
+        depths = [len(outbox) for outbox in outboxes]
+        return {
+            "connections": len(outboxes),
+            "queued_messages": sum(depths),
+            "queued_bytes": sum(outbox.bytes_queued for outbox in outboxes),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": max((outbox.max_depth for outbox in outboxes), default=0),
+            "sent": self.totals["sent"] + sum(outbox.sent for outbox in outboxes),
+            "dropped": self.totals["dropped"] + sum(outbox.dropped for outbox in outboxes),
+            "coalesced": self.totals["coalesced"] + sum(outbox.coalesced for outbox in outboxes),
+            "slow_disconnects": self.totals["slow_disconnects"]
+        }
 
 
 manager = ConnectionManager()
 
+# Opt-in binary TTS audio (/ws/audio-stream?audio_transport=binary): each audio chunk is one
+# binary frame of a 12-byte big-endian header (uint32 turn id, uint32 chunk number,
+# uint8 flags with bit 0 = final chunk, 3 reserved bytes) followed by the raw audio bytes.
+# Control messages stay JSON text frames.
+AUDIO_FRAME_HEADER = struct.Struct(">IIB3x")
+AUDIO_FRAME_FINAL = 0x01
+_tts_turn_ids = itertools.count(1)
+
+# llm_streaming_chunk messages are batched: at most one per window unless a batch
+# reaches the size limit or ends a sentence
+LLM_CHUNK_COALESCE_MS = float(os.getenv("LLM_CHUNK_COALESCE_MS", "40"))
+LLM_CHUNK_COALESCE_CHARS = int(os.getenv("LLM_CHUNK_COALESCE_CHARS", "256"))
+
 # Global locks to prevent concurrent LLM streaming for the same session
 session_locks: Dict[str, asyncio.Lock] = {}
 
 # Global function to handle LLM streaming (moved outside WebSocket handler to prevent duplicates)
-async def handle_llm_streaming(user_message: str, session_id: str, websocket: WebSocket, web_search_enabled: bool = False, websocket_user_id: Optional[str] = None, language: str = 'auto'):
-    """Handle LLM streaming response and send to Murf WebSocket for TTS"""
+async def handle_llm_streaming(user_message: str, session_id: str, websocket: WebSocket, web_search_enabled: bool = False, websocket_user_id: Optional[str] = None, language: str = 'auto', binary_audio: bool = False, turn_started: Optional[float] = None):
+    """Handle LLM streaming response and send to Murf WebSocket for TTS.
+
+    ``turn_started`` is the perf_counter() time of the end of the user's turn; the
+    first token, first audio and turn latencies are measured from it.
+    """
+    services = service_registry
+    turn_started = turn_started or time.perf_counter()
+    turn_outcome = "error"
     
     # Prevent concurrent streaming for the same session
     if session_id not in session_locks:
@@ -953,22 +1011,16 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
         accumulated_response = ""
         audio_chunk_count = 0
         total_audio_size = 0
+        time_to_first_audio = None
         
         try:
             # Get chat history
             try:
-                if not database_service:
+                if not services.database:
                     chat_history = []
                 else:
-                    chat_history = await database_service.get_chat_history(session_id)
-                    # Save user message to chat history only if websocket_user_id is available
-                    if websocket_user_id:
-                        try:
-                            save_success = await database_service.add_message_to_history(session_id, "user", user_message, user_id=websocket_user_id)
-                        except Exception:
-                            save_success = await database_service.add_message_to_history(session_id, "user", user_message)
-                    else:
-                        save_success = False
+                    with stage_metrics.timer("history_read", path="ws"):
+                        chat_history = await services.database.get_recent_chat_history(session_id)
             except Exception as e:
                 logger.error(f"Chat history error: {str(e)}")
                 chat_history = []
@@ -983,11 +1035,11 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
             }
             await manager.send_personal_message(json.dumps(start_message), websocket)
             
-            # Connect to Murf WebSocket
             try:
-                await murf_websocket_service.connect()
-                
-                    # Create async generator for LLM streaming
+                if not services.murf_websocket:
+                    raise Exception("Murf WebSocket service not initialized")
+
+                # Create async generator for LLM streaming
                 async def llm_text_stream():
                     nonlocal accumulated_response
                     
@@ -996,7 +1048,8 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
                     if web_search_enabled and web_search_service and web_search_service.is_configured():
                         try:
                             logger.info(f"🔍 Performing web search for: {user_message}")
-                            search_results = await web_search_service.search_web(user_message, max_results=3)
+                            with stage_metrics.timer("web_search", path="ws"):
+                                search_results = await web_search_service.search_web(user_message, max_results=3)
                             web_search_results = web_search_service.format_search_results(search_results, user_message)
                             logger.info(f"✅ Web search completed with {len(search_results)} results")
                             
@@ -1010,62 +1063,91 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
                             yield web_search_results
                             return
                     
+                    def send_text_batch(text: str, accumulated_length: int):
+                        chunk_message = {
+                            "type": "llm_streaming_chunk",
+                            "chunk": text,
+                            "accumulated_length": accumulated_length,
+                            "timestamp": datetime.now().isoformat()
+                        }
+                        manager.queue_message(json.dumps(chunk_message), websocket)
+                    
+                    coalescer = ChunkCoalescer(send_text_batch, LLM_CHUNK_COALESCE_MS / 1000, LLM_CHUNK_COALESCE_CHARS)
+                    
                     # Normal LLM streaming for non-web-search queries
-                    llm_stream = llm_service.generate_streaming_response(user_message, chat_history, web_search_results if web_search_enabled else None, language=language)
-                    async for chunk in llm_stream:
-                        if chunk:
-                            accumulated_response += chunk
-                            chunk_message = {
-                                "type": "llm_streaming_chunk",
-                                "chunk": chunk,
-                                "accumulated_length": len(accumulated_response),
-                                "timestamp": datetime.now().isoformat()
-                            }
-                            await manager.send_personal_message(json.dumps(chunk_message), websocket)
-                            yield chunk
+                    llm_stream = services.llm.generate_streaming_response(user_message, chat_history, web_search_results if web_search_enabled else None, language=language)
+                    try:
+                        async for chunk in llm_stream:
+                            if chunk:
+                                if not accumulated_response:
+                                    stage_metrics.observe("first_token", time.perf_counter() - turn_started, path="ws")
+                                accumulated_response += chunk
+                                coalescer.add(chunk)
+                                yield chunk
+                    finally:
+                        # Whatever is still buffered goes out before completion or error messages
+                        coalescer.flush()
+                        logger.debug(f"LLM text: {coalescer.chunks_in} chunks sent as {coalescer.messages_out} messages")
                     
                     if not accumulated_response.strip():
                         logger.error(f"❌ Empty accumulated response for: '{user_message}'")
                         raise Exception("Empty response from LLM stream")
                 
                 # Send LLM stream to Murf and receive base64 audio
+                turn_id = next(_tts_turn_ids) & 0xFFFFFFFF
                 tts_start_message = {
                     "type": "tts_streaming_start", 
                     "message": "Starting TTS streaming with Murf WebSocket...",
+                    "turn_id": turn_id,
+                    "audio_transport": "binary" if binary_audio else "json",
                     "timestamp": datetime.now().isoformat()
                 }
                 await manager.send_personal_message(json.dumps(tts_start_message), websocket)
                 
-                # Stream LLM text to Murf and get base64 audio back
-                async for audio_response in murf_websocket_service.stream_text_to_audio(llm_text_stream()):
-                    if audio_response["type"] == "audio_chunk":
-                        audio_chunk_count += 1
-                        total_audio_size += audio_response["chunk_size"]
+                # Check out a pre-warmed Murf connection for this turn and stream LLM text through it
+                async with services.murf_websocket.turn() as murf_turn:
+                    async for audio_response in murf_turn.stream_text_to_audio(llm_text_stream()):
+                        if audio_response["type"] == "audio_chunk":
+                            if audio_chunk_count == 0:
+                                stage_metrics.observe("first_audio", time.perf_counter() - turn_started,
+                                                      "cache_hit" if murf_turn.served_from_cache else "ok", path="ws")
+                            audio_chunk_count += 1
+                            total_audio_size += audio_response["chunk_size"]
                         
-                        # Send audio data to client
-                        audio_message = {
-                            "type": "tts_audio_chunk",
-                            "audio_base64": audio_response["audio_base64"],
-                            "chunk_number": audio_response["chunk_number"],
-                            "chunk_size": audio_response["chunk_size"],
-                            "total_size": audio_response["total_size"],
-                            "is_final": audio_response["is_final"],
-                            "timestamp": audio_response["timestamp"]
-                        }
-                        await manager.send_personal_message(json.dumps(audio_message), websocket)
+                            # Send audio data to client
+                            if binary_audio:
+                                header = AUDIO_FRAME_HEADER.pack(
+                                    turn_id, audio_response["chunk_number"],
+                                    AUDIO_FRAME_FINAL if audio_response["is_final"] else 0
+                                )
+                                await manager.send_personal_bytes(
+                                    header + base64.b64decode(audio_response["audio_base64"]), websocket
+                                )
+                            else:
+                                audio_message = {
+                                    "type": "tts_audio_chunk",
+                                    "audio_base64": audio_response["audio_base64"],
+                                    "chunk_number": audio_response["chunk_number"],
+                                    "chunk_size": audio_response["chunk_size"],
+                                    "total_size": audio_response["total_size"],
+                                    "is_final": audio_response["is_final"],
+                                    "timestamp": audio_response["timestamp"]
+                                }
+                                await manager.send_personal_message(json.dumps(audio_message), websocket)
                         
-                        # Check if this is the final chunk
-                        if audio_response["is_final"]:
-                            break
+                            # Check if this is the final chunk
+                            if audio_response["is_final"]:
+                                break
                     
-                    elif audio_response["type"] == "status":
-                        # Send status updates to client
-                        status_message = {
-                            "type": "tts_status",
-                            "data": audio_response["data"],
-                            "timestamp": audio_response["timestamp"]
-                        }
-                        await manager.send_personal_message(json.dumps(status_message), websocket)
+                        elif audio_response["type"] == "status":
+                            # Send status updates to client
+                            status_message = {
+                                "type": "tts_status",
+                                "data": audio_response["data"],
+                                "timestamp": audio_response["timestamp"]
+                            }
+                            await manager.send_personal_message(json.dumps(status_message), websocket, droppable=True)
+                    time_to_first_audio = murf_turn.first_audio_latency
                 
             except Exception as e:
                 logger.error(f"Error with Murf WebSocket streaming: {str(e)}")
@@ -1076,23 +1158,6 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
                 }
                 await manager.send_personal_message(json.dumps(error_message), websocket)
             
-            finally:
-                # Disconnect from Murf WebSocket
-                try:
-                    await murf_websocket_service.disconnect()
-                except Exception as e:
-                    logger.error(f"Error disconnecting from Murf WebSocket: {str(e)}")
-            
-            # Save to chat history for authenticated websocket users only
-            try:
-                if database_service and accumulated_response and websocket_user_id:
-                    try:
-                        save_success = await database_service.add_message_to_history(session_id, "assistant", accumulated_response, user_id=websocket_user_id)
-                    except Exception:
-                        save_success = await database_service.add_message_to_history(session_id, "assistant", accumulated_response)
-            except Exception as e:
-                logger.error(f"Failed to save assistant response to history: {str(e)}")
-            
             # Send completion notification
             complete_message = {
                 "type": "llm_streaming_complete",
@@ -1101,11 +1166,13 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
                 "total_length": len(accumulated_response),
                 "audio_chunks_received": audio_chunk_count,
                 "total_audio_size": total_audio_size,
+                "time_to_first_audio": time_to_first_audio,
                 "session_id": session_id,  # Include session_id in response
                 "web_search_enabled": web_search_enabled,
                 "timestamp": datetime.now().isoformat()
             }
             await manager.send_personal_message(json.dumps(complete_message), websocket)
+            turn_outcome = "ok" if audio_chunk_count else "no_audio"
             
         except Exception as e:
             logger.error(f"Error in LLM streaming: {str(e)}")
@@ -1117,6 +1184,16 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
             await manager.send_personal_message(json.dumps(error_message), websocket)
         
         finally:
+            # Save the turn to chat history for authenticated websocket users only. The user
+            # message and reply are queued together so they are written in one batch; the
+            # user message is kept even when the turn failed.
+            try:
+                if services.database and websocket_user_id:
+                    services.database.enqueue_turn(session_id, user_message, accumulated_response,
+                                                   user_id=websocket_user_id)
+            except Exception as e:
+                logger.error(f"Failed to save turn to history: {str(e)}")
+            stage_metrics.observe("turn", time.perf_counter() - turn_started, turn_outcome, path="ws")
             # Clean up session lock if no longer needed
             if session_id in session_locks:
                 del session_locks[session_id]
@@ -1124,6 +1201,8 @@ async def handle_llm_streaming(user_message: str, session_id: str, websocket: We
 
 @app.websocket("/ws/audio-stream")
 async def audio_stream_websocket(websocket: WebSocket):
+    # Snapshot held for the life of the connection; /api/config only affects new connections
+    services = service_registry
     await manager.connect(websocket)
     
     # Try to get session_id from query parameters first
@@ -1144,13 +1223,18 @@ async def audio_stream_websocket(websocket: WebSocket):
     web_search_enabled = query_params.get('web_search', 'false').lower() == 'true'
     # language preference for responses: 'en', 'hi', 'both', or 'auto'
     lang_param = query_params.get('lang', 'auto').lower()
+    # TTS audio delivery: 'json' (base64 in tts_audio_chunk messages) or 'binary' frames
+    binary_audio = query_params.get('audio_transport', 'json').lower() == 'binary'
     
     if not session_id:
         session_id = str(uuid.uuid4())
+    elif services.database:
+        # Known session: warm its history so the first turn doesn't wait on MongoDB
+        asyncio.create_task(services.database.prefetch_session_history(session_id))
     
-    audio_filename = f"streamed_audio_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-    audio_filepath = os.path.join("streamed_audio", audio_filename)
-    os.makedirs("streamed_audio", exist_ok=True)
+    # Microphone audio is archived off the event loop; None when recording is disabled
+    recorder = audio_archive.start_recording(session_id)
+    audio_filename = recorder.filename if recorder else None
     is_websocket_active = True
     last_processed_transcript = ""  # Track last processed transcript to prevent duplicates
     last_processing_time = 0  # Track when we last processed a transcript
@@ -1161,6 +1245,7 @@ async def audio_stream_websocket(websocket: WebSocket):
             if is_websocket_active and manager.is_connected(websocket):
                 # Only show final transcriptions and trigger LLM streaming
                 if transcript_data.get("type") == "final_transcript":
+                    turn_started = time.perf_counter()
                     await manager.send_personal_message(json.dumps(transcript_data), websocket)
                     final_text = transcript_data.get('text', '').strip()
                     
@@ -1177,23 +1262,38 @@ async def audio_stream_websocket(websocket: WebSocket):
                         normalized_current != normalized_last and 
                         len(normalized_current) > 0 and 
                         time_since_last >= 2.0 and
-                        llm_service):
+                        services.llm):
                         
                         last_processed_transcript = final_text
                         last_processing_time = current_time
 
                         # Pass web_search_enabled, websocket_user_id and lang_param to LLM streaming
-                        await handle_llm_streaming(final_text, session_id, websocket, web_search_enabled, websocket_user_id, language=lang_param)
+                        await handle_llm_streaming(final_text, session_id, websocket, web_search_enabled, websocket_user_id, language=lang_param, binary_audio=binary_audio, turn_started=turn_started)
                         
         except Exception as e:
             logger.error(f"Error sending transcription: {e}")
 
     # Initialize streaming readiness flag
     assemblyai_ready = False
+    # Each connection gets its own upstream AssemblyAI session from this generation's factory
+    session_factory = services.assemblyai_sessions
+    streaming_session = None
     
     try:
-        if assemblyai_streaming_service:
-            assemblyai_streaming_service.set_transcription_callback(transcription_callback)
+        if session_factory:
+            streaming_session = await session_factory.acquire(transcription_callback)
+            if streaming_session is None:
+                reject_message = {
+                    "type": "transcription_error",
+                    "message": "Too many concurrent voice sessions. Please try again shortly.",
+                    "status": "capacity_exceeded",
+                    "timestamp": datetime.now().isoformat()
+                }
+                await manager.send_personal_message(json.dumps(reject_message), websocket)
+                is_websocket_active = False
+                await manager.close(websocket, code=1013)
+                return
+
             async def safe_websocket_callback(msg):
                 nonlocal assemblyai_ready
                 if is_websocket_active and manager.is_connected(websocket):
@@ -1204,11 +1304,15 @@ async def audio_stream_websocket(websocket: WebSocket):
                     elif msg.get("type") == "transcription_error":
                         assemblyai_ready = False
                         logger.error(f"❌ AssemblyAI streaming error: {msg.get('message')}")
+                    if msg.get("type") == "partial_transcript":
+                        # Only the newest partial matters; a final transcript always follows
+                        return await manager.send_personal_message(json.dumps(msg), websocket,
+                                                                   coalesce_key="partial_transcript", droppable=True)
                     return await manager.send_personal_message(json.dumps(msg), websocket)
                 return None
             
             # Start the streaming service and wait for it to be ready
-            stream_started = await assemblyai_streaming_service.start_streaming_transcription(
+            stream_started = await streaming_session.start_streaming_transcription(
                 websocket_callback=safe_websocket_callback
             )
             
@@ -1220,103 +1324,100 @@ async def audio_stream_websocket(websocket: WebSocket):
             "message": "Audio streaming endpoint ready with AssemblyAI transcription. Send binary audio data.",
             "session_id": session_id,
             "audio_filename": audio_filename,
-            "transcription_enabled": assemblyai_streaming_service is not None,
+            "transcription_enabled": streaming_session is not None,
             "transcription_ready": assemblyai_ready,
             "web_search_enabled": web_search_enabled,
+            "audio_transport": "binary" if binary_audio else "json",
             "timestamp": datetime.now().isoformat()
         }
         await manager.send_personal_message(json.dumps(welcome_message), websocket)
         
-        with open(audio_filepath, "wb") as audio_file:
-            chunk_count = 0
-            total_bytes = 0
-            
-            while True:
-                try:
-                    message = await websocket.receive()
+        chunk_count = 0
+        total_bytes = 0
+        
+        while True:
+            try:
+                message = await websocket.receive()
+                
+                if "text" in message:
+                    text_data = message["text"]
                     
-                    if "text" in message:
-                        text_data = message["text"]
-                        
-                        # Try to parse as JSON first (for session_id message)
-                        try:
-                            command_data = json.loads(text_data)
-                            if isinstance(command_data, dict):
-                                if command_data.get("type") == "session_id":
-                                    # Update session_id if provided from frontend
-                                    new_session_id = command_data.get("session_id")
-                                    if new_session_id and new_session_id != session_id:
-                                        logger.info(f"Updating session_id from {session_id} to {new_session_id}")
-                                        session_id = new_session_id
-                                        # Update audio filename with new session ID
-                                        audio_filename = f"streamed_audio_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
-                                        audio_filepath = os.path.join("streamed_audio", audio_filename)
-                                elif command_data.get("type") == "web_search_toggle":
-                                    # Update web search setting
-                                    web_search_enabled = command_data.get("enabled", False)
-                                    logger.info(f"Web search {'enabled' if web_search_enabled else 'disabled'}")
-                                continue
-                        except json.JSONDecodeError:
-                            # Not JSON, treat as regular command
-                            pass
-                        
-                        command = text_data
-                        
-                        if command == "start_streaming":
-                            response = {
-                                "type": "command_response",
-                                "message": "Ready to receive audio chunks with real-time transcription",
-                                "status": "streaming_ready"
-                            }
-                            await manager.send_personal_message(json.dumps(response), websocket)
-                            
-                        elif command == "stop_streaming":
-                            response = {
-                                "type": "command_response",
-                                "message": "Stopping audio stream",
-                                "status": "streaming_stopped"
-                            }
-                            await manager.send_personal_message(json.dumps(response), websocket)
-                            
-                            if assemblyai_streaming_service:
-                                async def safe_stop_callback(msg):
-                                    if manager.is_connected(websocket):
-                                        return await manager.send_personal_message(json.dumps(msg), websocket)
-                                    return None
-                            break
+                    # Try to parse as JSON first (for session_id message)
+                    try:
+                        command_data = json.loads(text_data)
+                        if isinstance(command_data, dict):
+                            if command_data.get("type") == "session_id":
+                                # Update session_id if provided from frontend
+                                new_session_id = command_data.get("session_id")
+                                if new_session_id and new_session_id != session_id:
+                                    logger.info(f"Updating session_id from {session_id} to {new_session_id}")
+                                    session_id = new_session_id
+                                    # Continue the recording under the new session ID
+                                    if recorder:
+                                        recorder.close()
+                                        recorder = audio_archive.start_recording(session_id)
+                                        audio_filename = recorder.filename
+                            elif command_data.get("type") == "web_search_toggle":
+                                # Update web search setting
+                                web_search_enabled = command_data.get("enabled", False)
+                                logger.info(f"Web search {'enabled' if web_search_enabled else 'disabled'}")
+                            continue
+                    except json.JSONDecodeError:
+                        # Not JSON, treat as regular command
+                        pass
                     
-                    elif "bytes" in message:
-                        audio_chunk = message["bytes"]
-                        chunk_count += 1
-                        total_bytes += len(audio_chunk)
-                        
-                        # Write to file
-                        audio_file.write(audio_chunk)
-                        
-                        # Send to AssemblyAI for transcription only if service is ready
-                        if (assemblyai_streaming_service and 
-                            is_websocket_active and 
-                            assemblyai_ready and 
-                            assemblyai_streaming_service.is_ready_for_audio()):
-                            await assemblyai_streaming_service.send_audio_chunk(audio_chunk)
+                    command = text_data
+                    
+                    if command == "start_streaming":
+                        response = {
+                            "type": "command_response",
+                            "message": "Ready to receive audio chunks with real-time transcription",
+                            "status": "streaming_ready"
+                        }
+                        await manager.send_personal_message(json.dumps(response), websocket)
                         
-                        # Send chunk confirmation to client (less frequently to reduce noise)
-                        if chunk_count % 50 == 0:  # Send every 50th chunk to reduce spam
-                            chunk_response = {
-                                "type": "audio_chunk_received",
-                                "chunk_number": chunk_count,
-                                "total_bytes": total_bytes,
-                                "transcription_active": assemblyai_ready and assemblyai_streaming_service.is_active() if assemblyai_streaming_service else False,
-                                "timestamp": datetime.now().isoformat()
-                            }
-                            await manager.send_personal_message(json.dumps(chunk_response), websocket)
+                    elif command == "stop_streaming":
+                        response = {
+                            "type": "command_response",
+                            "message": "Stopping audio stream",
+                            "status": "streaming_stopped"
+                        }
+                        await manager.send_personal_message(json.dumps(response), websocket)
+                        break
                 
-                except WebSocketDisconnect:
-                    break
-                except Exception as e:
-                    logger.error(f"Error processing audio chunk: {e}")
-                    break
-        
+                elif "bytes" in message:
+                    audio_chunk = message["bytes"]
+                    chunk_count += 1
+                    total_bytes += len(audio_chunk)
+                    
+                    # Hand off to the recorder thread
+                    if recorder:
+                        recorder.write(audio_chunk)
+                    
+                    # Send to AssemblyAI for transcription only if service is ready
+                    if (streaming_session and 
+                        is_websocket_active and 
+                        assemblyai_ready and 
+                        streaming_session.is_ready_for_audio()):
+                        await streaming_session.send_audio_chunk(audio_chunk)
+                    
+                    # Send chunk confirmation to client (less frequently to reduce noise)
+                    if chunk_count % 50 == 0:  # Send every 50th chunk to reduce spam
+                        chunk_response = {
+                            "type": "audio_chunk_received",
+                            "chunk_number": chunk_count,
+                            "total_bytes": total_bytes,
+                            "transcription_active": assemblyai_ready and streaming_session.is_active() if streaming_session else False,
+                            "timestamp": datetime.now().isoformat()
+                        }
+                        await manager.send_personal_message(json.dumps(chunk_response), websocket, droppable=True)
+            
+            except WebSocketDisconnect:
+                break
+            except Exception as e:
+                logger.error(f"Error processing audio chunk: {e}")
+                break
+    
         final_response = {
             "type": "audio_stream_complete",
             "message": f"Audio stream completed. Total chunks: {chunk_count}, Total bytes: {total_bytes}",
@@ -1337,8 +1438,12 @@ async def audio_stream_websocket(websocket: WebSocket):
         manager.disconnect(websocket)
     finally:
         is_websocket_active = False
-        if assemblyai_streaming_service:
-            await assemblyai_streaming_service.stop_streaming_transcription()
+        if recorder:
+            recorder.close()
+        if session_factory:
+            await session_factory.release(streaming_session)
+        # Every exit path ends here: deliver what is queued, stop the writer task and close the socket
+        await manager.close(websocket)
 
 
 # /auth/test endpoint removed
@@ -0,0 +1,36 @@
+"""Move chat messages embedded in chat_sessions documents into the chat_messages collection.
+
+Safe to re-run: messages are upserted by (session_id, seq) and each session's
+embedded array is removed only after every message is found in chat_messages.
+
+Usage: python migrate_chat_messages.py
+"""
+import asyncio
+import sys
+import logging
+from dotenv import load_dotenv
+from services.database_service import DatabaseService
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(name)s - %(message)s')
+
+
+async def migrate():
+    load_dotenv()
+    db = DatabaseService()
+    if not await db.connect():
+        print("❌ Could not connect to MongoDB (check MONGODB_URL)")
+        return False
+    try:
+        migrated = await db.migrate_embedded_messages()
+        print(f"✅ Migrated {migrated} sessions to chat_messages")
+        return True
+    except Exception as e:
+        print(f"❌ Migration failed: {type(e).__name__}: {e}")
+        return False
+    finally:
+        await db.close()
+
+
+if __name__ == "__main__":
+    success = asyncio.run(migrate())
+    sys.exit(0 if success else 1)
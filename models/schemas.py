@@ -23,6 +23,7 @@ class ChatMessage(BaseModel):
     role: str = Field(..., description="Role of the message sender (user or assistant)")
     content: str = Field(..., description="Content of the message")
     timestamp: datetime = Field(default_factory=datetime.now, description="Timestamp of the message")
+    seq: Optional[int] = Field(None, description="Position of the message within its session (1-based)")
 
 
 class ChatHistoryResponse(BaseModel):
@@ -30,6 +31,8 @@ class ChatHistoryResponse(BaseModel):
     session_id: str = Field(..., description="Session ID")
     messages: List[ChatMessage] = Field(default_factory=list, description="List of chat messages")
     message_count: int = Field(..., description="Number of messages in the chat history")
+    next_before_seq: Optional[int] = Field(None, description="Pass as before_seq to fetch the next older page")
+    has_more: bool = Field(False, description="Whether older messages exist beyond this page")
 
 
 class VoiceChatRequest(BaseModel):
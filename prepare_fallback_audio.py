@@ -0,0 +1,34 @@
+"""Pre-synthesize the fallback error messages for the configured Murf voice.
+
+Run at build/deploy time so the app can serve error audio from
+static/fallback_audio without calling Murf; the server also fills in any
+missing files in the background at startup.
+
+Usage: MURF_API_KEY=... [MURF_VOICE_ID=...] python prepare_fallback_audio.py
+"""
+import asyncio
+import os
+import sys
+import logging
+from dotenv import load_dotenv
+from services.tts_service import TTSService
+from utils.constants import FALLBACK_MESSAGES
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(name)s - %(message)s')
+
+
+async def prepare():
+    load_dotenv()
+    api_key = os.getenv("MURF_API_KEY")
+    if not api_key:
+        print("❌ MURF_API_KEY is not set")
+        return False
+    tts = TTSService(api_key, voice_id=os.getenv("MURF_VOICE_ID", "en-US-amara"))
+    prepared = await tts.prepare_fallback_audio()
+    print(f"✅ Synthesized {prepared} new files; {len(tts.fallback_audio)}/{len(FALLBACK_MESSAGES)} messages available")
+    return len(tts.fallback_audio) == len(FALLBACK_MESSAGES)
+
+
+if __name__ == "__main__":
+    success = asyncio.run(prepare())
+    sys.exit(0 if success else 1)
@@ -1,7 +1,10 @@
 import asyncio
+import os
 import sys
-from typing import Callable, Optional, Type
+import time
+from typing import Callable, Optional, Set, Type
 from utils.logging_config import get_logger
+from utils.metrics import stage_metrics
 import assemblyai as aai
 from assemblyai.streaming.v3 import (
     BeginEvent,
@@ -28,7 +31,7 @@ class AssemblyAIStreamingService:
         self._connection_attempts = 0
         self._max_connection_attempts = 3
         self._last_warning_time = 0  # Initialize here to prevent attribute errors
-        logger.info(f"AssemblyAI Streaming Service initialized with API key: {api_key[:10]}...{api_key[-4:]}")
+        logger.debug("AssemblyAI streaming session created")
         
     def set_transcription_callback(self, callback: Callable):
         self.transcription_callback = callback
@@ -147,16 +150,20 @@ class AssemblyAIStreamingService:
                 self.client.on(StreamingEvents.Termination, self.on_terminated)
                 self.client.on(StreamingEvents.Error, self.on_error)
 
-                # Start connection with proper parameters
-                self.client.connect(
-                    StreamingParameters(
-                        sample_rate=16000,
-                        encoding='pcm_s16le',  # 16-bit signed little-endian PCM
-                        format_turns=True,     # Enable text formatting
-                        end_of_turn_confidence_threshold=0.5,  # Lower threshold for faster detection
-                        min_end_of_turn_silence_when_confident=1200,  # 1200ms for better detection
+                # Start connection with proper parameters. The SDK handshake is blocking,
+                # so run it off the event loop to keep other connections responsive.
+                with stage_metrics.timer("stt_connect"):
+                    await self.loop.run_in_executor(
+                        None,
+                        self.client.connect,
+                        StreamingParameters(
+                            sample_rate=16000,
+                            encoding='pcm_s16le',  # 16-bit signed little-endian PCM
+                            format_turns=True,     # Enable text formatting
+                            end_of_turn_confidence_threshold=0.5,  # Lower threshold for faster detection
+                            min_end_of_turn_silence_when_confident=1200,  # 1200ms for better detection
+                        )
                     )
-                )
                 
                 logger.info("✅ AssemblyAI Universal Streaming client created successfully")
                 
@@ -225,8 +232,12 @@ class AssemblyAIStreamingService:
             self._active = False
             
             if self.client:
-                self.client.disconnect(terminate=True)
+                client = self.client
                 self.client = None
+                # disconnect() joins the SDK's reader/writer threads; don't block the loop on it
+                await asyncio.get_running_loop().run_in_executor(
+                    None, lambda: client.disconnect(terminate=True)
+                )
             self.loop = None
                 
             logger.info("AssemblyAI Universal Streaming transcription stopped")
@@ -245,4 +256,59 @@ class AssemblyAIStreamingService:
                     "type": "transcription_error",
                     "message": f"Error stopping transcription: {str(e)}",
                     "status": "error"
-                })
\ No newline at end of file
+                })
+
+
+class AssemblyAIStreamingSessionFactory:
+    """Creates one AssemblyAIStreamingService per audio-stream connection.
+
+    Each session owns its own StreamingClient, callbacks and event loop reference,
+    so connections no longer overwrite each other's callbacks or stop each other's
+    streams. The number of concurrent upstream sessions is capped; callers beyond
+    the cap wait up to ``queue_timeout`` seconds for a free slot and are rejected
+    after that.
+    """
+
+    def __init__(self, api_key: str, max_sessions: Optional[int] = None, queue_timeout: Optional[float] = None):
+        self.api_key = api_key
+        self.max_sessions = max_sessions or int(os.getenv("ASSEMBLYAI_MAX_SESSIONS", "20"))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else float(os.getenv("ASSEMBLYAI_SESSION_QUEUE_TIMEOUT", "5"))
+        self._slots = asyncio.Semaphore(self.max_sessions)
+        self._sessions: Set[AssemblyAIStreamingService] = set()
+        logger.info(
+            f"AssemblyAI Streaming session factory initialized with API key: {api_key[:10]}...{api_key[-4:]} "
+            f"(max sessions: {self.max_sessions})"
+        )
+
+    @property
+    def active_sessions(self) -> int:
+        return len(self._sessions)
+
+    async def acquire(self, transcription_callback: Optional[Callable] = None) -> Optional[AssemblyAIStreamingService]:
+        """Reserve a slot and return a fresh session, or None if the cap stays full past the queue timeout."""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            stage_metrics.observe("stt_session_wait", time.perf_counter() - started, "rejected")
+            logger.warning(f"⚠️ AssemblyAI session cap reached ({self.max_sessions}); rejecting connection")
+            return None
+        stage_metrics.observe("stt_session_wait", time.perf_counter() - started)
+
+        session = AssemblyAIStreamingService(self.api_key)
+        if transcription_callback:
+            session.set_transcription_callback(transcription_callback)
+        self._sessions.add(session)
+        logger.info(f"🎙️ AssemblyAI session acquired ({self.active_sessions}/{self.max_sessions} in use)")
+        return session
+
+    async def release(self, session: Optional[AssemblyAIStreamingService]):
+        """Stop a session's stream and free its slot. Safe to call more than once."""
+        if session is None or session not in self._sessions:
+            return
+        self._sessions.discard(session)
+        try:
+            await session.stop_streaming_transcription()
+        finally:
+            self._slots.release()
+            logger.info(f"AssemblyAI session released ({self.active_sessions}/{self.max_sessions} in use)")
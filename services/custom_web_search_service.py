@@ -1,22 +1,32 @@
 import os
+import re
+import time
 import json
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
+from collections import OrderedDict
 from typing import List, Dict, Optional
 import logging
 from utils.logging_config import get_logger
+from utils.metrics import stage_metrics
 
 logger = get_logger(__name__)
 
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+
 class CustomWebSearchService:
     """Custom web search service using direct HTTP requests to Tavily API"""
     
     def __init__(self):
         self.api_key = os.getenv("TAVILY_API_KEY")
         self.base_url = "https://api.tavily.com"
-        self.cache = {}
-        self.cache_duration = timedelta(minutes=5)
+        # LRU of normalized (query, max_results) -> (results, monotonic expiry)
+        self.cache: OrderedDict = OrderedDict()
+        self.cache_max_entries = int(os.getenv("WEB_SEARCH_CACHE_SIZE", "256"))
+        self.cache_duration = float(os.getenv("WEB_SEARCH_CACHE_TTL", "300"))
+        self.negative_cache_duration = float(os.getenv("WEB_SEARCH_NEGATIVE_TTL", "30"))
+        self.in_flight: Dict[tuple, asyncio.Task] = {}
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "failures": 0, "evictions": 0}
         self.session = None
         logger.info("🔍 Custom Web Search Service initialized")
     
@@ -30,22 +40,86 @@ class CustomWebSearchService:
             self.session = aiohttp.ClientSession()
         return self.session
     
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        """Case-, whitespace- and punctuation-insensitive form of a query for cache keys"""
+        return " ".join(_PUNCTUATION.sub(" ", query.casefold()).split())
+
+    def _cache_get(self, key):
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        results, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self.cache[key]
+            return None
+        self.cache.move_to_end(key)
+        return entry
+
+    def _cache_put(self, key, results: List[Dict], ttl: float):
+        self.cache[key] = (results, time.monotonic() + ttl)
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_max_entries:
+            self.cache.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def cache_stats(self) -> Dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(self.stats, entries=len(self.cache),
+                    hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0)
+
     async def search_web(self, query: str, max_results: int = 5) -> List[Dict]:
         """
-        Perform a web search using Tavily API and return results
+        Perform a web search using Tavily API and return results.
+        Identical (normalized) queries are served from cache, and concurrent
+        identical queries share a single upstream request.
         """
         if not self.is_configured():
             logger.warning("⚠️ Tavily API not configured")
             return []
         
         # Check cache first
-        cache_key = f"{query}_{max_results}"
-        if cache_key in self.cache:
-            cached_data, timestamp = self.cache[cache_key]
-            if datetime.now() - timestamp < self.cache_duration:
-                logger.info(f"📦 Using cached results for: {query}")
-                return cached_data
-        
+        cache_key = (self._normalize_query(query), max_results)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            self.stats["hits"] += 1
+            logger.info(f"📦 Using cached results for: {query}")
+            return cached[0]
+
+        fetch = self.in_flight.get(cache_key)
+        if fetch is not None:
+            self.stats["hits"] += 1
+            self.stats["coalesced"] += 1
+            logger.info(f"⏳ Joining in-flight search for: {query}")
+        else:
+            self.stats["misses"] += 1
+            # The fetch runs as its own task, so a caller that goes away (e.g. a client
+            # disconnecting) stops waiting without cancelling it for everyone else
+            fetch = asyncio.create_task(self._fetch_and_cache(cache_key, query, max_results))
+            # Mark a failure retrieved even if every waiter has gone
+            fetch.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self.in_flight[cache_key] = fetch
+        return await asyncio.shield(fetch)
+
+    async def _fetch_and_cache(self, cache_key: tuple, query: str, max_results: int) -> List[Dict]:
+        try:
+            with stage_metrics.timer("web_search_fetch") as timing:
+                results = await self._fetch_results(query, max_results)
+                if results is None:
+                    timing["outcome"] = "error"
+            if results is None:
+                # Remember the failure briefly so a flapping upstream isn't hammered
+                self.stats["failures"] += 1
+                results = []
+                self._cache_put(cache_key, results, self.negative_cache_duration)
+            else:
+                self._cache_put(cache_key, results, self.cache_duration)
+            return results
+        finally:
+            self.in_flight.pop(cache_key, None)
+
+    async def _fetch_results(self, query: str, max_results: int) -> Optional[List[Dict]]:
+        """Query Tavily; returns None on failure"""
         try:
             session = await self._get_session()
             headers = {
@@ -70,22 +144,19 @@ class CustomWebSearchService:
                 if response.status == 200:
                     data = await response.json()
                     results = data.get("results", [])
-                    
-                    # Cache the results
-                    self.cache[cache_key] = (results, datetime.now())
                     logger.info(f"✅ Web search completed for: {query} ({len(results)} results)")
                     return results
                 else:
                     error_text = await response.text()
                     logger.error(f"Tavily API error {response.status}: {error_text}")
-                    return []
+                    return None
                     
         except asyncio.TimeoutError:
             logger.error("Tavily API request timed out")
-            return []
+            return None
         except Exception as e:
             logger.error(f"Tavily search failed: {str(e)}")
-            return []
+            return None
     
     def format_search_results(self, search_results: List[Dict], query: str) -> str:
         """
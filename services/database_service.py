@@ -1,12 +1,42 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import ConnectionFailure
 import certifi
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+import asyncio
+import base64
 import logging
 import os
+import time
+from utils.fallback_store import BoundedDict, FallbackStore
+from utils.history_cache import SessionHistoryCache
+from utils.metrics import stage_metrics
+from utils.token_budget import trim_messages_to_budget
 
 logger = logging.getLogger(__name__)
 
+# Defaults for the history window fed into each LLM prompt
+HISTORY_WINDOW_MESSAGES = int(os.getenv("CHAT_HISTORY_WINDOW_MESSAGES", "20"))
+HISTORY_TOKEN_BUDGET = int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "2000"))
+# Length of the first-message preview stored on each session for listings
+SESSION_PREVIEW_CHARS = 120
+# Write-behind batching: flush when this many messages are queued or after this many seconds
+WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "100"))
+WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "0.25"))
+# Flushes a failing batch is retried for (while MongoDB is up) before it goes to the fallback store
+WRITE_MAX_RETRIES = int(os.getenv("DB_WRITE_MAX_RETRIES", "3"))
+# Read-through cache of the history window of hot sessions
+HISTORY_CACHE_MAX_SESSIONS = int(os.getenv("HISTORY_CACHE_MAX_SESSIONS", "1000"))
+HISTORY_CACHE_MAX_BYTES = int(os.getenv("HISTORY_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# Bounds of the in-memory store used while MongoDB is unavailable
+FALLBACK_MAX_BYTES = int(os.getenv("FALLBACK_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+FALLBACK_MAX_SESSIONS = int(os.getenv("FALLBACK_STORE_MAX_SESSIONS", "5000"))
+FALLBACK_TTL_SECONDS = float(os.getenv("FALLBACK_STORE_TTL_SECONDS", str(24 * 3600)))
+# Background reconnect backoff; writes made during an outage are replayed from the fallback store
+RECONNECT_MIN_DELAY = float(os.getenv("DB_RECONNECT_MIN_DELAY", "1"))
+RECONNECT_MAX_DELAY = float(os.getenv("DB_RECONNECT_MAX_DELAY", "30"))
+
 
 class DatabaseService:
     def __init__(self, mongodb_url: str = None):
@@ -15,8 +45,23 @@ class DatabaseService:
         self.ssl_allow_invalid = os.getenv("MONGODB_SSL_ALLOW_INVALID_CERTIFICATES", "false").lower() == "true"
         self.client = None
         self.db = None
-        self.in_memory_store = {}
-        self.user_sessions = {}  # Track user sessions for better organization
+        self.db_state = "disconnected"
+        self._reconnector: Optional[asyncio.Task] = None
+        self.fallback_store = FallbackStore(FALLBACK_MAX_BYTES, FALLBACK_MAX_SESSIONS, FALLBACK_TTL_SECONDS)
+        self.revoked_tokens_fallback: Dict[str, Optional[float]] = {}  # token -> expiry epoch
+        self.user_sessions = BoundedDict(FALLBACK_MAX_SESSIONS)  # Track user sessions for better organization
+        self._pending_writes: List[Tuple[str, Dict, Optional[str]]] = []
+        self._writes_in_flight: List[Tuple[str, Dict, Optional[str]]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flusher_stopping = False
+        self._write_failures = 0
+        # Replays of fallback messages while MongoDB is up (after a batch ran out of retries)
+        self._next_replay_at = 0.0
+        self._replay_delay = RECONNECT_MIN_DELAY
+        self.history_cache = SessionHistoryCache(HISTORY_WINDOW_MESSAGES, HISTORY_CACHE_MAX_SESSIONS,
+                                                 HISTORY_CACHE_MAX_BYTES)
     
     async def connect(self) -> bool:
         try:
@@ -56,12 +101,19 @@ class DatabaseService:
             logger.info("✅ Connected to MongoDB Atlas successfully")
             logger.info(f"📊 Using database: {db_name}")
             logger.info(f"🌐 Connected to: {self.mongodb_url.split('@')[1].split('/')[0] if '@' in self.mongodb_url else 'localhost'}")
+            # Writes buffered during an outage are replayed by the reconnect loop before going up
+            self.db_state = "replaying" if len(self.fallback_store) else "up"
             return True
         except Exception as e:
             logger.error(f"❌ MongoDB connection failed: {e}")
             logger.info("💾 Using in-memory storage as fallback")
+            if self.client is not None:
+                # Stop its monitor threads; the next attempt builds a fresh client
+                self.client.close()
             self.client = None
             self.db = None
+            self.db_state = "down"
+            self._start_reconnect()
             return False
     
     async def _ensure_database_exists(self):
@@ -96,6 +148,16 @@ class DatabaseService:
             # Create indexes for better performance
             await self.db.chat_sessions.create_index("session_id", unique=True)
             await self.db.chat_sessions.create_index("last_activity")
+            # Keyset pagination of session listings, optionally scoped to one user
+            await self.db.chat_sessions.create_index([("last_activity", -1), ("session_id", -1)])
+            await self.db.chat_sessions.create_index([("user_id", 1), ("last_activity", -1), ("session_id", -1)])
+            await self._backfill_last_activity()
+            # Messages live in their own collection, one document per message, ordered by seq
+            await self.db.chat_messages.create_index([("session_id", 1), ("seq", 1)], unique=True)
+            legacy_sessions = await self.db.chat_sessions.count_documents({"messages": {"$exists": True}}, limit=1)
+            if legacy_sessions:
+                await self._seed_legacy_message_counts()
+                logger.warning("⚠️ Found chat_sessions with embedded messages; run migrate_chat_messages.py to move them to chat_messages")
             await self.db.users.create_index("email", unique=True)
             # Create revoked_tokens collection and TTL index on expires_at so tokens auto-expire
             try:
@@ -128,7 +190,7 @@ class DatabaseService:
     
     def is_connected(self) -> bool:
         """Check if database is connected"""
-        return self.db is not None
+        return self.available
     
     async def test_connection(self) -> bool:
         """Test database connection"""
@@ -143,166 +205,621 @@ class DatabaseService:
     
     async def get_all_chat_histories(self) -> List[Dict]:
         """Get all chat histories across sessions (latest first)"""
-        if self.db is not None:
+        if self.available:
             try:
-                cursor = self.db.chat_sessions.find({}, {"_id": 0})
+                cursor = self.db.chat_sessions.aggregate([
+                    {"$project": {"_id": 0}},
+                    {"$lookup": {
+                        "from": "chat_messages",
+                        "let": {"sid": "$session_id"},
+                        "pipeline": [
+                            {"$match": {"$expr": {"$eq": ["$session_id", "$$sid"]}}},
+                            {"$sort": {"seq": 1}},
+                            {"$project": {"_id": 0, "session_id": 0}}
+                        ],
+                        "as": "messages"
+                    }}
+                ])
                 histories = await cursor.to_list(length=None)
                 return histories[::-1]  # latest at top
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"Failed to get all chat histories: {str(e)}")
-                # fallback to in-memory - normalize structure
-                histories = []
-                for sid, sess in reversed(list(self.in_memory_store.items())):
-                    if isinstance(sess, dict):
-                        messages = sess.get("messages", [])
-                        histories.append({
-                            "session_id": sid,
-                            "messages": messages,
-                            "created_at": sess.get("created_at"),
-                            "last_updated": sess.get("last_updated"),
-                            "message_count": sess.get("message_count", len(messages)),
-                            "user_id": sess.get("user_id")
-                        })
-                    else:
-                        # old shape: stored as raw message list
-                        msgs = sess or []
-                        histories.append({
-                            "session_id": sid,
-                            "messages": msgs,
-                            "created_at": None,
-                            "last_updated": None,
-                            "message_count": len(msgs),
-                            "user_id": None
-                        })
-                return histories
+                return self._in_memory_histories()
         else:
-            # fallback if DB not connected - normalize structure
-            histories = []
-            for sid, sess in reversed(list(self.in_memory_store.items())):
-                if isinstance(sess, dict):
-                    messages = sess.get("messages", [])
-                    histories.append({
-                        "session_id": sid,
-                        "messages": messages,
-                        "created_at": sess.get("created_at"),
-                        "last_updated": sess.get("last_updated"),
-                        "message_count": sess.get("message_count", len(messages)),
-                        "user_id": sess.get("user_id")
-                    })
-                else:
-                    msgs = sess or []
-                    histories.append({
-                        "session_id": sid,
-                        "messages": msgs,
-                        "created_at": None,
-                        "last_updated": None,
-                        "message_count": len(msgs),
-                        "user_id": None
-                    })
-            return histories
+            return self._in_memory_histories()
+
+    def _in_memory_histories(self) -> List[Dict]:
+        """All fallback sessions with their messages, latest at top"""
+        return [
+            dict(session.summary(sid), messages=self.fallback_store.messages(sid))
+            for sid, session in self.fallback_store.sessions()
+        ]
+
+    async def _backfill_last_activity(self):
+        """Give every session a date last_activity so the keyset listing order is total.
+
+        Older documents may lack it or hold an ISO string. MongoDB sorts those after
+        all dates (by type), where a (last_activity, session_id) cursor can't reach
+        them. Strings are converted; otherwise last_updated, created_at or the epoch is used.
+        """
+        def first_date(*candidates):
+            expr = datetime.fromtimestamp(0)
+            for candidate in reversed(candidates):
+                expr = {"$ifNull": [candidate, expr]}
+            return expr
+
+        def as_date(field):
+            return {"$convert": {"input": field, "to": "date", "onError": None, "onNull": None}}
+
+        result = await self.db.chat_sessions.update_many(
+            {"last_activity": {"$not": {"$type": "date"}}},
+            [{"$set": {"last_activity": first_date(
+                as_date("$last_activity"), as_date("$last_updated"), as_date("$created_at")
+            )}}]
+        )
+        if result.modified_count:
+            logger.info(f"🕒 Backfilled last_activity on {result.modified_count} sessions")
+
+    @staticmethod
+    def _encode_session_cursor(session: Dict) -> str:
+        last_activity = session.get("last_activity")
+        if isinstance(last_activity, str):
+            try:
+                last_activity = datetime.fromisoformat(last_activity)
+            except ValueError:
+                last_activity = None
+        if not isinstance(last_activity, datetime):
+            # Sorts last; still emit a cursor so the listing isn't cut short
+            last_activity = datetime.min
+        raw = f"{last_activity.isoformat()}|{session['session_id']}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_session_cursor(cursor: str) -> Tuple[datetime, str]:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        last_activity, session_id = raw.split("|", 1)
+        return datetime.fromisoformat(last_activity), session_id
+
+    async def list_chat_sessions(self, user_id: Optional[str] = None, limit: int = 20, cursor: Optional[str] = None,
+                                 include_messages: bool = False) -> Tuple[List[Dict], Optional[str]]:
+        """List session summaries, most recently active first, one page at a time.
+
+        Filters by ``user_id`` in the query and pages with an opaque keyset cursor on
+        (last_activity, session_id), so cost depends on the page size rather than on
+        how many sessions exist. Message bodies are only attached when requested.
+        Returns (sessions, next_cursor).
+        """
+        after = self._decode_session_cursor(cursor) if cursor else None
+
+        if self.available:
+            try:
+                query: Dict = {}
+                if user_id:
+                    query["user_id"] = user_id
+                if after:
+                    query["$or"] = [
+                        {"last_activity": {"$lt": after[0]}},
+                        {"last_activity": after[0], "session_id": {"$lt": after[1]}}
+                    ]
+                projection = {"_id": 0, "session_id": 1, "user_id": 1, "created_at": 1, "last_activity": 1,
+                              "last_updated": 1, "message_count": 1, "preview": 1}
+                sessions = await self.db.chat_sessions.find(query, projection).sort(
+                    [("last_activity", -1), ("session_id", -1)]
+                ).limit(limit).to_list(length=limit)
+
+                session_ids = [sess["session_id"] for sess in sessions]
+                missing_preview = [sess["session_id"] for sess in sessions if not sess.get("preview")]
+                if missing_preview:
+                    firsts = self.db.chat_messages.find(
+                        {"session_id": {"$in": missing_preview}, "seq": 1}, {"_id": 0, "session_id": 1, "content": 1}
+                    )
+                    previews = {m["session_id"]: m.get("content", "")[:SESSION_PREVIEW_CHARS] async for m in firsts}
+                    for sess in sessions:
+                        if not sess.get("preview"):
+                            sess["preview"] = previews.get(sess["session_id"])
+
+                if include_messages and session_ids:
+                    by_session: Dict[str, List[Dict]] = {sid: [] for sid in session_ids}
+                    messages = self.db.chat_messages.find(
+                        {"session_id": {"$in": session_ids}}, {"_id": 0}
+                    ).sort([("session_id", 1), ("seq", 1)])
+                    async for m in messages:
+                        by_session[m.pop("session_id")].append(m)
+                    for sess in sessions:
+                        sess["messages"] = by_session.get(sess["session_id"], [])
+
+                next_cursor = self._encode_session_cursor(sessions[-1]) if len(sessions) == limit else None
+                return sessions, next_cursor
+            except Exception as e:
+                self._note_db_error(e)
+                logger.error(f"Failed to list chat sessions from MongoDB: {str(e)}")
+
+        # In-memory fallback
+        summaries = []
+        for sid, session in self.fallback_store.sessions():
+            if user_id and session.user_id != user_id:
+                continue
+            summary = session.summary(sid)
+            summary["last_activity"] = self.user_sessions.get(sid, {}).get("last_activity") or summary["last_updated"]
+            summary["preview"] = session.messages[0].content[:SESSION_PREVIEW_CHARS] if session.messages else None
+            if include_messages:
+                summary["messages"] = self.fallback_store.messages(sid)
+            summaries.append(summary)
+        summaries.sort(key=lambda x: (x["last_activity"] or datetime.min, x["session_id"]), reverse=True)
+        if after:
+            summaries = [x for x in summaries if (x["last_activity"] or datetime.min, x["session_id"]) < after]
+        page = summaries[:limit]
+        next_cursor = self._encode_session_cursor(page[-1]) if len(summaries) > limit else None
+        return page, next_cursor
 
-    
     async def get_chat_history(self, session_id: str) -> List[Dict]:
         """Get chat history for a session"""
-        if self.db is not None:
+        if self.available:
             try:
-                chat_history = await self.db.chat_sessions.find_one({"session_id": session_id})
-                if chat_history and "messages" in chat_history:
-                    return chat_history["messages"]
-                return []
+                cursor = self.db.chat_messages.find({"session_id": session_id}, {"_id": 0, "session_id": 0}).sort("seq", 1)
+                return self._with_unflushed(session_id, await cursor.to_list(length=None), from_db=True)
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"Failed to get chat history from MongoDB: {str(e)}")
-                return self.in_memory_store.get(session_id, [])
+                return self._with_unflushed(session_id, list(self._in_memory_messages(session_id)))
         else:
-            return self.in_memory_store.get(session_id, [])
+            return self._with_unflushed(session_id, list(self._in_memory_messages(session_id)))
+
+    async def get_chat_history_page(self, session_id: str, before_seq: Optional[int] = None,
+                                    limit: int = 50) -> Tuple[List[Dict], Optional[int]]:
+        """Get up to ``limit`` messages older than ``before_seq`` (newest page when None).
+
+        Returns (messages in chronological order, cursor for the next older page or None).
+        Served from the (session_id, seq) index, so cost depends on page size only.
+        """
+        if self.available:
+            try:
+                query = {"session_id": session_id}
+                if before_seq is not None:
+                    query["seq"] = {"$lt": before_seq}
+                cursor = self.db.chat_messages.find(query, {"_id": 0, "session_id": 0}).sort("seq", -1).limit(limit)
+                page = await cursor.to_list(length=limit)
+                page.reverse()
+                next_before = page[0]["seq"] if page and page[0]["seq"] > 1 else None
+                return page, next_before
+            except Exception as e:
+                self._note_db_error(e)
+                logger.error(f"Failed to get chat history page from MongoDB: {str(e)}")
+
+        # In-memory fallback: a message's seq is its 1-based position
+        messages = self._in_memory_messages(session_id)
+        end = len(messages) if before_seq is None else max(0, min(before_seq - 1, len(messages)))
+        start = max(0, end - limit)
+        page = [dict(m, seq=i) for i, m in enumerate(messages[start:end], start + 1)]
+        return page, (start + 1 if start > 0 else None)
     
-    async def add_message_to_history(self, session_id: str, role: str, content: str, user_id: Optional[str] = None) -> bool:
-        """Add a message to chat history with improved error handling"""
+    def _in_memory_messages(self, session_id: str) -> List[Dict]:
+        """Messages from the in-memory fallback"""
+        return self.fallback_store.messages(session_id)
+
+    async def get_recent_chat_history(self, session_id: str, limit: Optional[int] = None,
+                                      token_budget: Optional[int] = None) -> List[Dict]:
+        """Get the tail of a session's history for prompting.
+
+        Only the last ``limit`` messages are read (newest first from the
+        (session_id, seq) index), projected down to role and content,
+        then trimmed further to fit ``token_budget`` estimated tokens. Cost per turn
+        stays constant however long the session grows.
+
+        Windows of up to HISTORY_WINDOW_MESSAGES are served from the session
+        history cache when the session is hot.
+        """
+        started = time.perf_counter()
+        limit = limit or HISTORY_WINDOW_MESSAGES
+        token_budget = HISTORY_TOKEN_BUDGET if token_budget is None else token_budget
+        cacheable = limit <= self.history_cache.window
+        if cacheable:
+            cached = self.history_cache.get(session_id)
+            if cached is not None:
+                stage_metrics.observe("db_history_read", time.perf_counter() - started, "cache_hit")
+                return trim_messages_to_budget(cached[-limit:], token_budget)
+            # Read the full window so the cached entry can serve any smaller limit
+            fetch = self.history_cache.window
+        else:
+            fetch = limit
+
+        messages = None
+        outcome = "fallback"
+        if self.available:
+            try:
+                cursor = self.db.chat_messages.find(
+                    {"session_id": session_id},
+                    {"_id": 0, "role": 1, "content": 1, "seq": 1}
+                ).sort("seq", -1).limit(fetch)
+                messages = await cursor.to_list(length=fetch)
+                messages.reverse()
+                outcome = "ok"
+            except Exception as e:
+                self._note_db_error(e)
+                outcome = "error"
+                logger.error(f"Failed to get recent chat history from MongoDB: {str(e)}")
+        if messages is None:
+            messages = [
+                {"role": m["role"], "content": m["content"]}
+                for m in self._in_memory_messages(session_id)[-fetch:]
+            ]
+        messages = self._with_unflushed(session_id, messages, fields=("role", "content"), from_db=outcome == "ok")[-fetch:]
+        if cacheable:
+            self.history_cache.put(session_id, messages)
+        stage_metrics.observe("db_history_read", time.perf_counter() - started, outcome)
+        return trim_messages_to_budget(messages[-limit:], token_budget)
+
+    async def prefetch_session_history(self, session_id: str):
+        """Warm the history cache for a session that is about to become active"""
+        if session_id in self.history_cache:
+            return
+        try:
+            await self.get_recent_chat_history(session_id)
+        except Exception as e:
+            logger.warning(f"⚠️ History prefetch failed for session {session_id}: {str(e)}")
+
+    def _new_message(self, session_id: str, role: str, content: str) -> Optional[Dict]:
+        """Validate a message, record session analytics and return the message document"""
         if not session_id or not role or not content:
             logger.error(f"Invalid parameters for add_message_to_history: session_id={session_id}, role={role}, content_length={len(content) if content else 0}")
-            return False
-            
-        message = {
+            return None
+
+        # Track user sessions for analytics (re-set so the bounded dict keeps it as most recent)
+        session_info = self.user_sessions.get(session_id) or {
+            "created_at": datetime.now(),
+            "message_count": 0
+        }
+        session_info["message_count"] += 1
+        session_info["last_activity"] = datetime.now()
+        self.user_sessions[session_id] = session_info
+
+        return {
             "role": role,
             "content": content,
             "timestamp": datetime.now()
         }
-        
-        # Track user sessions for analytics
-        if session_id not in self.user_sessions:
-            self.user_sessions[session_id] = {
-                "created_at": datetime.now(),
-                "message_count": 0,
-                "last_activity": datetime.now()
-            }
-        
-        self.user_sessions[session_id]["message_count"] += 1
-        self.user_sessions[session_id]["last_activity"] = datetime.now()
-        
-        if self.db is not None:
-            try:
-                # Update chat session with user session metadata
-                session_metadata = {
-                    "session_id": session_id,
-                    "created_at": self.user_sessions[session_id]["created_at"],
-                    "message_count": self.user_sessions[session_id]["message_count"],
-                    "last_activity": self.user_sessions[session_id]["last_activity"]
+
+    def _store_in_memory(self, session_id: str, message: Dict, user_id: Optional[str] = None):
+        """Append a message to the in-memory fallback; attach metadata at session level"""
+        created_at = self.user_sessions.get(session_id, {}).get("created_at")
+        self.fallback_store.append(
+            session_id, message["role"], message["content"],
+            ts=message["timestamp"].timestamp(),
+            user_id=user_id,
+            created_at=created_at.timestamp() if created_at else None,
+            seq=message.get("seq")
+        )
+        logger.info(f"💾 Message saved to in-memory storage for session {session_id}: {message['role']} - {message['content'][:50]}...")
+
+    async def _assign_seqs(self, session_id: str, messages: List[Dict], user_id: Optional[str]) -> List[Dict]:
+        """Update session metadata, atomically reserve one seq per message and return the documents to insert.
+
+        The seq is also set on each message, so a write that fails after this point
+        is retried under the same seqs.
+        """
+        session_metadata = {
+            "last_activity": self.user_sessions.get(session_id, {}).get("last_activity", datetime.now()),
+            "last_updated": datetime.now()
+        }
+        # If a user_id is provided, include it in session metadata so sessions can be attributed
+        if user_id:
+            session_metadata["user_id"] = user_id
+
+        session = await self.db.chat_sessions.find_one_and_update(
+            {"session_id": session_id},
+            {
+                "$inc": {"message_count": len(messages)},
+                "$set": session_metadata,
+                "$setOnInsert": {
+                    "created_at": self.user_sessions.get(session_id, {}).get("created_at", datetime.now()),
+                    "preview": messages[0]["content"][:SESSION_PREVIEW_CHARS]
                 }
-                # If a user_id is provided, include it in session metadata so sessions can be attributed
-                if user_id:
-                    session_metadata["user_id"] = user_id
+            },
+            projection={"message_count": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        first_seq = session["message_count"] - len(messages) + 1
+        for i, message in enumerate(messages):
+            message["seq"] = first_seq + i
+        return [{"session_id": session_id, **message} for message in messages]
 
-                result = await self.db.chat_sessions.update_one(
-                    {"session_id": session_id},
-                    {
-                        "$push": {"messages": message},
-                        "$set": {
-                            "last_updated": datetime.now(),
-                            **session_metadata
-                        }
-                    },
-                    upsert=True
-                )
-                
-                if result.matched_count > 0 or result.upserted_id:
-                    logger.info(f"✅ Message saved to MongoDB for session {session_id}: {role} - {content[:50]}...")
-                else:
-                    logger.warning(f"⚠️ MongoDB update didn't match any documents for session {session_id}")
-                    
+    async def add_message_to_history(self, session_id: str, role: str, content: str, user_id: Optional[str] = None) -> bool:
+        """Add a message to chat history with improved error handling (written immediately)"""
+        message = self._new_message(session_id, role, content)
+        if message is None:
+            return False
+        self.history_cache.append(session_id, role, content)
+
+        if self.available:
+            try:
+                with stage_metrics.timer("db_write"):
+                    documents = await self._assign_seqs(session_id, [message], user_id)
+                    await self.db.chat_messages.insert_one(documents[0])
+                logger.info(f"✅ Message saved to MongoDB for session {session_id}: {role} - {content[:50]}...")
                 return True
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"❌ Failed to save message to MongoDB: {str(e)}")
-                # Fallback to in-memory storage; attach metadata at session level
-                if session_id not in self.in_memory_store:
-                    self.in_memory_store[session_id] = {
-                        "messages": [],
-                        "created_at": self.user_sessions[session_id]["created_at"],
-                        "message_count": self.user_sessions[session_id]["message_count"],
-                        "last_updated": datetime.now()
-                    }
-                self.in_memory_store[session_id]["messages"].append(message)
-                if user_id:
-                    self.in_memory_store[session_id]["user_id"] = user_id
-                logger.info(f"💾 Message saved to in-memory storage for session {session_id}: {role} - {content[:50]}...")
+                # Fallback to in-memory storage
+                self._store_in_memory(session_id, message, user_id)
                 return True
         else:
-            # In-memory storage when MongoDB is not available; store session-level metadata
-            if session_id not in self.in_memory_store:
-                self.in_memory_store[session_id] = {
-                    "messages": [],
-                    "created_at": self.user_sessions[session_id]["created_at"],
-                    "message_count": self.user_sessions[session_id]["message_count"],
-                    "last_updated": datetime.now()
-                }
-            self.in_memory_store[session_id]["messages"].append(message)
-            if user_id:
-                self.in_memory_store[session_id]["user_id"] = user_id
-            logger.info(f"💾 Message saved to in-memory storage for session {session_id}: {role} - {content[:50]}...")
+            # In-memory storage when MongoDB is not available
+            self._store_in_memory(session_id, message, user_id)
             return True
-    
+
+    # Write-behind persistence: turns enqueue messages and return immediately; a background
+    # flusher coalesces them into batched writes off the response path.
+    def enqueue_message(self, session_id: str, role: str, content: str, user_id: Optional[str] = None) -> bool:
+        """Queue a message for batched persistence; acknowledged without any DB round trip"""
+        return self._enqueue(session_id, [(role, content)], user_id)
+
+    def enqueue_turn(self, session_id: str, user_message: str, assistant_message: Optional[str] = None,
+                     user_id: Optional[str] = None) -> bool:
+        """Queue a turn's user message and reply together so they share one batch and one seq update.
+
+        ``assistant_message`` may be empty when the turn failed; the user message is still kept.
+        """
+        messages = [("user", user_message)]
+        if assistant_message:
+            messages.append(("assistant", assistant_message))
+        return self._enqueue(session_id, messages, user_id)
+
+    def _enqueue(self, session_id: str, messages: List[Tuple[str, str]], user_id: Optional[str]) -> bool:
+        queued = []
+        for role, content in messages:
+            message = self._new_message(session_id, role, content)
+            if message is None:
+                return False
+            queued.append((session_id, message, user_id))
+        for role, content in messages:
+            self.history_cache.append(session_id, role, content)
+        was_idle = not self._pending_writes
+        self._pending_writes.extend(queued)
+        self._ensure_flusher()
+        # Wake the flusher to open a flush window, or to flush a full batch right away
+        if was_idle or len(self._pending_writes) >= WRITE_BATCH_SIZE:
+            self._flush_wakeup.set()
+        return True
+
+    def _with_unflushed(self, session_id: str, messages: List[Dict], fields: Optional[Tuple[str, ...]] = None,
+                        from_db: bool = False) -> List[Dict]:
+        """Append messages still queued for write-behind so readers see their own writes.
+
+        When ``messages`` came from MongoDB, a batch being written may already be
+        partly visible in them; those messages are matched on their assigned seq
+        and not repeated. Messages parked in the fallback store after a failed
+        write (waiting for replay) are included too.
+        """
+        stored_seqs = {m.get("seq") for m in messages} if from_db else set()
+        parked = []
+        if from_db:
+            parked = [
+                dict(r.to_dict(), seq=r.seq) if r.seq is not None else r.to_dict()
+                for r in self.fallback_store.records(session_id)
+                if r.seq is None or r.seq not in stored_seqs
+            ]
+        in_flight = [m for sid, m, _ in self._writes_in_flight if sid == session_id]
+        pending = [m for sid, m, _ in self._pending_writes if sid == session_id]
+        if not parked and not in_flight and not pending:
+            return self._project(messages, fields)
+        # An in-flight message without a seq hasn't reached the bulk write yet
+        extra = parked + [m for m in in_flight if m.get("seq") is None or m["seq"] not in stored_seqs] + pending
+        return self._project(messages + extra, fields)
+
+    @staticmethod
+    def _project(messages: List[Dict], fields: Optional[Tuple[str, ...]]) -> List[Dict]:
+        if not fields:
+            return messages
+        return [{k: m[k] for k in fields} for m in messages]
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flush_wakeup = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._flusher_stopping = False
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    def _flush_timeout(self) -> Optional[float]:
+        """How long the flusher may sleep: until woken when there is nothing to do"""
+        if self._pending_writes:
+            return WRITE_FLUSH_INTERVAL  # e.g. a batch requeued for retry
+        if self.available and len(self.fallback_store):
+            return max(self._next_replay_at - time.monotonic(), WRITE_FLUSH_INTERVAL)
+        return None
+
+    async def _wait_for_wakeup(self, timeout: Optional[float]):
+        try:
+            await asyncio.wait_for(self._flush_wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._flush_wakeup.clear()
+
+    async def _flush_loop(self):
+        while not self._flusher_stopping:
+            idle = not self._pending_writes
+            await self._wait_for_wakeup(self._flush_timeout())
+            if idle and 0 < len(self._pending_writes) < WRITE_BATCH_SIZE and not self._flusher_stopping:
+                # First message after a quiet spell: hold the flush window open so the
+                # messages that follow share the batch (a full batch or close() ends it early)
+                await self._wait_for_wakeup(WRITE_FLUSH_INTERVAL)
+            try:
+                await self.flush_pending_writes()
+                await self._replay_parked_writes()
+            except Exception as e:
+                logger.error(f"❌ Write-behind flush failed: {str(e)}")
+
+    async def flush_pending_writes(self):
+        """Write every queued message now, in batches of WRITE_BATCH_SIZE"""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            while self._pending_writes:
+                batch = self._pending_writes[:WRITE_BATCH_SIZE]
+                del self._pending_writes[:WRITE_BATCH_SIZE]
+                self._writes_in_flight = batch
+                try:
+                    written = await self._write_batch(batch)
+                finally:
+                    self._writes_in_flight = []
+                if not written:
+                    break  # requeued; retried on the next flush
+
+    async def _write_batch(self, batch: List[Tuple[str, Dict, Optional[str]]]) -> bool:
+        """Persist a batch; False if it was put back on the queue to retry"""
+        if not self.available:
+            for session_id, message, user_id in batch:
+                self._store_in_memory(session_id, message, user_id)
+            return True
+
+        try:
+            with stage_metrics.timer("db_write_batch"):
+                await self._persist_batch(batch)
+            self._write_failures = 0
+            return True
+        except Exception as e:
+            self._note_db_error(e)
+            if self.available and self._write_failures < WRITE_MAX_RETRIES:
+                # Not a connection problem (e.g. a partly applied bulk write): retry on the next
+                # flush. Messages keep the seqs they were given, so the retry upserts them.
+                self._write_failures += 1
+                self._pending_writes[:0] = batch
+                logger.warning(f"⚠️ Failed to flush {len(batch)} messages to MongoDB "
+                               f"(attempt {self._write_failures}/{WRITE_MAX_RETRIES}): {str(e)}")
+                return False
+            self._write_failures = 0
+            logger.error(f"❌ Failed to flush {len(batch)} messages to MongoDB: {str(e)}")
+            for session_id, message, user_id in batch:
+                self._store_in_memory(session_id, message, user_id)
+            return True
+
+    async def _replay_parked_writes(self):
+        """While MongoDB is up, retry messages a failed flush left in the fallback store, with backoff"""
+        if not self.available or not len(self.fallback_store) or time.monotonic() < self._next_replay_at:
+            return
+        async with self._flush_lock:
+            try:
+                await self._replay_buffered_writes()
+                self._replay_delay = RECONNECT_MIN_DELAY
+            except Exception as e:
+                self._note_db_error(e)
+                logger.warning(f"⚠️ Replay of parked messages failed ({e}); retrying in {self._replay_delay:.0f}s")
+                self._next_replay_at = time.monotonic() + self._replay_delay
+                self._replay_delay = min(self._replay_delay * 2, RECONNECT_MAX_DELAY)
+
+    async def _persist_batch(self, batch: List[Tuple[str, Dict, Optional[str]]]):
+        """Write a batch to MongoDB: one metadata/seq update per session, one bulk write for all messages.
+
+        Messages that already carry a seq come from an earlier attempt that may
+        have been partly written; they are upserted on (session_id, seq) instead of
+        inserted, so retrying a batch never duplicates messages or skips seqs.
+        """
+        by_session: Dict[str, Dict] = {}
+        retried: List[Dict] = []
+        for session_id, message, user_id in batch:
+            if "seq" in message:
+                retried.append({"session_id": session_id, **message})
+                continue
+            entry = by_session.setdefault(session_id, {"messages": [], "user_id": None})
+            entry["messages"].append(message)
+            entry["user_id"] = user_id or entry["user_id"]
+        documents = await asyncio.gather(*(
+            self._assign_seqs(session_id, entry["messages"], entry["user_id"])
+            for session_id, entry in by_session.items()
+        ))
+        ops = [InsertOne(doc) for docs in documents for doc in docs]
+        ops.extend(
+            UpdateOne({"session_id": doc["session_id"], "seq": doc["seq"]}, {"$setOnInsert": doc}, upsert=True)
+            for doc in retried
+        )
+        await self.db.chat_messages.bulk_write(ops, ordered=False)
+        logger.info(f"✅ Flushed {len(batch)} messages for {len(by_session)} sessions to MongoDB")
+
+    # Health state: "up" serves from MongoDB; "down" fails fast to the fallback store while a
+    # background task reconnects; "replaying" drains writes buffered during the outage first.
+    @property
+    def available(self) -> bool:
+        return self.db is not None and self.db_state == "up"
+
+    def _note_db_error(self, e: Exception):
+        """Mark the database down on connection-level errors so later calls skip it"""
+        if isinstance(e, ConnectionFailure) and self.db_state == "up":
+            logger.warning(f"⚠️ MongoDB unreachable, serving from in-memory fallback: {e}")
+            self.db_state = "down"
+            self._start_reconnect()
+
+    def _start_reconnect(self):
+        if not self.mongodb_url or (self._reconnector and not self._reconnector.done()):
+            return
+        try:
+            self._reconnector = asyncio.get_running_loop().create_task(self._reconnect_loop())
+        except RuntimeError:
+            # No running loop (e.g. called from a sync script); the next connect() will retry
+            pass
+
+    async def _reconnect_loop(self):
+        delay = RECONNECT_MIN_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                if self.client is None:
+                    if not await self.connect():
+                        raise ConnectionFailure("connect failed")
+                else:
+                    await asyncio.wait_for(self.client.admin.command('ping'), timeout=5)
+                self.db_state = "replaying"
+                await self._replay_buffered_writes()
+                self.db_state = "up"
+                logger.info("✅ MongoDB reachable again; resumed normal operation")
+                return
+            except Exception as e:
+                self.db_state = "down"
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                logger.warning(f"⚠️ MongoDB reconnect failed ({e}); retrying in {delay:.0f}s")
+
+    async def _replay_buffered_writes(self):
+        """Write messages held in the fallback store during the outage, least recent session first.
+
+        Records are removed from the store once written, and keep the seq they
+        were given, so a replay that fails midway resumes without duplicates.
+        Messages the store evicted to stay within its bounds are not replayed.
+        """
+        replayed_sessions = set()
+        while len(self.fallback_store):
+            pending = [
+                (session_id, session.user_id, record)
+                for session_id, session in reversed(list(self.fallback_store.sessions()))
+                for record in session.messages
+            ]
+            for i in range(0, len(pending), WRITE_BATCH_SIZE):
+                # Skip sessions cleared (or evicted) while earlier chunks were written
+                chunk = [p for p in pending[i:i + WRITE_BATCH_SIZE] if p[0] in self.fallback_store]
+                batch = []
+                for session_id, user_id, record in chunk:
+                    message = record.to_dict()
+                    if record.seq is not None:
+                        message["seq"] = record.seq
+                    batch.append((session_id, message, user_id))
+                try:
+                    await self._persist_batch(batch)
+                finally:
+                    for (_, _, record), (_, message, _) in zip(chunk, batch):
+                        record.seq = message.get("seq")
+                written: Dict[str, List] = {}
+                for session_id, _, record in chunk:
+                    written.setdefault(session_id, []).append(record)
+                # Those messages now live in MongoDB; free their fallback copies
+                for session_id, records in written.items():
+                    self.fallback_store.remove(session_id, records)
+                replayed_sessions.update(written)
+        if replayed_sessions:
+            logger.info(f"🔁 Replayed buffered writes for {len(replayed_sessions)} sessions into MongoDB")
+
     async def get_user_sessions(self, limit: int = 50) -> List[Dict]:
         """Get recent user sessions for analytics"""
-        if self.db is not None:
+        if self.available:
             try:
                 sessions = await self.db.chat_sessions.find(
                     {},
@@ -310,6 +827,7 @@ class DatabaseService:
                 ).sort("last_activity", -1).limit(limit).to_list(length=limit)
                 return sessions
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"Failed to get user sessions from MongoDB: {str(e)}")
                 return []
         else:
@@ -318,53 +836,55 @@ class DatabaseService:
     
     async def clear_session_history(self, session_id: str) -> bool:
             """Delete an entire session including history and metadata"""
-            if self.db is not None:
+            self.history_cache.invalidate(session_id)
+            # Drop queued writes too, or the next flush would recreate the session
+            self._pending_writes = [w for w in self._pending_writes if w[0] != session_id]
+            if self.available:
                 try:
                     result = await self.db.chat_sessions.delete_one({"session_id": session_id})
+                    await self.db.chat_messages.delete_many({"session_id": session_id})
                     logger.info(f"Deleted entire session {session_id} from MongoDB")
                     # Also remove from in-memory cache
-                    if session_id in self.in_memory_store:
-                        del self.in_memory_store[session_id]
-                    if session_id in self.user_sessions:
-                        del self.user_sessions[session_id]
+                    self.fallback_store.delete(session_id)
+                    self.user_sessions.pop(session_id, None)
                     return result.deleted_count > 0
                 except Exception as e:
+                    self._note_db_error(e)
                     logger.error(f"Failed to delete session {session_id} from MongoDB: {str(e)}")
                     # Cleanup in-memory as fallback
-                    if session_id in self.in_memory_store:
-                        del self.in_memory_store[session_id]
-                    if session_id in self.user_sessions:
-                        del self.user_sessions[session_id]
+                    self.fallback_store.delete(session_id)
+                    self.user_sessions.pop(session_id, None)
                     return True
             else:
                 # Only in-memory deletion
-                if session_id in self.in_memory_store:
-                    del self.in_memory_store[session_id]
-                if session_id in self.user_sessions:
-                    del self.user_sessions[session_id]
+                self.fallback_store.delete(session_id)
+                self.user_sessions.pop(session_id, None)
                 logger.info(f"Deleted entire session {session_id} from in-memory store")
                 return True
 
     async def get_session_stats(self, session_id: str) -> Dict:
         """Get statistics for a specific session"""
-        if self.db is not None:
+        if self.available:
             try:
-                session = await self.db.chat_sessions.find_one({"session_id": session_id})
+                session = await self.db.chat_sessions.find_one({"session_id": session_id}, {"messages": 0})
                 if session:
+                    user_count = await self.db.chat_messages.count_documents({"session_id": session_id, "role": "user"})
+                    assistant_count = await self.db.chat_messages.count_documents({"session_id": session_id, "role": "assistant"})
                     return {
                         "session_id": session_id,
-                        "message_count": len(session.get("messages", [])),
+                        "message_count": session.get("message_count", user_count + assistant_count),
                         "created_at": session.get("created_at"),
                         "last_activity": session.get("last_activity"),
-                        "total_user_messages": len([m for m in session.get("messages", []) if m["role"] == "user"]),
-                        "total_assistant_messages": len([m for m in session.get("messages", []) if m["role"] == "assistant"])
+                        "total_user_messages": user_count,
+                        "total_assistant_messages": assistant_count
                     }
                 return {}
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"Failed to get session stats from MongoDB: {str(e)}")
                 return {}
         else:
-            messages = self.in_memory_store.get(session_id, [])
+            messages = self._in_memory_messages(session_id)
             session_info = self.user_sessions.get(session_id, {})
             return {
                 "session_id": session_id,
@@ -375,33 +895,48 @@ class DatabaseService:
                 "total_assistant_messages": len([m for m in messages if m["role"] == "assistant"])
             }
     
+    async def get_session_owner(self, session_id: str) -> Optional[str]:
+        """user_id a session is attributed to, or None for anonymous or unknown sessions"""
+        if self.available:
+            try:
+                session = await self.db.chat_sessions.find_one({"session_id": session_id}, {"_id": 0, "user_id": 1})
+                if session:
+                    return session.get("user_id")
+            except Exception as e:
+                self._note_db_error(e)
+                logger.error(f"Failed to get session owner from MongoDB: {str(e)}")
+        # Sessions written while MongoDB was down are only in the fallback store
+        return self.fallback_store.owner(session_id)
+    
     # User management methods for authentication
     async def create_user(self, user_data: Dict) -> bool:
         """Create a new user in the database"""
-        if self.db is not None:
+        if self.available:
             try:
                 result = await self.db.users.insert_one(user_data)
                 logger.info(f"✅ User created with ID: {result.inserted_id}")
                 return True
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"❌ Failed to create user: {str(e)}")
                 return False
         return False
     
     async def get_user_by_email(self, email: str) -> Optional[Dict]:
         """Get user by email from database"""
-        if self.db is not None:
+        if self.available:
             try:
                 user = await self.db.users.find_one({"email": email}, {"_id": 0})
                 return user
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"❌ Failed to get user by email: {str(e)}")
                 return None
         return None
     
     async def update_user_last_login(self, user_id: str) -> bool:
         """Update user's last login timestamp"""
-        if self.db is not None:
+        if self.available:
             try:
                 result = await self.db.users.update_one(
                     {"id": user_id},
@@ -409,17 +944,19 @@ class DatabaseService:
                 )
                 return result.modified_count > 0
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"❌ Failed to update last login: {str(e)}")
                 return False
         return False
     
     async def user_exists(self, email: str) -> bool:
         """Check if user exists by email"""
-        if self.db is not None:
+        if self.available:
             try:
                 count = await self.db.users.count_documents({"email": email})
                 return count > 0
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"❌ Failed to check user existence: {str(e)}")
                 return False
         return False
@@ -433,7 +970,7 @@ class DatabaseService:
         if not token:
             return False
 
-        if self.db is not None:
+        if self.available:
             try:
                 doc = {
                     "token": token,
@@ -449,14 +986,17 @@ class DatabaseService:
                 logger.info("✅ Revoked token persisted to DB")
                 return True
             except Exception as e:
+                self._note_db_error(e)
                 logger.error(f"❌ Failed to persist revoked token to DB: {e}")
                 # Fall through to in-memory fallback
 
-        # In-memory fallback
-        if "revoked_tokens" not in self.in_memory_store:
-            self.in_memory_store["revoked_tokens"] = []
+        # In-memory fallback, kept apart from chat sessions; expired entries are pruned on write
         try:
-            self.in_memory_store["revoked_tokens"].append({"token": token, "expires_at": expires_ts})
+            now = datetime.now().timestamp()
+            self.revoked_tokens_fallback = {
+                t: exp for t, exp in self.revoked_tokens_fallback.items() if exp is None or exp > now
+            }
+            self.revoked_tokens_fallback[token] = float(expires_ts) if expires_ts else None
             logger.info("💾 Revoked token saved to in-memory store")
             return True
         except Exception as e:
@@ -467,23 +1007,112 @@ class DatabaseService:
         """Check whether a token is present in the revoked list (DB or in-memory)."""
         if not token:
             return False
-        if self.db is not None:
+        if self.available:
             try:
                 found = await self.db.revoked_tokens.find_one({"token": token})
                 return found is not None
             except Exception as e:
+                self._note_db_error(e)
                 logger.warning(f"Could not query revoked_tokens collection: {e}")
                 # fall back to in-memory
 
-        for rec in self.in_memory_store.get("revoked_tokens", []):
-            try:
-                if rec.get("token") == token:
-                    return True
-            except Exception:
-                continue
-        return False
+        return token in self.revoked_tokens_fallback
     
+    async def _seed_legacy_message_counts(self):
+        """Raise message_count to at least the embedded array length on unmigrated sessions.
+
+        The old in-process counter reset on restart, so message_count can be lower
+        than the number of embedded messages. New writes reserve seqs from it, and
+        must not take seqs 1..n that migration will give to the legacy messages.
+        """
+        result = await self.db.chat_sessions.update_many(
+            {"messages": {"$exists": True}},
+            [{"$set": {"message_count": {"$max": [
+                {"$ifNull": ["$message_count", 0]},
+                {"$size": {"$ifNull": ["$messages", []]}}
+            ]}}}]
+        )
+        if result.modified_count:
+            logger.info(f"🔢 Raised message_count to the embedded message count on {result.modified_count} legacy sessions")
+
+    async def migrate_embedded_messages(self, batch_size: int = 500) -> int:
+        """Move messages embedded in chat_sessions documents into chat_messages.
+
+        Idempotent: messages are upserted by (session_id, seq) and the embedded
+        array is only removed once every message is found in chat_messages under
+        its seq. A session whose seqs were already taken by other messages is left
+        untouched and reported. Returns the number of sessions migrated.
+        """
+        if self.db is None:
+            raise Exception("Database not connected")
+
+        await self._seed_legacy_message_counts()
+        migrated = 0
+        cursor = self.db.chat_sessions.find({"messages": {"$exists": True}}, {"session_id": 1, "messages": 1})
+        async for doc in cursor:
+            session_id = doc.get("session_id")
+            messages = doc.get("messages") or []
+            ops = [
+                UpdateOne(
+                    {"session_id": session_id, "seq": seq},
+                    {"$setOnInsert": {
+                        "session_id": session_id,
+                        "seq": seq,
+                        "role": m.get("role"),
+                        "content": m.get("content"),
+                        "timestamp": m.get("timestamp")
+                    }},
+                    upsert=True
+                )
+                for seq, m in enumerate(messages, 1)
+            ]
+            for i in range(0, len(ops), batch_size):
+                await self.db.chat_messages.bulk_write(ops[i:i + batch_size], ordered=False)
+            stored = self.db.chat_messages.find(
+                {"session_id": session_id, "seq": {"$lte": len(messages)}}, {"_id": 0, "seq": 1, "role": 1, "content": 1}
+            )
+            written = {m["seq"]: (m.get("role"), m.get("content")) async for m in stored}
+            conflicts = [
+                seq for seq, m in enumerate(messages, 1)
+                if written.get(seq) != (m.get("role"), m.get("content"))
+            ]
+            if conflicts:
+                logger.error(f"❌ Session {session_id}: {len(conflicts)} embedded messages collide with newer "
+                             f"messages at the same seq (first: {conflicts[0]}); keeping the embedded array")
+                continue
+            await self.db.chat_sessions.update_one(
+                {"_id": doc["_id"]},
+                {"$unset": {"messages": ""}, "$max": {"message_count": len(messages)}}
+            )
+            migrated += 1
+            logger.info(f"📦 Migrated {len(messages)} messages for session {session_id}")
+        return migrated
+
+    def storage_stats(self) -> Dict:
+        """Sizes and counters of the in-process history cache and fallback store"""
+        return {
+            "db_state": self.db_state,
+            "history_cache": self.history_cache.stats(),
+            "fallback_store": self.fallback_store.stats()
+        }
+
     async def close(self):
+        # Persist anything still queued before the client goes away. The flusher is
+        # stopped rather than cancelled so a batch it is writing is not lost midway.
+        if self._flusher:
+            self._flusher_stopping = True
+            self._flush_wakeup.set()
+            await self._flusher
+            self._flusher = None
+        # A failing batch is requeued by each flush until its retries run out
+        for _ in range(WRITE_MAX_RETRIES + 1):
+            await self.flush_pending_writes()
+            if not self._pending_writes:
+                break
+        if self._reconnector:
+            self._reconnector.cancel()
+            self._reconnector = None
+        logger.info(f"📊 Storage stats: {self.storage_stats()}")
         if self.client:
             self.client.close()
             logger.info("Database connection closed")
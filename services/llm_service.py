@@ -1,6 +1,8 @@
 import google.generativeai as genai
 from typing import List, Dict, Optional, AsyncGenerator, Union
+import asyncio
 import logging
+import os
 from services.custom_web_search_service import custom_web_search_service as web_search_service
 from services.skills_manager import skills_manager
 
@@ -14,6 +16,9 @@ class LLMService:
         self.persona = persona or "helpful AI assistant"
         genai.configure(api_key=api_key)
         self.model = genai.GenerativeModel(model_name)
+        # Cap concurrent Gemini requests; calls use the SDK's async API so waiting never blocks the event loop
+        self.max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
         logger.info(f"🤖 LLM Service initialized with model: {model_name}, persona: {self.persona}")
     
     def set_persona(self, persona: str):
@@ -29,15 +34,11 @@ class LLMService:
         self.persona = persona_prompts.get(persona, persona_prompts["default"])
         logger.info(f"🤖 Persona switched to: {self.persona}")
 
-    def _detect_language(self, text: str) -> str:
-        """Simple detection: returns 'hi' if Devanagari chars present, otherwise 'en'"""
-        if not text:
-            return "en"
-        for ch in text:
-            if '\u0900' <= ch <= '\u097F':  # Devanagari block
-                return "hi"
-        return "en"
-    
+    async def _generate_content(self, prompt: str):
+        """Non-streaming Gemini call through the async API, bounded by the concurrency limit"""
+        async with self._semaphore:
+            return await self.model.generate_content_async(prompt)
+
     def format_chat_history_for_llm(self, messages: List[Dict]) -> str:
         if not messages:
             return ""
@@ -49,72 +50,6 @@ class LLMService:
         
         return formatted_history
     
-    def _should_perform_web_search(self, user_message: str) -> bool:
-        """Determine if a web search should be performed based on the user message"""
-        search_triggers = [
-            'search for', 'search google for', 'search google', 'find information about', 'look up', 
-            'what is', 'who is', 'when is', 'where is', 'how to',
-            'latest news about', 'recent developments in',
-            'tell me about', 'information on', 'details about'
-        ]
-        
-        user_message_lower = user_message.lower()
-        
-        # Check for explicit search commands
-        if any(trigger in user_message_lower for trigger in ['search for', 'search google for', 'search google', 'find information about', 'look up', 'tell me about']):
-            return True
-        
-        # Check for information-seeking questions that would benefit from current data
-        if any(user_message_lower.startswith(trigger) for trigger in ['what is', 'who is', 'when is', 'where is', 'how to']):
-            return True
-        
-        # Check for topics that require current information
-        current_info_topics = ['news', 'weather', 'stock', 'price', 'recent', 'latest', 'current', 'today', 'now']
-        if any(topic in user_message_lower for topic in current_info_topics):
-            return True
-        
-        return False
-    
-    def _extract_search_query(self, user_message: str) -> str:
-        """Extract the search query from the user message"""
-        user_message_lower = user_message.lower()
-        
-        # Remove common search phrases to get the actual query
-        search_phrases = [
-            'search for', 'search google for', 'search google', 'find information about', 'look up', 
-            'what is', 'who is', 'when is', 'where is', 'how to',
-            'tell me about', 'information on', 'details about'
-        ]
-        
-        for phrase in search_phrases:
-            if phrase in user_message_lower:
-                return user_message_lower.split(phrase, 1)[1].strip()
-        
-        # If no specific phrase found, use the entire message as query
-        return user_message.strip()
-
-    def _extract_news_category(self, user_message: str) -> str:
-        """Extract the news category from the user message"""
-        user_message_lower = user_message.lower()
-        
-        # Define common news categories and their keywords
-        categories = {
-            'business': ['business', 'finance', 'economy', 'market', 'stock'],
-            'technology': ['technology', 'tech', 'ai', 'artificial intelligence', 'computer'],
-            'sports': ['sports', 'football', 'basketball', 'soccer', 'baseball'],
-            'entertainment': ['entertainment', 'movie', 'music', 'celebrity', 'hollywood'],
-            'health': ['health', 'medical', 'medicine', 'covid', 'pandemic'],
-            'science': ['science', 'research', 'discovery', 'space', 'nasa']
-        }
-        
-        # Check for specific category keywords
-        for category, keywords in categories.items():
-            if any(keyword in user_message_lower for keyword in keywords):
-                return category
-        
-        # Default to general news
-        return "general"
-
     def _format_news_response(self, news_data: dict, category: str) -> str:
         """Format the news response for the user"""
         articles = news_data.get("articles", [])
@@ -136,10 +71,13 @@ class LLMService:
     
     async def generate_response(self, user_message: str, chat_history: List[Dict], language: str = "auto") -> str:
         try:
+            # Classify the message once: intent, search query / news category and script
+            route = skills_manager.route(user_message)
+
             # Resolve language preference
             lang = language
             if language == "auto":
-                lang = self._detect_language(user_message)
+                lang = route.language
 
             if lang == "both":
                 language_instruction = "Provide the answer in BOTH English and Hindi. First provide the English version, then the Hindi translation separated by '---'."
@@ -149,8 +87,8 @@ class LLMService:
                 language_instruction = "Respond in English only."
             
             # Check if web search is needed
-            if self._should_perform_web_search(user_message):
-                query = self._extract_search_query(user_message)
+            if route.wants_web_search:
+                query = route.arguments["query"]
                 logger.info(f"🔍 Performing web search for query: {query}")
                 
                 try:
@@ -174,7 +112,7 @@ Summarize the key information and cite relevant sources if appropriate."""
                     # append language instruction
                     enhanced_prompt = f"{language_instruction}\n\n{enhanced_prompt}"
                     
-                    llm_response = self.model.generate_content(enhanced_prompt)
+                    llm_response = await self._generate_content(enhanced_prompt)
                     
                     if llm_response.candidates:
                         response_text = ""
@@ -194,12 +132,12 @@ Summarize the key information and cite relevant sources if appropriate."""
             
 
             # Check if news information is requested
-            if any(keyword in user_message.lower() for keyword in ['news', 'headlines', 'latest news', 'current events', 'breaking news']):
-                category = self._extract_news_category(user_message)
+            if route.wants_news:
+                category = route.arguments["category"]
                 logger.info(f"📰 Fetching news for category: {category}")
                 news_service = skills_manager.get_skill("news")
                 if news_service:
-                    news_data = news_service.get_news_headlines(category)
+                    news_data = await news_service.get_news_headlines(category)
                     if "error" not in news_data and "articles" in news_data and news_data["articles"]:
                         return self._format_news_response(news_data, category)
                     else:
@@ -218,7 +156,7 @@ User's current question: "{user_message}"
 
 
 Please provide a specific, helpful answer to the user's current question. Keep your response under 3000 characters."""
-            llm_response = self.model.generate_content(llm_prompt)
+            llm_response = await self._generate_content(llm_prompt)
             
             if not llm_response.candidates:
                 raise Exception("No response candidates generated from LLM")
@@ -256,9 +194,10 @@ Please provide a specific, helpful answer to the user's current question. Keep y
             # For backwards compatibility, detection remains simple and based on Devanagari characters.
             # (If you want to pass explicit language param to streaming, update signature similarly.)
             # Respect explicit language param; fall back to auto-detect only when language=='auto'
+            route = skills_manager.route(user_message)
             lang = language
             if language == "auto":
-                lang = self._detect_language(user_message)
+                lang = route.language
 
             if lang == "both":
                 language_instruction = "Provide the answer in BOTH English and Hindi. First provide the English version, then the Hindi translation separated by '---'."
@@ -268,12 +207,12 @@ Please provide a specific, helpful answer to the user's current question. Keep y
                 language_instruction = "Respond in English only."
             
             # Check if news information is requested
-            if any(keyword in user_message.lower() for keyword in ['news', 'headlines', 'latest news', 'current events', 'breaking news']):
-                 category = self._extract_news_category(user_message)
+            if route.wants_news:
+                 category = route.arguments["category"]
                  logger.info(f"📰 Fetching news for category: {category}")
                  news_service = skills_manager.get_skill("news")
                  if news_service:
-                     news_data = news_service.get_news_headlines(category)
+                     news_data = await news_service.get_news_headlines(category)
                      if "error" not in news_data and "articles" in news_data and news_data["articles"]:
                          news_response = self._format_news_response(news_data, category)
                          # Yield the news response as a single chunk
@@ -314,18 +253,18 @@ Please provide a specific, helpful answer to the user's current question. Keep y
             # Prepend language instruction
             llm_prompt = f"{language_instruction}\n\n{llm_prompt}"
 
-            # Use stream_generate_content for streaming response
-            response_stream = self.model.generate_content(llm_prompt, stream=True)
-
+            # Stream through the async API so each token wait yields to other connections
             accumulated_response = ""
-            for chunk in response_stream:
-                if chunk.candidates and len(chunk.candidates) > 0:
-                    candidate = chunk.candidates[0]
-                    if candidate.content and candidate.content.parts:
-                        for part in candidate.content.parts:
-                            if hasattr(part, 'text') and part.text:
-                                accumulated_response += part.text
-                                yield part.text
+            async with self._semaphore:
+                response_stream = await self.model.generate_content_async(llm_prompt, stream=True)
+                async for chunk in response_stream:
+                    if chunk.candidates and len(chunk.candidates) > 0:
+                        candidate = chunk.candidates[0]
+                        if candidate.content and candidate.content.parts:
+                            for part in candidate.content.parts:
+                                if hasattr(part, 'text') and part.text:
+                                    accumulated_response += part.text
+                                    yield part.text
             
             if not accumulated_response.strip():
                 raise Exception("Empty response text from LLM")
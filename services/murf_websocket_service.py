@@ -2,190 +2,469 @@ import asyncio
 import websockets
 import json
 import base64
+import re
 import uuid
-from typing import Optional, AsyncGenerator
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Awaitable, Callable, Optional, AsyncGenerator, AsyncIterator, Set, Tuple
 import logging
 import os
 from datetime import datetime
+from utils.audio_cache import AudioCache, shared_audio_cache
+from utils.metrics import stage_metrics
 
 logger = logging.getLogger(__name__)
 
+# Sentence ends (including the Devanagari danda), clause punctuation, or line breaks,
+# each followed by whitespace so decimals like "3.5" are never split.
+_SEGMENT_BOUNDARY = re.compile(r'[.!?\u0964]+["\')\]]*\s+|[,;:]\s+|\n+')
 
-class MurfWebSocketService:
-    """Murf WebSocket TTS service for streaming text-to-speech"""
-    
-    def __init__(self, api_key: str, voice_id: str = "en-US-amara"):
-        self.api_key = api_key
-        self.voice_id = voice_id
-        self.ws_url = "wss://api.murf.ai/v1/speech/stream-input"
-        self.websocket = None
-        self.is_connected = False
-        # Use a static context_id as requested to avoid context limit exceeded errors
-        self.static_context_id = "voice_agent_context_static"
-        # Add a lock to prevent concurrent recv() calls
-        self._recv_lock = asyncio.Lock()
-        self._connecting = False
-        
-    async def connect(self):
-        """Establish WebSocket connection to Murf"""
-        # Prevent multiple concurrent connections
-        if self._connecting or self.is_connected:
-            logger.info("Already connected or connecting to Murf WebSocket")
-            return
-            
-        self._connecting = True
+
+def split_ready_segment(buffer: str, min_chars: int) -> tuple:
+    """Split buffered LLM text at the last sentence/clause boundary
+
+    Returns (segment, remainder). The segment is empty when no boundary leaves
+    at least ``min_chars`` characters to send.
+    """
+    cut = 0
+    for match in _SEGMENT_BOUNDARY.finditer(buffer):
+        if len(buffer[:match.end()].strip()) >= min_chars:
+            cut = match.end()
+    return buffer[:cut], buffer[cut:]
+
+
+async def peek_complete_text(text_stream: AsyncGenerator[str, None], wait: float) -> Tuple[Optional[str], AsyncGenerator[str, None]]:
+    """Find out whether a text stream is already complete.
+
+    Waits for the first chunk, then up to ``wait`` seconds for the stream to end.
+    Returns (full text or None if still streaming, a stream that replays every
+    chunk, consumed or not).
+    """
+    iterator = text_stream.__aiter__()
+    loop = asyncio.get_running_loop()
+    head = []
+    pending = asyncio.ensure_future(iterator.__anext__())
+    deadline = None
+    while True:
+        timeout = None if deadline is None else max(0.0, deadline - loop.time())
+        done, _ = await asyncio.wait({pending}, timeout=timeout)
+        if not done:
+            break
         try:
-            connection_url = f"{self.ws_url}?api-key={self.api_key}&sample_rate=44100&channel_type=MONO&format=WAV"
-            self.websocket = await websockets.connect(connection_url)
-            self.is_connected = True
-            logger.info("✅ Connected to Murf WebSocket")
-            
-            # Clear any existing context first to avoid "Exceeded Active context limit"
-            await self.clear_context()
-            
-            # Send initial voice configuration
-            await self._send_voice_config()
-            
-        except Exception as e:
-            logger.error(f"Failed to connect to Murf WebSocket: {str(e)}")
-            self.is_connected = False
-            raise
+            head.append(pending.result())
+        except StopAsyncIteration:
+            head_text = "".join(chunk for chunk in head if chunk)
+
+            async def replay_all():
+                for chunk in head:
+                    yield chunk
+            return head_text, replay_all()
+        if deadline is None:
+            deadline = loop.time() + wait
+        pending = asyncio.ensure_future(iterator.__anext__())
+
+    async def replay_and_continue():
+        try:
+            for chunk in head:
+                yield chunk
+            try:
+                yield await pending
+            except StopAsyncIteration:
+                return
+            async for chunk in iterator:
+                yield chunk
         finally:
-            self._connecting = False
-    
-    async def _send_voice_config(self):
-        """Send voice configuration to Murf WebSocket"""
+            if not pending.done():
+                pending.cancel()
+    return None, replay_and_continue()
+
+
+class MurfConnection:
+    """A single long-lived Murf WebSocket that has already received its voice config"""
+
+    def __init__(self, url: str, voice_config: dict):
+        self.url = url
+        self.voice_config = voice_config
+        self.websocket = None
+        self.turns_served = 0
+
+    @property
+    def is_open(self) -> bool:
+        return self.websocket is not None and not self.websocket.closed
+
+    async def open(self):
+        """Connect and send the voice configuration once for the lifetime of the socket"""
+        self.websocket = await websockets.connect(self.url)
+        voice_config_msg = {"voice_config": self.voice_config}
+        logger.info(f"Sending voice config: {voice_config_msg}")
+        await self.websocket.send(json.dumps(voice_config_msg))
         try:
-            voice_config_msg = {
-                "voice_config": {
-                    "voiceId": self.voice_id,
-                    "style": "Conversational",
-                    "rate": 0,
-                    "pitch": 0,
-                    "variation": 1
-                },
-                "context_id": self.static_context_id
-            }
-            logger.info(f"Sending voice config: {voice_config_msg}")
-            await self.websocket.send(json.dumps(voice_config_msg))
-            
-            # Wait for voice config acknowledgment with recv lock
-            async with self._recv_lock:
-                try:
-                    response = await asyncio.wait_for(self.websocket.recv(), timeout=5.0)
-                    data = json.loads(response)
-                    logger.info(f"Voice config response: {data}")
-                except asyncio.TimeoutError:
-                    logger.warning("Timeout waiting for voice config acknowledgment")
-            
-        except Exception as e:
-            logger.error(f"Failed to send voice config: {str(e)}")
-            raise
-    
-    async def disconnect(self):
-        """Close WebSocket connection"""
+            response = await asyncio.wait_for(self.websocket.recv(), timeout=5.0)
+            logger.info(f"Voice config response: {json.loads(response)}")
+        except asyncio.TimeoutError:
+            logger.warning("Timeout waiting for voice config acknowledgment")
+
+    async def ping(self, timeout: float = 5.0) -> bool:
+        """Health check: True if the socket answers a WebSocket ping in time"""
+        if not self.is_open:
+            return False
+        try:
+            pong_waiter = await self.websocket.ping()
+            await asyncio.wait_for(pong_waiter, timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    async def send(self, message: dict):
+        await self.websocket.send(json.dumps(message))
+
+    async def recv(self, timeout: float) -> dict:
+        response = await asyncio.wait_for(self.websocket.recv(), timeout=timeout)
+        return json.loads(response)
+
+    async def close(self):
         try:
-            if self.websocket and self.is_connected:
+            if self.websocket is not None:
                 await self.websocket.close()
-                self.is_connected = False
-                logger.info("Disconnected from Murf WebSocket")
         except Exception as e:
-            logger.error(f"Error disconnecting from Murf WebSocket: {str(e)}")
-    
-    async def stream_text_to_audio(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[dict, None]:
+            logger.error(f"Error closing Murf WebSocket: {str(e)}")
+        finally:
+            self.websocket = None
+
+
+class MurfTurn:
+    """One TTS turn on a checked-out connection, isolated by its own context_id.
+
+    With ``acquire`` instead of a connection, the connection is only checked out
+    once the turn has to talk to Murf, so audio cache hits never wait on the pool.
+    """
+
+    def __init__(self, connection: Optional[MurfConnection] = None, stream_mode: str = "incremental",
+                 min_segment_chars: int = 40, flush_timeout: float = 0.5,
+                 audio_cache: Optional[AudioCache] = None, cache_key: Optional[Callable[[str], str]] = None,
+                 cache_peek_seconds: float = 0.02,
+                 acquire: Optional[Callable[[], Awaitable[MurfConnection]]] = None):
+        self.connection = connection
+        self._acquire = acquire
+        self.context_id = f"turn_{uuid.uuid4().hex}"
+        self.completed = False
+        self.stream_mode = stream_mode
+        self.min_segment_chars = min_segment_chars
+        self.flush_timeout = flush_timeout
+        # Time-to-first-audio: seconds from the start of the turn to the first audio chunk
+        self.started_at: Optional[float] = None
+        self.first_audio_latency: Optional[float] = None
+        # Complete texts (canned replies, short answers) are served from / stored in the audio cache
+        self.audio_cache = audio_cache
+        self.cache_key = cache_key
+        self.cache_peek_seconds = cache_peek_seconds
+        self.served_from_cache = False
+
+    async def stream_text_to_audio(self, text_stream: AsyncGenerator[str, None], mode: Optional[str] = None) -> AsyncGenerator[dict, None]:
         """
-        Stream text chunks to Murf and yield base64 audio responses
-        
+        Stream text chunks to Murf and yield base64 audio responses.
+
+        If the text stream turns out to be complete right away, its audio is
+        replayed from the cache when present, without contacting Murf.
+
         Args:
             text_stream: Async generator of text chunks from LLM
-            
+            mode: "incremental" sends sentence/clause-sized segments as they arrive and
+                listens for audio at the same time; "batch" sends the whole text at the end.
+                Defaults to the turn's configured stream_mode.
+
         Yields:
             dict: Response containing base64 audio data and metadata
         """
-        if not self.is_connected:
-            raise Exception("WebSocket not connected. Call connect() first.")
-        
+        mode = mode or self.stream_mode
+        self.started_at = asyncio.get_running_loop().time()
+        if self.audio_cache is not None:
+            full_text, text_stream = await peek_complete_text(text_stream, self.cache_peek_seconds)
+            if full_text and full_text.strip():
+                async for audio_response in self._speak_cached(full_text, mode):
+                    yield audio_response
+                return
+        async for audio_response in self._stream_uncached(text_stream, mode):
+            yield audio_response
+
+    async def _connect(self):
+        if self.connection is None:
+            self.connection = await self._acquire()
+
+    async def _speak_cached(self, text: str, mode: str) -> AsyncGenerator[dict, None]:
+        """Replay cached audio for a complete text, or synthesize it and cache the result"""
+        key = self.cache_key(text)
+        loop = asyncio.get_running_loop()
+        chunks = await loop.run_in_executor(None, self.audio_cache.read_chunks, key)
+        if chunks is not None:
+            self.served_from_cache = True
+            total_size = 0
+            for number, chunk in enumerate(chunks, 1):
+                audio_base64 = base64.b64encode(chunk).decode("ascii")
+                total_size += len(audio_base64)
+                if number == 1 and self.started_at is not None:
+                    self.first_audio_latency = asyncio.get_running_loop().time() - self.started_at
+                    stage_metrics.observe("tts_first_audio", self.first_audio_latency, "cache_hit")
+                    logger.info(f"⏱️ TTS audio served from cache ({len(chunks)} chunks)")
+                yield {
+                    "type": "audio_chunk",
+                    "audio_base64": audio_base64,
+                    "context_id": self.context_id,
+                    "chunk_number": number,
+                    "chunk_size": len(audio_base64),
+                    "total_size": total_size,
+                    "timestamp": datetime.now().isoformat(),
+                    "is_final": number == len(chunks),
+                    "cached": True
+                }
+            self.completed = True
+            return
+
+        async def single_chunk():
+            yield text
+
+        collected = []
+        async for audio_response in self._stream_uncached(single_chunk(), mode):
+            if audio_response.get("type") == "audio_chunk":
+                collected.append(base64.b64decode(audio_response["audio_base64"]))
+            yield audio_response
+        if self.completed and collected:
+            try:
+                await loop.run_in_executor(None, self.audio_cache.put_chunks, key, collected)
+            except OSError as e:
+                logger.warning(f"Could not cache TTS audio: {str(e)}")
+
+    async def _stream_uncached(self, text_stream: AsyncGenerator[str, None], mode: str) -> AsyncGenerator[dict, None]:
+        await self._connect()
+        if mode == "incremental":
+            async for audio_response in self._stream_incremental(text_stream):
+                yield audio_response
+            return
+
         try:
             accumulated_text = ""
             chunk_count = 0
-            
+
             # Collect all text chunks first
-            text_chunks = []
             async for text_chunk in text_stream:
                 if text_chunk:
-                    text_chunks.append(text_chunk)
                     accumulated_text += text_chunk
                     chunk_count += 1
-            
+
             logger.info(f"Collected {chunk_count} text chunks, total length: {len(accumulated_text)}")
-            
+
             # Send all text in one message (better for TTS quality)
             text_msg = {
-                "context_id": self.static_context_id,
+                "context_id": self.context_id,
                 "text": accumulated_text,
                 "end": True  # Close context immediately for better audio quality
             }
-            
+
             logger.info(f"Sending complete text ({len(accumulated_text)} chars): {accumulated_text[:100]}...")
-            await self.websocket.send(json.dumps(text_msg))
-            
+            await self.connection.send(text_msg)
+
             # Now listen for audio responses
             async for audio_response in self._listen_for_audio():
                 yield audio_response
-                # Break on final audio chunk
-                if audio_response.get("type") == "audio_chunk" and audio_response.get("is_final"):
-                    break
-            
+
         except Exception as e:
             logger.error(f"Error in stream_text_to_audio: {str(e)}")
             raise
-    
-    async def _listen_for_audio(self) -> AsyncGenerator[dict, None]:
-        """Listen for audio responses from Murf WebSocket"""
+
+    async def _stream_incremental(self, text_stream: AsyncGenerator[str, None]) -> AsyncGenerator[dict, None]:
+        """Send text in segments while concurrently yielding audio for this context"""
+        sender = asyncio.create_task(self._send_segments(text_stream))
+        try:
+            async for audio_response in self._listen_for_audio(sender):
+                yield audio_response
+            # Surface LLM/send errors that happened after the last audio chunk
+            if sender.done() and not sender.cancelled() and sender.exception():
+                raise sender.exception()
+        except Exception as e:
+            logger.error(f"Error in incremental stream_text_to_audio: {str(e)}")
+            raise
+        finally:
+            if not sender.done():
+                sender.cancel()
+
+    async def _send_segments(self, text_stream: AsyncGenerator[str, None]):
+        """Forward LLM text to Murf in sentence or clause sized segments
+
+        A segment is flushed as soon as a boundary leaves at least min_segment_chars,
+        or once buffered text has waited flush_timeout seconds. The final segment
+        closes the context with end=True.
+        """
+        # Read the generator from its own task so timeouts never cancel it mid-chunk
+        chunks: asyncio.Queue = asyncio.Queue()
+        done = object()
+
+        async def pump():
+            try:
+                async for text_chunk in text_stream:
+                    if text_chunk:
+                        await chunks.put(text_chunk)
+            except Exception as e:
+                await chunks.put(e)
+                return
+            await chunks.put(done)
+
+        pump_task = asyncio.create_task(pump())
+        loop = asyncio.get_running_loop()
+        buffer = ""
+        buffered_since = None
+        segment_count = 0
+        total_chars = 0
+
+        try:
+            while True:
+                timeout = None
+                if buffer:
+                    timeout = max(0.0, self.flush_timeout - (loop.time() - buffered_since))
+                try:
+                    item = await asyncio.wait_for(chunks.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    # Flush what we have, but avoid cutting a word in half
+                    last_space = buffer.rfind(" ")
+                    cut = last_space + 1 if last_space > 0 else len(buffer)
+                    segment, buffer = buffer[:cut], buffer[cut:]
+                    buffered_since = loop.time() if buffer else None
+                    if segment.strip():
+                        await self.connection.send({"context_id": self.context_id, "text": segment})
+                        segment_count += 1
+                        total_chars += len(segment)
+                    continue
+
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                if not buffer:
+                    buffered_since = loop.time()
+                buffer += item
+                segment, buffer = split_ready_segment(buffer, self.min_segment_chars)
+                if segment:
+                    await self.connection.send({"context_id": self.context_id, "text": segment})
+                    segment_count += 1
+                    total_chars += len(segment)
+                    buffered_since = loop.time() if buffer else None
+
+            if total_chars == 0 and not buffer.strip():
+                raise Exception("No text received to synthesize")
+
+            final_msg = {"context_id": self.context_id, "end": True}
+            if buffer.strip():
+                final_msg["text"] = buffer
+                segment_count += 1
+                total_chars += len(buffer)
+            await self.connection.send(final_msg)
+            logger.info(f"Sent {segment_count} text segments incrementally, total length: {total_chars}")
+        finally:
+            if not pump_task.done():
+                pump_task.cancel()
+
+    async def send_single_text(self, text: str) -> AsyncGenerator[dict, None]:
+        """
+        Send a single text message to Murf and receive audio response
+
+        Args:
+            text: Complete text to convert to speech
+
+        Yields:
+            dict: Response containing base64 audio data and metadata
+        """
+        if self.audio_cache is not None and text.strip():
+            async for audio_response in self._speak_cached(text, "batch"):
+                yield audio_response
+            return
+        try:
+            await self._connect()
+            text_msg = {
+                "context_id": self.context_id,
+                "text": text,
+                "end": True  # Close context immediately
+            }
+
+            logger.info(f"Sending complete text: {text[:100]}...")
+            await self.connection.send(text_msg)
+
+            async for audio_response in self._listen_for_audio():
+                yield audio_response
+
+        except Exception as e:
+            logger.error(f"Error in send_single_text: {str(e)}")
+            raise
+
+    async def _recv(self, timeout: float, sender: Optional[asyncio.Task] = None) -> dict:
+        """Receive the next message, failing early if the concurrent text sender errors"""
+        if sender is None or sender.done():
+            return await self.connection.recv(timeout=timeout)
+        recv_task = asyncio.ensure_future(self.connection.recv(timeout=timeout))
+        await asyncio.wait({recv_task, sender}, return_when=asyncio.FIRST_COMPLETED)
+        if not recv_task.done() and not sender.cancelled() and sender.exception():
+            recv_task.cancel()
+            raise sender.exception()
+        return await recv_task
+
+    async def _listen_for_audio(self, sender: Optional[asyncio.Task] = None) -> AsyncGenerator[dict, None]:
+        """Listen for audio responses belonging to this turn's context"""
         audio_chunk_count = 0
         total_audio_size = 0
-        
+
         try:
             while True:
                 try:
-                    # Use recv lock to prevent concurrent recv() calls
-                    async with self._recv_lock:
-                        response = await asyncio.wait_for(self.websocket.recv(), timeout=30.0)
-                    
-                    data = json.loads(response)
+                    data = await self._recv(30.0, sender)
+
+                    # Ignore stragglers from other contexts on this socket
+                    if data.get("context_id") and data.get("context_id") != self.context_id:
+                        logger.debug(f"Skipping response for stale context {data.get('context_id')}")
+                        continue
+
                     logger.info(f"📥 Received response: {list(data.keys())}")
-                    
+
                     if "audio" in data:
                         audio_chunk_count += 1
                         audio_base64 = data["audio"]
                         total_audio_size += len(audio_base64)
-                        
+                        is_final = data.get("final", False)
+                        if is_final:
+                            self.completed = True
+                        if audio_chunk_count == 1 and self.started_at is not None:
+                            self.first_audio_latency = asyncio.get_running_loop().time() - self.started_at
+                            stage_metrics.observe("tts_first_audio", self.first_audio_latency)
+                            logger.info(f"⏱️ Murf time-to-first-audio ({self.stream_mode}): {self.first_audio_latency:.3f}s")
+
                         # Yield the response
                         yield {
                             "type": "audio_chunk",
                             "audio_base64": audio_base64,
-                            "context_id": data.get("context_id"),
+                            "context_id": self.context_id,
                             "chunk_number": audio_chunk_count,
                             "chunk_size": len(audio_base64),
                             "total_size": total_audio_size,
                             "timestamp": datetime.now().isoformat(),
-                            "is_final": data.get("final", False)
+                            "is_final": is_final
                         }
-                        
+
                         # Check if this is the final audio chunk
-                        if data.get("final"):
+                        if is_final:
                             logger.info(f"Received final audio chunk. Total chunks: {audio_chunk_count}, Total size: {total_audio_size}")
                             break
-                    
+
                     else:
                         # Non-audio response
                         logger.info(f"Received non-audio response: {data}")
+                        if data.get("final"):
+                            self.completed = True
                         yield {
                             "type": "status",
                             "data": data,
                             "timestamp": datetime.now().isoformat()
                         }
-                
+                        if data.get("final"):
+                            break
+
                 except asyncio.TimeoutError:
                     logger.warning("Timeout waiting for Murf response")
                     break
@@ -195,66 +474,203 @@ class MurfWebSocketService:
                 except Exception as e:
                     logger.error(f"Error receiving from Murf WebSocket: {str(e)}")
                     break
-            
+
         except Exception as e:
             logger.error(f"Error in _listen_for_audio (total chunks processed: {audio_chunk_count}): {str(e)}")
             raise
-    
-    async def send_single_text(self, text: str) -> AsyncGenerator[dict, None]:
-        """
-        Send a single text message to Murf and receive audio response
-        
-        Args:
-            text: Complete text to convert to speech
-            
-        Yields:
-            dict: Response containing base64 audio data and metadata
-        """
-        if not self.is_connected:
-            raise Exception("WebSocket not connected. Call connect() first.")
-        
-        try:
-            # Send complete text in one message
-            text_msg = {
-                "context_id": self.static_context_id,
-                "text": text,
-                "end": True  # Close context immediately
-            }
-            
-            logger.info(f"Sending complete text: {text[:100]}...")
-            await self.websocket.send(json.dumps(text_msg))
-            
-            # Listen for audio responses
-            async for audio_response in self._listen_for_audio():
-                yield audio_response
-                
-        except Exception as e:
-            logger.error(f"Error in send_single_text: {str(e)}")
-            raise
-    
+
     async def clear_context(self):
-        """Clear the current context to handle interruptions"""
+        """Clear this turn's context to handle interruptions (best effort, no ack wait)"""
         try:
-            if not self.websocket or not self.is_connected:
-                return  # No connection to clear
-                
-            clear_msg = {
-                "context_id": self.static_context_id,
-                "clear": True
-            }
-            
-            logger.info("Clearing Murf context to avoid context limit errors")
-            await self.websocket.send(json.dumps(clear_msg))
-            
-            # Use the recv lock to prevent concurrency issues
-            async with self._recv_lock:
-                try:
-                    response = await asyncio.wait_for(self.websocket.recv(), timeout=3.0)
-                    data = json.loads(response)
-                    logger.info(f"Context clear response: {data}")
-                except asyncio.TimeoutError:
-                    logger.warning("Timeout waiting for context clear acknowledgment")
-            
+            if self.connection is not None and self.connection.is_open:
+                await self.connection.send({"context_id": self.context_id, "clear": True})
         except Exception as e:
             logger.error(f"Error clearing context: {str(e)}")
-            # Don't raise here - clearing context is best effort
\ No newline at end of file
+
+
+class MurfWebSocketService:
+    """Pool of pre-warmed Murf WebSocket connections for streaming text-to-speech
+
+    Connections are opened and voice-configured ahead of time, so a turn only pays
+    for sending its text. Each turn checks a connection out exclusively and gets
+    a unique context_id; connections that fail health checks or end a turn in an
+    unknown state are closed and replaced in the background.
+    """
+
+    def __init__(self, api_key: str, voice_id: str = "en-US-amara", pool_size: Optional[int] = None,
+                 max_size: Optional[int] = None):
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.ws_url = "wss://api.murf.ai/v1/speech/stream-input"
+        self.audio_format = "WAV"
+        self.sample_rate = 44100
+        self.connection_url = f"{self.ws_url}?api-key={self.api_key}&sample_rate={self.sample_rate}&channel_type=MONO&format={self.audio_format}"
+        self.voice_config = {
+            "voiceId": self.voice_id,
+            "style": "Conversational",
+            "rate": 0,
+            "pitch": 0,
+            "variation": 1
+        }
+        self.pool_size = pool_size or int(os.getenv("MURF_POOL_SIZE", "2"))
+        self.max_size = max(max_size or int(os.getenv("MURF_POOL_MAX_SIZE", "10")), self.pool_size)
+        self.acquire_timeout = float(os.getenv("MURF_POOL_ACQUIRE_TIMEOUT", "10"))
+        self.health_check_interval = float(os.getenv("MURF_POOL_HEALTH_INTERVAL", "30"))
+        # Text streaming: "incremental" (sentence-level flushing) or "batch" (whole answer at once)
+        self.stream_mode = os.getenv("MURF_STREAM_MODE", "incremental").lower()
+        self.min_segment_chars = int(os.getenv("MURF_MIN_SEGMENT_CHARS", "40"))
+        self.flush_timeout = float(os.getenv("MURF_FLUSH_TIMEOUT", "0.5"))
+        # How long to wait after the first text chunk to learn whether the text is complete (cacheable)
+        self.cache_peek_seconds = float(os.getenv("TTS_CACHE_PEEK_SECONDS", "0.02"))
+        self.audio_cache = shared_audio_cache()
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._connections: Set[MurfConnection] = set()
+        self._opening = 0
+        self._health_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    @property
+    def is_connected(self) -> bool:
+        """True if at least one pooled connection is open"""
+        return any(conn.is_open for conn in self._connections)
+
+    async def start(self):
+        """Pre-warm the pool and start the background health checker"""
+        self._closed = False
+        await self._fill_pool()
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_check_loop())
+        logger.info(f"✅ Murf WebSocket pool ready ({len(self._connections)}/{self.pool_size} warm connections)")
+
+    async def close(self):
+        """Close idle connections; connections still in use are closed when returned"""
+        self._closed = True
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        while not self._idle.empty():
+            conn = self._idle.get_nowait()
+            await self._discard(conn, replace=False)
+        logger.info("Murf WebSocket pool closed")
+
+    async def _open_connection(self) -> MurfConnection:
+        self._opening += 1
+        try:
+            conn = MurfConnection(self.connection_url, self.voice_config)
+            await conn.open()
+            self._connections.add(conn)
+            logger.info("✅ Connected to Murf WebSocket")
+            return conn
+        except Exception as e:
+            logger.error(f"Failed to connect to Murf WebSocket: {str(e)}")
+            raise
+        finally:
+            self._opening -= 1
+
+    async def _fill_pool(self):
+        """Top the pool up to pool_size warm connections"""
+        missing = self.pool_size - len(self._connections) - self._opening
+        if missing <= 0 or self._closed:
+            return
+        results = await asyncio.gather(*(self._open_connection() for _ in range(missing)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, MurfConnection):
+                self._idle.put_nowait(result)
+
+    async def _discard(self, conn: MurfConnection, replace: bool = True):
+        self._connections.discard(conn)
+        await conn.close()
+        if replace and not self._closed:
+            asyncio.create_task(self._fill_pool())
+
+    async def _health_check_loop(self):
+        while not self._closed:
+            try:
+                await asyncio.sleep(self.health_check_interval)
+                idle = []
+                while not self._idle.empty():
+                    idle.append(self._idle.get_nowait())
+                for conn in idle:
+                    if await conn.ping():
+                        self._idle.put_nowait(conn)
+                    else:
+                        logger.warning("Murf pooled connection failed health check; replacing")
+                        await self._discard(conn, replace=False)
+                await self._fill_pool()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Murf pool health check error: {str(e)}")
+
+    async def _acquire(self) -> MurfConnection:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.acquire_timeout
+        while True:
+            if self._closed:
+                raise Exception("Murf WebSocket pool is closed")
+            try:
+                conn = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                conn = None
+            if conn is not None:
+                if conn.is_open:
+                    return conn
+                await self._discard(conn, replace=False)
+                continue
+            if len(self._connections) + self._opening < self.max_size:
+                return await self._open_connection()
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise Exception("Timed out waiting for a free Murf WebSocket connection")
+            try:
+                conn = await asyncio.wait_for(self._idle.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                raise Exception("Timed out waiting for a free Murf WebSocket connection")
+            self._idle.put_nowait(conn)
+
+    async def _release(self, conn: MurfConnection, healthy: bool):
+        conn.turns_served += 1
+        if healthy and conn.is_open and not self._closed:
+            self._idle.put_nowait(conn)
+        else:
+            await self._discard(conn)
+
+    async def _acquire_for_turn(self) -> MurfConnection:
+        with stage_metrics.timer("tts_acquire"):
+            return await self._acquire()
+
+    @asynccontextmanager
+    async def turn(self) -> AsyncIterator[MurfTurn]:
+        """One TTS turn with a fresh context_id.
+
+        The audio cache is checked first; a pooled connection is checked out only
+        when the turn has to synthesize, so cache hits don't depend on Murf.
+        """
+        murf_turn = MurfTurn(
+            None, self.stream_mode, self.min_segment_chars, self.flush_timeout,
+            audio_cache=self.audio_cache,
+            cache_key=partial(AudioCache.key, self.voice_id, self.voice_config["style"], self.audio_format, self.sample_rate),
+            cache_peek_seconds=self.cache_peek_seconds,
+            acquire=self._acquire_for_turn
+        )
+        try:
+            yield murf_turn
+        finally:
+            conn = murf_turn.connection
+            if conn is not None:
+                if not murf_turn.completed:
+                    # Interrupted or failed turn: the socket may still carry audio for this context
+                    await murf_turn.clear_context()
+                await self._release(conn, healthy=murf_turn.completed)
+
+    async def stream_text_to_audio(self, text_stream: AsyncGenerator[str, None], mode: Optional[str] = None) -> AsyncGenerator[dict, None]:
+        """Convenience wrapper that runs a whole turn on a pooled connection"""
+        async with self.turn() as murf_turn:
+            async for audio_response in murf_turn.stream_text_to_audio(text_stream, mode=mode):
+                yield audio_response
+
+    async def send_single_text(self, text: str) -> AsyncGenerator[dict, None]:
+        """Convenience wrapper that speaks a complete text on a pooled connection"""
+        async with self.turn() as murf_turn:
+            async for audio_response in murf_turn.send_single_text(text):
+                yield audio_response
@@ -1,15 +1,34 @@
+import asyncio
 import logging
-import requests
+import os
+import aiohttp
 import xml.etree.ElementTree as ET
 from typing import List, Dict
 
 logger = logging.getLogger(__name__)
 
+RSS_FEEDS = {
+    "general": "https://feeds.bbci.co.uk/news/rss.xml",
+    "technology": "https://feeds.bbci.co.uk/news/technology/rss.xml",
+    "business": "https://feeds.bbci.co.uk/news/business/rss.xml",
+    "sports": "https://feeds.bbci.co.uk/news/sport/rss.xml",
+    "entertainment": "https://feeds.bbci.co.uk/news/entertainment_and_arts/rss.xml",
+    "health": "https://feeds.bbci.co.uk/news/health/rss.xml",
+    "science": "https://feeds.bbci.co.uk/news/science_and_environment/rss.xml"
+}
+
 class NewsService:
     """Service for fetching news headlines using free RSS feeds."""
     
     def __init__(self, api_key: str = None):
         # API key parameter kept for compatibility but not used for free RSS feeds
+        self.cache: Dict[str, dict] = {}
+        self._validators: Dict[str, Dict] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._refresher = None
+        self.session = None
+        self.refresh_interval = float(os.getenv("NEWS_REFRESH_INTERVAL", "600"))
+        self.cold_wait = float(os.getenv("NEWS_COLD_WAIT", "3"))
         logger.info("📰 News Service initialized (using free RSS feeds)")
 
     def _parse_rss_feed(self, xml_content: str) -> List[Dict]:
@@ -39,27 +58,67 @@ class NewsService:
             logger.error(f"Error parsing RSS feed: {str(e)}")
             return []
 
-    def get_news_headlines(self, category: str = "general") -> dict:
-        """Fetch current news headlines for a given category using free RSS feeds."""
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Get or create the shared aiohttp session"""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15))
+        return self.session
+
+    async def start(self):
+        """Warm every category and keep them refreshed in the background"""
+        if self._refresher is None or self._refresher.done():
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def close(self):
+        if self._refresher:
+            self._refresher.cancel()
+            self._refresher = None
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.gather(*(self.refresh(category) for category in RSS_FEEDS))
+            await asyncio.sleep(self.refresh_interval)
+
+    def refresh(self, category: str) -> "asyncio.Task":
+        """Refresh one category; concurrent callers share the same fetch"""
+        task = self._refreshing.get(category)
+        if task is None or task.done():
+            task = asyncio.create_task(self._fetch_feed(category))
+            self._refreshing[category] = task
+        return task
+
+    async def _fetch_feed(self, category: str):
+        """Conditionally fetch a feed (ETag / Last-Modified) and update the cache"""
+        import feedparser
+
+        rss_url = RSS_FEEDS.get(category, RSS_FEEDS["general"])
+        headers = {}
+        validators = self._validators.get(category, {})
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
         try:
-            # Use direct RSS feed parsing with feedparser library
-            import feedparser
-            
-            rss_feeds = {
-                "general": "https://feeds.bbci.co.uk/news/rss.xml",
-                "technology": "https://feeds.bbci.co.uk/news/technology/rss.xml",
-                "business": "https://feeds.bbci.co.uk/news/business/rss.xml",
-                "sports": "https://feeds.bbci.co.uk/news/sport/rss.xml",
-                "entertainment": "https://feeds.bbci.co.uk/news/entertainment_and_arts/rss.xml",
-                "health": "https://feeds.bbci.co.uk/news/health/rss.xml",
-                "science": "https://feeds.bbci.co.uk/news/science_and_environment/rss.xml"
-            }
-            
-            rss_url = rss_feeds.get(category, rss_feeds["general"])
-            
-            # Parse the RSS feed
-            feed = feedparser.parse(rss_url)
-            
+            session = await self._get_session()
+            async with session.get(rss_url, headers=headers) as response:
+                if response.status == 304:
+                    logger.debug(f"News feed unchanged for category {category}")
+                    return
+                if response.status != 200:
+                    logger.error(f"News feed error {response.status} for category {category}")
+                    return
+                body = await response.read()
+                self._validators[category] = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified")
+                }
+
+            # Parsing is CPU-bound; keep it off the event loop
+            feed = await asyncio.get_running_loop().run_in_executor(None, feedparser.parse, body)
+
             # Format the response to match the expected structure
             articles = []
             for entry in feed.entries[:10]:  # Limit to 10 articles
@@ -71,16 +130,29 @@ class NewsService:
                     "source": {"name": "BBC News"}
                 }
                 articles.append(article)
-            
-            news_data = {
+
+            self.cache[category] = {
                 "status": "ok",
                 "totalResults": len(articles),
                 "articles": articles
             }
-            
-            logger.info(f"News data retrieved for category {category}: {len(articles)} articles")
-            return news_data
-            
+            logger.info(f"News data refreshed for category {category}: {len(articles)} articles")
         except Exception as e:
-            logger.error(f"Error fetching news data: {str(e)}")
+            logger.error(f"Error fetching news data for category {category}: {str(e)}")
+
+    async def get_news_headlines(self, category: str = "general") -> dict:
+        """Current news headlines for a category, served from the background-refreshed cache."""
+        if category not in RSS_FEEDS:
+            category = "general"
+        news_data = self.cache.get(category)
+        if news_data is None:
+            # Cold cache (e.g. just after startup): wait briefly for the first fetch
+            try:
+                await asyncio.wait_for(asyncio.shield(self.refresh(category)), timeout=self.cold_wait)
+            except asyncio.TimeoutError:
+                pass
+            news_data = self.cache.get(category)
+        if news_data is None:
             return {"error": "Could not fetch news data.", "status": "error"}
+        logger.info(f"News data served from cache for category {category}: {news_data['totalResults']} articles")
+        return news_data
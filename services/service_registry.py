@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from models.schemas import APIKeyConfig
+from services.stt_service import STTService
+from services.llm_service import LLMService
+from services.tts_service import TTSService
+from services.database_service import DatabaseService
+from services.assemblyai_streaming_service import AssemblyAIStreamingSessionFactory
+from services.murf_websocket_service import MurfWebSocketService
+from services.email_service import EmailService
+
+logger = logging.getLogger(__name__)
+
+# How long a retired generation stays open so in-flight requests holding it can finish
+RETIRE_GRACE_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class ServiceRegistry:
+    """Immutable snapshot of every service client built from one configuration.
+
+    Requests read the current registry once and use it for their whole lifetime;
+    reconfiguration builds a complete new generation and swaps the reference.
+    """
+    config: APIKeyConfig
+    generation: int
+    stt: Optional[STTService] = None
+    llm: Optional[LLMService] = None
+    tts: Optional[TTSService] = None
+    database: Optional[DatabaseService] = None
+    assemblyai_sessions: Optional[AssemblyAIStreamingSessionFactory] = None
+    murf_websocket: Optional[MurfWebSocketService] = None
+    email: Optional[EmailService] = None
+
+    def status(self) -> dict:
+        return {
+            "stt": self.stt is not None,
+            "llm": self.llm is not None,
+            "tts": self.tts is not None,
+            "database": self.database is not None,
+            "assemblyai_streaming": self.assemblyai_sessions is not None,
+            "murf_websocket": self.murf_websocket is not None
+        }
+
+
+def config_from_env() -> APIKeyConfig:
+    """Build the service configuration from environment variables"""
+    return APIKeyConfig(
+        personas=["default", "pirate", "developer", "cowboy", "robot"],
+        selected_persona=os.getenv("AGENT_PERSONA", "default"),
+        gemini_api_key=os.getenv("GEMINI_API_KEY"),
+        assemblyai_api_key=os.getenv("ASSEMBLYAI_API_KEY"),
+        murf_api_key=os.getenv("MURF_API_KEY"),
+        murf_voice_id=os.getenv("MURF_VOICE_ID", "en-US-amara"),
+        mongodb_url=os.getenv("MONGODB_URL")
+    )
+
+
+def _build(name: str, factory):
+    try:
+        return factory()
+    except Exception as e:
+        logger.error(f"Failed to initialize {name}: {e}")
+        return None
+
+
+async def build_service_registry(config: Optional[APIKeyConfig] = None,
+                                 previous: Optional[ServiceRegistry] = None) -> ServiceRegistry:
+    """Construct, connect and warm a complete generation of services.
+
+    The database connection of ``previous`` is reused when the MongoDB URL is
+    unchanged, so reconfiguring API keys never drops DB connectivity. Likewise
+    the AssemblyAI session factory is reused while its API key is unchanged, so
+    sessions still open on a retiring generation count against the same cap.
+    """
+    config = config or config_from_env()
+
+    stt = assemblyai_sessions = None
+    if config.assemblyai_api_key:
+        stt = _build("STTService", lambda: STTService(config.assemblyai_api_key))
+        if (previous and previous.assemblyai_sessions
+                and previous.config.assemblyai_api_key == config.assemblyai_api_key):
+            assemblyai_sessions = previous.assemblyai_sessions
+        else:
+            assemblyai_sessions = _build("AssemblyAIStreamingSessionFactory",
+                                         lambda: AssemblyAIStreamingSessionFactory(config.assemblyai_api_key))
+
+    llm = None
+    if config.gemini_api_key:
+        llm = _build("LLMService", lambda: LLMService(config.gemini_api_key, persona=config.selected_persona))
+        if llm and config.selected_persona:
+            try:
+                llm.set_persona(config.selected_persona)
+            except Exception:
+                pass
+
+    tts = murf_websocket = None
+    if config.murf_api_key:
+        tts = _build("TTSService", lambda: TTSService(config.murf_api_key, voice_id=config.murf_voice_id))
+        murf_websocket = _build("MurfWebSocketService",
+                                lambda: MurfWebSocketService(config.murf_api_key, voice_id=config.murf_voice_id))
+
+    if previous and previous.database and previous.config.mongodb_url == config.mongodb_url:
+        database = previous.database
+    else:
+        database = _build("DatabaseService", lambda: DatabaseService(config.mongodb_url))
+        if database:
+            try:
+                if await database.connect():
+                    logger.info("✅ Database service connected successfully")
+                else:
+                    logger.warning("⚠️ Database service running in fallback mode")
+            except Exception as e:
+                logger.error(f"❌ Database service initialization error: {e}")
+
+    email = _build("EmailService", EmailService)
+
+    if tts:
+        # Fallback messages are synthesized once per voice and then served from disk
+        tts.start_fallback_preparation()
+
+    if murf_websocket:
+        try:
+            await murf_websocket.start()
+        except Exception as e:
+            logger.error(f"❌ Murf WebSocket pool warm-up error: {e}")
+
+    generation = previous.generation + 1 if previous else 1
+    logger.info(f"🧩 Service registry generation {generation} built")
+    return ServiceRegistry(
+        config=config,
+        generation=generation,
+        stt=stt,
+        llm=llm,
+        tts=tts,
+        database=database,
+        assemblyai_sessions=assemblyai_sessions,
+        murf_websocket=murf_websocket,
+        email=email
+    )
+
+
+async def close_service_registry(registry: ServiceRegistry, successor: Optional[ServiceRegistry] = None,
+                                 grace_seconds: float = 0):
+    """Release the resources a registry owns that its successor does not share"""
+    if grace_seconds:
+        await asyncio.sleep(grace_seconds)
+    if registry.stt and (successor is None or successor.stt is not registry.stt):
+        registry.stt.close()
+    if registry.tts and (successor is None or successor.tts is not registry.tts):
+        registry.tts.close()
+    if registry.murf_websocket and (successor is None or successor.murf_websocket is not registry.murf_websocket):
+        await registry.murf_websocket.close()
+    if registry.database and (successor is None or successor.database is not registry.database):
+        await registry.database.close()
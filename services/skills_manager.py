@@ -1,20 +1,172 @@
 import logging
 import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from services.custom_web_search_service import custom_web_search_service as web_search_service
 from services.news_service import NewsService
 
 logger = logging.getLogger(__name__)
 
+# Phrases that always trigger a web search, wherever they appear
+SEARCH_COMMANDS = ['search for', 'search google for', 'search google', 'find information about', 'look up', 'tell me about']
+# Question openers that trigger a web search when the message starts with them
+SEARCH_QUESTION_PREFIXES = ['what is', 'who is', 'when is', 'where is', 'how to']
+# Topics that need current information
+CURRENT_INFO_TOPICS = ['news', 'weather', 'stock', 'price', 'recent', 'latest', 'current', 'today', 'now']
+# Phrases stripped from the front of a search query, in priority order
+SEARCH_QUERY_PHRASES = [
+    'search for', 'search google for', 'search google', 'find information about', 'look up',
+    'what is', 'who is', 'when is', 'where is', 'how to',
+    'tell me about', 'information on', 'details about'
+]
+NEWS_KEYWORDS = ['news', 'headlines', 'latest news', 'current events', 'breaking news']
+# News categories in priority order, with their keywords
+NEWS_CATEGORIES = {
+    'business': ['business', 'finance', 'economy', 'market', 'stock'],
+    'technology': ['technology', 'tech', 'ai', 'artificial intelligence', 'computer'],
+    'sports': ['sports', 'football', 'basketball', 'soccer', 'baseball'],
+    'entertainment': ['entertainment', 'movie', 'music', 'celebrity', 'hollywood'],
+    'health': ['health', 'medical', 'medicine', 'covid', 'pandemic'],
+    'science': ['science', 'research', 'discovery', 'space', 'nasa']
+}
+DEVANAGARI = "[\u0900-\u097F]"
+
+
+@dataclass
+class Route:
+    """Result of routing one utterance"""
+    intent: str                      # "web_search", "news" or "chat"
+    arguments: Dict[str, str] = field(default_factory=dict)
+    script: str = "latin"            # "devanagari" when any Devanagari character is present
+    wants_web_search: bool = False
+    wants_news: bool = False
+
+    @property
+    def language(self) -> str:
+        return "hi" if self.script == "devanagari" else "en"
+
+
+def _trie_pattern(words: List[str]) -> str:
+    """Regex for a set of literals, factored as a trie so matching cost depends on
+    the longest keyword rather than how many keywords there are"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: Dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if terminal else body
+
+    return build(trie)
+
+
+class IntentRouter:
+    """Classifies an utterance in a single scan of the message.
+
+    Every keyword from every table is compiled into one trie-shaped pattern and
+    matched at each position of the lowercased message, together with the
+    Devanagari character class, so routing is linear in the message length.
+    Matching is by substring, as the original per-table checks were.
+    """
+
+    def __init__(self):
+        # keyword -> list of (table, value) tags
+        self._tags: Dict[str, List[Tuple[str, object]]] = {}
+        for word in SEARCH_COMMANDS:
+            self.add_keyword(word, "search_command")
+        for word in SEARCH_QUESTION_PREFIXES:
+            self.add_keyword(word, "search_prefix")
+        for word in CURRENT_INFO_TOPICS:
+            self.add_keyword(word, "current_topic")
+        for rank, word in enumerate(SEARCH_QUERY_PHRASES):
+            self.add_keyword(word, "query_phrase", rank)
+        for word in NEWS_KEYWORDS:
+            self.add_keyword(word, "news")
+        for rank, (category, words) in enumerate(NEWS_CATEGORIES.items()):
+            for word in words:
+                self.add_keyword(word, "news_category", (rank, category))
+        self._pattern = None
+
+    def add_keyword(self, keyword: str, table: str, value: object = None):
+        """Register a keyword; the pattern is recompiled on next use"""
+        self._tags.setdefault(keyword.lower(), []).append((table, value))
+        self._pattern = None
+
+    def _compile(self):
+        keywords = list(self._tags)
+        self._pattern = re.compile(f"(?=({_trie_pattern(keywords)}|{DEVANAGARI}))")
+        # The trie pattern reports the longest keyword at a position; expand it to
+        # every keyword that is a prefix of it (e.g. "latest news" -> "latest")
+        known = set(keywords)
+        self._expansions = {kw: [kw[:i] for i in range(1, len(kw) + 1) if kw[:i] in known] for kw in keywords}
+
+    def route(self, message: str) -> Route:
+        if self._pattern is None:
+            self._compile()
+        text = (message or "").lower()
+        script = "latin"
+        search_command = search_prefix = current_topic = news = False
+        query_phrase: Optional[Tuple[int, int, str]] = None   # (rank, position, phrase)
+        category: Optional[Tuple[int, str]] = None
+
+        for match in self._pattern.finditer(text):
+            hit = match.group(1)
+            if hit not in self._expansions:
+                script = "devanagari"
+                continue
+            pos = match.start()
+            for keyword in self._expansions[hit]:
+                for table, value in self._tags[keyword]:
+                    if table == "search_command":
+                        search_command = True
+                    elif table == "search_prefix":
+                        search_prefix = search_prefix or pos == 0
+                    elif table == "current_topic":
+                        current_topic = True
+                    elif table == "news":
+                        news = True
+                    elif table == "query_phrase":
+                        if query_phrase is None or value < query_phrase[0]:
+                            query_phrase = (value, pos, keyword)
+                    elif table == "news_category":
+                        if category is None or value[0] < category[0]:
+                            category = value
+
+        wants_web_search = search_command or search_prefix or current_topic
+        arguments = {}
+        if wants_web_search:
+            if query_phrase is not None:
+                _, pos, phrase = query_phrase
+                arguments["query"] = text[pos + len(phrase):].strip()
+            else:
+                arguments["query"] = (message or "").strip()
+        if news:
+            arguments["category"] = category[1] if category else "general"
+
+        intent = "web_search" if wants_web_search else "news" if news else "chat"
+        return Route(intent=intent, arguments=arguments, script=script,
+                     wants_web_search=wants_web_search, wants_news=news)
+
+
 class SkillsManager:
     """Manager for handling special skills in the voice agent"""
-    
+
     def __init__(self):
         self.skills = {
             "news": NewsService(os.getenv("NEWS_API_KEY")),  # Registering the news service
             "web_search": web_search_service
         }
+        self.router = IntentRouter()
         logger.info("🛠 Skills Manager initialized with available skills: news, web_search")
-    
+
     def get_skill(self, skill_name: str):
         """Retrieve a skill by name"""
         skill = self.skills.get(skill_name)
@@ -24,10 +176,23 @@ class SkillsManager:
         else:
             logger.warning(f"Skill not found: {skill_name}")
             return None
-    
+
     def list_skills(self):
         """List all available skills"""
         return list(self.skills.keys())
 
+    def route(self, message: str) -> Route:
+        """Classify a user message: intent, extracted arguments and detected script"""
+        return self.router.route(message)
+
+    async def start(self):
+        """Start background work of skills that keep warm caches"""
+        await self.skills["news"].start()
+
+    async def close(self):
+        """Stop background work and release HTTP clients"""
+        await self.skills["news"].close()
+        await self.skills["web_search"].close()
+
 # Singleton instance for easy access
 skills_manager = SkillsManager()
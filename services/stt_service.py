@@ -1,44 +1,49 @@
 import assemblyai as aai
-import tempfile
+import asyncio
+import io
 import os
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 class STTService:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_workers: Optional[int] = None):
         self.api_key = api_key
         aai.settings.api_key = api_key
         self.transcriber = aai.Transcriber()
-    
-    async def transcribe_audio(self, audio_content: bytes) -> Optional[str]:
-        tmp_path = None
+        # Upload + polling is blocking; run it on a bounded pool so the event loop never waits on it
+        self.max_workers = max_workers or int(os.getenv("STT_MAX_WORKERS", "4"))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stt")
+
+    async def transcribe_audio(self, audio: Union[bytes, BinaryIO]) -> Optional[str]:
+        """Transcribe raw bytes or a file-like object (e.g. UploadFile.file) without writing temp files"""
         try:
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-                tmp.write(audio_content)
-                tmp_path = tmp.name
-            
-            transcript = self.transcriber.transcribe(tmp_path)
-            
+            if isinstance(audio, (bytes, bytearray)):
+                audio = io.BytesIO(audio)
+            else:
+                audio.seek(0)
+
+            loop = asyncio.get_running_loop()
+            transcript = await loop.run_in_executor(self._executor, self.transcriber.transcribe, audio)
+
             if transcript.status == aai.TranscriptStatus.error:
                 raise Exception(f"AssemblyAI transcription error: {transcript.error}")
-            
+
             if not transcript.text or transcript.text.strip() == "":
                 logger.warning("No speech detected in audio")
                 return None
-            
+
             transcribed_text = transcript.text.strip()
             logger.info(f"Successfully transcribed: {transcribed_text[:100]}...")
             return transcribed_text
-            
+
         except Exception as e:
             logger.error(f"STT transcription error: {str(e)}")
             raise
-        finally:
-            if tmp_path:
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    logger.warning(f"Failed to delete temporary file: {tmp_path}")
+
+    def close(self):
+        """Stop accepting work; in-flight transcriptions finish in the background"""
+        self._executor.shutdown(wait=False)
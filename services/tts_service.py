@@ -1,20 +1,43 @@
 from murf import Murf
-from typing import Optional
+from functools import partial
+from typing import Dict, Optional
+import aiohttp
+import asyncio
+import hashlib
 import logging
+import os
+from utils.audio_cache import AudioCache, shared_audio_cache
+from utils.constants import FALLBACK_MESSAGES
 
 logger = logging.getLogger(__name__)
 
+# Pre-synthesized fallback messages live under the /static mount
+FALLBACK_AUDIO_DIR = os.path.join("static", "fallback_audio")
+FALLBACK_AUDIO_URL = "/static/fallback_audio"
+# URL prefix the app mounts the TTS cache directory under
+TTS_CACHE_URL = "/tts-cache"
+
 
 class TTSService:
-    def __init__(self, api_key: str, voice_id: str = "en-IN-aarav"):
+    def __init__(self, api_key: str, voice_id: str = "en-IN-aarav", style: str = "Conversational",
+                 sample_rate: int = 44100):
         self.api_key = api_key
         self.voice_id = voice_id
+        # Sent with every request, so they are part of the audio cache key
+        self.style = style
+        self.sample_rate = sample_rate
         self.client = Murf(api_key=api_key)
+        # Fallback message text -> local URL of its pre-synthesized audio
+        self.fallback_audio: Dict[str, str] = {}
+        self._fallback_task: Optional[asyncio.Task] = None
+        self._load_fallback_audio()
+        self.audio_cache = shared_audio_cache()
+        self._cache_writes = set()
     
     def truncate_text_for_murf(self, text: str, max_chars: int = 3000) -> str:
         if len(text) <= max_chars:
             return text
-            
+        
         truncated = text[:max_chars]
         last_sentence_end = max(
             truncated.rfind('.'),
@@ -32,30 +55,109 @@ class TTSService:
                 return truncated + "..."
     
     async def generate_speech(self, text: str, format: str = "MP3") -> Optional[str]:
+        """URL of speech for text: a local cache URL on a hit, otherwise Murf's URL
+        (the audio is then downloaded into the cache in the background)"""
+        murf_text = self.truncate_text_for_murf(text)
+        cache_key = AudioCache.key(self.voice_id, self.style, format, self.sample_rate, murf_text)
+        # Cache lookups touch the disk; keep them off the event loop
+        cached = await asyncio.get_running_loop().run_in_executor(None, self.audio_cache.lookup, cache_key)
+        if cached:
+            logger.info("TTS audio served from cache")
+            return f"{TTS_CACHE_URL}/{cached}"
+        
+        audio_url = await self._synthesize(murf_text, format)
+        task = asyncio.create_task(self._cache_remote_audio(cache_key, format, audio_url))
+        self._cache_writes.add(task)
+        task.add_done_callback(self._cache_writes.discard)
+        return audio_url
+    
+    async def _cache_remote_audio(self, cache_key: str, format: str, audio_url: str):
         try:
-            murf_text = self.truncate_text_for_murf(text)
-            
-            murf_response = self.client.text_to_speech.generate(
+            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+                async with session.get(audio_url) as response:
+                    response.raise_for_status()
+                    audio = await response.read()
+            await asyncio.get_running_loop().run_in_executor(None, self.audio_cache.put, cache_key, format, audio)
+        except Exception as e:
+            logger.warning(f"Could not cache TTS audio: {str(e)}")
+    
+    async def _synthesize(self, murf_text: str, format: str = "MP3") -> str:
+        try:
+            # The Murf SDK call is blocking; keep it off the event loop
+            murf_response = await asyncio.get_running_loop().run_in_executor(None, partial(
+                self.client.text_to_speech.generate,
                 text=murf_text,
                 voice_id=self.voice_id,
+                style=self.style,
+                sample_rate=self.sample_rate,
                 format=format
-            )
+            ))
             
             audio_url = murf_response.audio_file
             
             if not audio_url:
                 raise Exception("No audio URL returned from Murf API")
-                
+            
             logger.info("TTS audio generated successfully")
             return audio_url
-            
+        
         except Exception as e:
             logger.error(f"TTS generation error: {str(e)}")
             raise
     
+    def _fallback_filename(self, text: str) -> str:
+        # Keyed by voice and text so a changed message or voice gets fresh audio
+        digest = hashlib.sha1(text.encode("utf-8")).hexdigest()[:12]
+        return f"{self.voice_id}_{digest}.mp3"
+    
+    def _load_fallback_audio(self):
+        """Index fallback audio already synthesized by an earlier run or at build time"""
+        for text in FALLBACK_MESSAGES.values():
+            filename = self._fallback_filename(text)
+            if os.path.exists(os.path.join(FALLBACK_AUDIO_DIR, filename)):
+                self.fallback_audio[text] = f"{FALLBACK_AUDIO_URL}/{filename}"
+    
+    async def prepare_fallback_audio(self) -> int:
+        """Synthesize any missing fallback messages for this voice and store them locally"""
+        missing = [text for text in FALLBACK_MESSAGES.values() if text not in self.fallback_audio]
+        if not missing:
+            return 0
+        os.makedirs(FALLBACK_AUDIO_DIR, exist_ok=True)
+        prepared = 0
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=30)) as session:
+            for text in missing:
+                try:
+                    audio_url = await self._synthesize(self.truncate_text_for_murf(text))
+                    async with session.get(audio_url) as response:
+                        response.raise_for_status()
+                        audio = await response.read()
+                    filename = self._fallback_filename(text)
+                    path = os.path.join(FALLBACK_AUDIO_DIR, filename)
+                    with open(path + ".tmp", "wb") as f:
+                        f.write(audio)
+                    os.replace(path + ".tmp", path)
+                    self.fallback_audio[text] = f"{FALLBACK_AUDIO_URL}/{filename}"
+                    prepared += 1
+                except Exception as e:
+                    logger.error(f"Failed to pre-synthesize fallback audio: {str(e)}")
+        logger.info(f"🔊 Fallback audio ready for {len(self.fallback_audio)}/{len(FALLBACK_MESSAGES)} messages")
+        return prepared
+    
+    def start_fallback_preparation(self):
+        """Prepare missing fallback audio in the background so startup isn't delayed"""
+        if self._fallback_task is None or self._fallback_task.done():
+            self._fallback_task = asyncio.create_task(self.prepare_fallback_audio())
+    
+    def close(self):
+        if self._fallback_task and not self._fallback_task.done():
+            self._fallback_task.cancel()
+    
     async def generate_fallback_audio(self, error_message: str) -> Optional[str]:
-        try:
-            return await self.generate_speech(error_message)
-        except Exception as e:
-            logger.error(f"Failed to generate fallback audio: {str(e)}")
-            return None
+        """Local URL of the pre-synthesized audio for a fallback message.
+
+        Never calls Murf: error paths must not depend on the TTS provider.
+        """
+        audio_url = self.fallback_audio.get(error_message)
+        if audio_url is None:
+            logger.warning("No pre-synthesized fallback audio for this message")
+        return audio_url
@@ -164,7 +164,7 @@ document.addEventListener("DOMContentLoaded", function () {
         return;
       }
       const _headers = { 'Authorization': 'Bearer ' + _token };
-      const response = await fetch(`/agent/chat/all`, { headers: _headers });
+      const response = await fetch(`/agent/chat/all?limit=50`, { headers: _headers });
       const data = await response.json();
       if (data.success && data.chat_histories.length > 0) {
         displayConversationList(data.chat_histories);
@@ -195,16 +195,17 @@ document.addEventListener("DOMContentLoaded", function () {
 
       // First line: message
       const messageDiv = document.createElement("div");
-      messageDiv.textContent = conversation.messages && conversation.messages.length > 0 
-        ? conversation.messages[0].content 
-        : "Empty conversation";
+      messageDiv.textContent = conversation.preview
+        || (conversation.messages && conversation.messages.length > 0 ? conversation.messages[0].content : "")
+        || "Empty conversation";
 
       // Second line: last updated
       const updatedDiv = document.createElement("div");
       updatedDiv.style.fontSize = "12px";
       updatedDiv.style.color = "#666";
-      updatedDiv.textContent = conversation.last_updated
-        ? new Date(conversation.last_updated).toLocaleString()
+      const lastActive = conversation.last_activity || conversation.last_updated;
+      updatedDiv.textContent = lastActive
+        ? new Date(lastActive).toLocaleString()
         : "N/A";
 
       // Append both lines
@@ -597,9 +598,11 @@ document.addEventListener("DOMContentLoaded", function () {
   // Attach access token to WebSocket query string when available so the backend can verify/attribute messages
   const _token = localStorage.getItem('access_token');
   const tokenParam = _token ? `&token=${encodeURIComponent(_token)}` : '';
-  const wsUrl = `${wsProtocol}//${wsHost}/ws/audio-stream?session_id=${sessionId}${tokenParam}`;
+  // Ask for TTS audio as binary frames instead of base64 inside JSON
+  const wsUrl = `${wsProtocol}//${wsHost}/ws/audio-stream?session_id=${sessionId}${tokenParam}&audio_transport=binary`;
 
   audioStreamSocket = new WebSocket(wsUrl);
+  audioStreamSocket.binaryType = "arraybuffer";
 
       audioStreamSocket.onopen = function (event) {
         updateConnectionStatus("connected", "Connected");
@@ -614,6 +617,11 @@ document.addEventListener("DOMContentLoaded", function () {
       };
 
       audioStreamSocket.onmessage = function (event) {
+        if (event.data instanceof ArrayBuffer) {
+          // Binary frames carry TTS audio only
+          handleBinaryAudioFrame(event.data);
+          return;
+        }
         try {
           const data = JSON.parse(event.data);
 
@@ -1084,6 +1092,29 @@ document.addEventListener("DOMContentLoaded", function () {
     );
   }
 
+  // Binary TTS frame: 12-byte big-endian header (uint32 turn id, uint32 chunk number,
+  // uint8 flags with bit 0 = final chunk, 3 reserved bytes) followed by the audio bytes
+  const AUDIO_FRAME_HEADER_BYTES = 12;
+  const AUDIO_FRAME_FINAL = 0x01;
+
+  function handleBinaryAudioFrame(buffer) {
+    if (buffer.byteLength < AUDIO_FRAME_HEADER_BYTES) {
+      console.warn('Ignoring truncated audio frame');
+      return;
+    }
+    const header = new DataView(buffer, 0, AUDIO_FRAME_HEADER_BYTES);
+    const chunkNumber = header.getUint32(4);
+    const isFinal = (header.getUint8(8) & AUDIO_FRAME_FINAL) !== 0;
+    const audioBytes = new Uint8Array(buffer, AUDIO_FRAME_HEADER_BYTES);
+
+    playPCMChunk(bytesToPCMFloat32(audioBytes));
+
+    updateStreamingStatus(
+      `Audio chunk ${chunkNumber} received (${audioBytes.length} bytes)${isFinal ? ' - final' : ''}`,
+      "success"
+    );
+  }
+
   function initializeAudioContext() {
     try {
       if (!audioContext) {
@@ -1099,23 +1130,30 @@ document.addEventListener("DOMContentLoaded", function () {
 
   function base64ToPCMFloat32(base64) {
     try {
-      let binary = atob(base64);
-      const offset = wavHeaderSet ? 44 : 0; // Skip WAV header if present
+      const binary = atob(base64);
+      const byteArray = new Uint8Array(binary.length);
 
-      if (wavHeaderSet) {
-        wavHeaderSet = false; // Only process header once
+      for (let i = 0; i < byteArray.length; i++) {
+        byteArray[i] = binary.charCodeAt(i);
       }
 
-      const length = binary.length - offset;
-      const buffer = new ArrayBuffer(length);
-      const byteArray = new Uint8Array(buffer);
+      return bytesToPCMFloat32(byteArray);
+    } catch (error) {
+      console.error('Error converting base64 to PCM:', error);
+      return null;
+    }
+  }
 
-      for (let i = 0; i < byteArray.length; i++) {
-        byteArray[i] = binary.charCodeAt(i + offset);
+  function bytesToPCMFloat32(bytes) {
+    try {
+      const offset = wavHeaderSet ? 44 : 0; // Skip WAV header if present
+
+      if (wavHeaderSet) {
+        wavHeaderSet = false; // Only process header once
       }
 
-      const view = new DataView(byteArray.buffer);
-      const sampleCount = byteArray.length / 2; // 16-bit samples
+      const view = new DataView(bytes.buffer, bytes.byteOffset + offset, Math.max(bytes.length - offset, 0));
+      const sampleCount = Math.floor(view.byteLength / 2); // 16-bit samples
       const float32Array = new Float32Array(sampleCount);
 
       for (let i = 0; i < sampleCount; i++) {
@@ -1125,7 +1163,7 @@ document.addEventListener("DOMContentLoaded", function () {
 
       return float32Array;
     } catch (error) {
-      console.error('Error converting base64 to PCM:', error);
+      console.error('Error converting audio bytes to PCM:', error);
       return null;
     }
   }
@@ -1168,14 +1206,16 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   function playAudioChunk(base64Audio) {
+    playPCMChunk(base64ToPCMFloat32(base64Audio));
+  }
+
+  function playPCMChunk(float32Array) {
     try {
       // Initialize audio context if not already done
       if (!initializeAudioContext()) {
         return;
       }
 
-      // Convert base64 to PCM data
-      const float32Array = base64ToPCMFloat32(base64Audio);
       if (!float32Array || float32Array.length === 0) {
         return;
       }
@@ -1191,7 +1231,7 @@ document.addEventListener("DOMContentLoaded", function () {
         });
       }
     } catch (error) {
-      console.error('Error in playAudioChunk:', error);
+      console.error('Error in playPCMChunk:', error);
     }
   }
 
@@ -0,0 +1,74 @@
+"""Check that /agent/chat/all pagination reaches legacy sessions.
+
+Older chat_sessions documents may lack last_activity or store it as a string.
+This seeds a throwaway database with such documents placed on a page boundary,
+connects (which backfills last_activity) and pages through the listing two
+sessions at a time; every session must be listed exactly once.
+
+Runs against MONGODB_URL in a throwaway database that is dropped afterwards.
+
+Usage: MONGODB_URL=... python test_session_pagination.py
+"""
+import asyncio
+import sys
+import logging
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from services.database_service import DatabaseService
+
+logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(name)s - %(message)s')
+
+TEST_DB = "voiceAssistance_pagination_test"
+PAGE_SIZE = 2
+
+
+async def seed(db: DatabaseService):
+    now = datetime.now()
+    await db.db.chat_sessions.insert_many([
+        {"session_id": "s_recent", "last_activity": now, "message_count": 2},
+        # Ends the first page: the next cursor is built from a legacy document
+        {"session_id": "s_legacy_missing", "created_at": now - timedelta(minutes=5), "message_count": 4},
+        {"session_id": "s_older", "last_activity": now - timedelta(hours=1), "message_count": 2},
+        {"session_id": "s_legacy_string", "last_activity": (now - timedelta(days=1)).isoformat(), "message_count": 6},
+        {"session_id": "s_legacy_bare", "message_count": 1},
+    ])
+
+
+async def test_session_pagination():
+    load_dotenv()
+    db = DatabaseService()
+    db.db_name = TEST_DB
+    if not await db.connect():
+        print("❌ Could not connect to MongoDB (check MONGODB_URL)")
+        return False
+    try:
+        await db.db.chat_sessions.delete_many({})
+        await seed(db)
+        # Backfill runs during connect(); run it again now that the legacy documents exist
+        await db._backfill_last_activity()
+
+        listed, cursor, pages = [], None, 0
+        while True:
+            page, cursor = await db.list_chat_sessions(limit=PAGE_SIZE, cursor=cursor)
+            listed.extend(s["session_id"] for s in page)
+            pages += 1
+            if not cursor or pages > 10:
+                break
+
+        expected = ["s_recent", "s_legacy_missing", "s_older", "s_legacy_string", "s_legacy_bare"]
+        if listed != expected:
+            print(f"❌ Listed {listed}, expected {expected}")
+            return False
+        print(f"✅ Listed all {len(listed)} sessions over {pages} pages")
+        return True
+    except Exception as e:
+        print(f"❌ Unexpected error: {type(e).__name__}: {e}")
+        return False
+    finally:
+        await db.client.drop_database(TEST_DB)
+        await db.close()
+
+
+if __name__ == "__main__":
+    success = asyncio.run(test_session_pagination())
+    sys.exit(0 if success else 1)
@@ -0,0 +1,329 @@
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import wave
+from utils.audio_recorder import (
+    STREAMED_AUDIO_DIR, STREAM_SAMPLE_RATE, STREAM_CHANNELS, STREAM_SAMPLE_WIDTH,
+    WavRecorder, start_stream_recording
+)
+from utils.segment_store import Recording, SegmentStore
+
+logger = logging.getLogger(__name__)
+
+STREAMED_AUDIO_MAX_AGE_DAYS = float(os.getenv("STREAMED_AUDIO_MAX_AGE_DAYS", "30"))
+STREAMED_AUDIO_MAX_BYTES = int(os.getenv("STREAMED_AUDIO_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Loose recordings older than this are gzipped (.wav.gz)
+STREAMED_AUDIO_COMPACT_AFTER_HOURS = float(os.getenv("STREAMED_AUDIO_COMPACT_AFTER_HOURS", "24"))
+STREAMED_AUDIO_MAINTENANCE_INTERVAL = float(os.getenv("STREAMED_AUDIO_MAINTENANCE_INTERVAL", "600"))
+# Store new recordings in segment files (servable by range); false keeps one file per recording
+AUDIO_SEGMENT_STORE = os.getenv("AUDIO_SEGMENT_STORE", "true").lower() == "true"
+
+MANIFEST_FILENAME = "manifest.jsonl"
+_RECORDING_NAME = re.compile(r"^streamed_audio_(.+)_(\d{8}_\d{6})\.wav(\.gz)?$")
+_WAV_HEADER_BYTES = 44
+
+
+def read_pcm(path: str) -> Tuple[bytes, int, int, int]:
+    """PCM and format of a recording: WAV, or headerless raw stream audio"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] == b"RIFF":
+        with wave.open(path, "rb") as wav:
+            return (wav.readframes(wav.getnframes()), wav.getframerate(),
+                    wav.getnchannels(), wav.getsampwidth())
+    # Recordings made before WAV headers were written
+    return data, STREAM_SAMPLE_RATE, STREAM_CHANNELS, STREAM_SAMPLE_WIDTH
+
+
+def gzip_wav(path: str) -> bytes:
+    """A recording as a gzipped WAV file, adding the header raw stream audio lacks.
+
+    Plain gzip so any tool can restore a playable file (``gunzip``).
+    """
+    pcm, sample_rate, channels, sample_width = read_pcm(path)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return gzip.compress(buffer.getvalue(), 6)
+
+
+class AudioArchive:
+    """Keeps the streamed audio directory within an age and size quota.
+
+    Every finished recording is appended to a manifest (one JSON line with
+    file, session, start time, duration and bytes), so maintenance works from
+    the manifest instead of listing and stat-ing the directory. Maintenance runs
+    in a background task: it deletes recordings older than ``max_age_days``,
+    gzips those older than ``compact_after_hours`` (``.wav.gz``, lossless) and
+    then deletes the oldest recordings until the archive fits in ``max_bytes``.
+
+    Without a manifest (first run, or after deleting it) the directory is
+    scanned once to build one.
+
+    With the segment store enabled, recordings are written to ``incoming/``
+    and moved into a SegmentStore under ``segments/`` when they finish; the
+    manifest then only tracks older loose files, so compaction only applies to
+    those. Segments are kept uncompressed so recordings can be served straight
+    from them by range, and retention removes whole sealed segments. Loose files
+    and segments share one size quota.
+    """
+
+    def __init__(self, directory: str = STREAMED_AUDIO_DIR,
+                 max_age_days: float = STREAMED_AUDIO_MAX_AGE_DAYS,
+                 max_bytes: int = STREAMED_AUDIO_MAX_BYTES,
+                 compact_after_hours: float = STREAMED_AUDIO_COMPACT_AFTER_HOURS,
+                 interval: float = STREAMED_AUDIO_MAINTENANCE_INTERVAL):
+        self.directory = directory
+        self.max_age_seconds = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.compact_after_seconds = compact_after_hours * 3600
+        self.interval = interval
+        self.manifest_path = os.path.join(directory, MANIFEST_FILENAME)
+        self.incoming_dir = os.path.join(directory, "incoming")
+        self.segments: Optional[SegmentStore] = None
+        self._entries: List[Dict] = []   # oldest first
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._task: Optional[asyncio.Task] = None
+        self.deleted = 0
+        self.deleted_segments = 0
+        self.compacted = 0
+        self.bytes_reclaimed = 0
+
+    def start_recording(self, session_id: str) -> Optional[WavRecorder]:
+        """Recorder for a session's stream that adds itself to the manifest when done"""
+        if self.segments:
+            recorder = start_stream_recording(session_id, self.incoming_dir)
+            if recorder:
+                recorder.on_complete = lambda r: self._archive_segment(session_id, r.path, r.started_at)
+            return recorder
+        recorder = start_stream_recording(session_id)
+        if recorder:
+            recorder.on_complete = lambda r: self.add(r.filename, session_id, r.started_at, r.duration, r.file_size)
+        return recorder
+
+    def _archive_segment(self, session_id: str, path: str, started_at: float):
+        try:
+            self.segments.append(session_id, path, started_at)
+        except Exception as e:
+            # Left in incoming/ and retried on the next start
+            logger.error(f"Could not move {path} into the segment store: {e}")
+
+    def _open_segments(self):
+        self.segments = SegmentStore(os.path.join(self.directory, "segments"))
+        # Recordings a previous run finished writing but never archived
+        if os.path.isdir(self.incoming_dir):
+            for filename in sorted(os.listdir(self.incoming_dir)):
+                match = _RECORDING_NAME.match(filename)
+                if match:
+                    started_at = time.mktime(time.strptime(match.group(2), "%Y%m%d_%H%M%S"))
+                    self._archive_segment(match.group(1), os.path.join(self.incoming_dir, filename), started_at)
+
+    def session_recordings(self, session_id: str) -> List[Recording]:
+        """A session's archived recordings, oldest first"""
+        return self.segments.lookup(session_id) if self.segments else []
+
+    def recording_path(self, recording: Recording) -> str:
+        return self.segments.segment_path(recording.segment)
+
+    def add(self, filename: str, session_id: str, started_at: float, duration: float, size: int):
+        """Record a finished recording; called from recorder threads"""
+        entry = {"file": filename, "session_id": session_id, "started_at": started_at,
+                 "duration": round(duration, 3), "bytes": size}
+        with self._lock:
+            self._entries.append(entry)
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.manifest_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry) + "\n")
+            except OSError as e:
+                logger.error(f"Could not update audio manifest: {e}")
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry["bytes"] for entry in self._entries)
+
+    def _load(self):
+        if os.path.exists(self.manifest_path):
+            entries = []
+            with open(self.manifest_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn final line after a crash
+        else:
+            entries = self._scan()
+        with self._lock:
+            # Recordings that finished while loading are already in _entries, and may also
+            # have been appended to the manifest or found by the scan; keep one entry per file
+            merged = {entry["file"]: entry for entry in entries + self._entries}
+            self._entries = sorted(merged.values(), key=lambda e: e["started_at"])
+            self._write_manifest()
+        self._loaded = True
+        logger.info(f"🗄 Audio archive: {len(self._entries)} recordings, {self.total_bytes} bytes")
+
+    def _scan(self) -> List[Dict]:
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for filename in os.listdir(self.directory):
+            match = _RECORDING_NAME.match(filename)
+            if not match:
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            started_at = time.mktime(time.strptime(match.group(2), "%Y%m%d_%H%M%S"))
+            pcm_bytes = stat.st_size
+            if match.group(3):
+                # gzip ends with the uncompressed size (mod 2**32, far above any recording)
+                with open(path, "rb") as f:
+                    f.seek(-4, os.SEEK_END)
+                    pcm_bytes = struct.unpack("<I", f.read(4))[0] - _WAV_HEADER_BYTES
+            entries.append({"file": filename, "session_id": match.group(1), "started_at": started_at,
+                            "duration": round(pcm_bytes / (STREAM_SAMPLE_RATE * STREAM_CHANNELS * STREAM_SAMPLE_WIDTH), 3),
+                            "bytes": stat.st_size})
+        return entries
+
+    def _write_manifest(self):
+        # Caller holds _lock
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in self._entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp, self.manifest_path)
+
+    def _delete(self, entry: Dict):
+        try:
+            os.remove(os.path.join(self.directory, entry["file"]))
+        except FileNotFoundError:
+            pass
+        self.deleted += 1
+        self.bytes_reclaimed += entry["bytes"]
+
+    def _compact(self, entry: Dict) -> Optional[Dict]:
+        path = os.path.join(self.directory, entry["file"])
+        try:
+            data = gzip_wav(path)
+            filename = entry["file"] + ".gz"
+            target = os.path.join(self.directory, filename)
+            with open(target + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(target + ".tmp", target)
+            os.remove(path)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Could not compact {entry['file']}: {e}")
+            return entry
+        self.compacted += 1
+        self.bytes_reclaimed += entry["bytes"] - len(data)
+        return dict(entry, file=filename, bytes=len(data))
+
+    def maintain(self, now: Optional[float] = None):
+        """One maintenance pass; blocking, so run it off the event loop"""
+        if not self._loaded:
+            self._load()
+        now = now or time.time()
+        segments_deleted = self.deleted_segments
+        with self._lock:
+            entries = list(self._entries)
+
+        kept = []
+        for entry in entries:
+            age = now - entry["started_at"]
+            if age > self.max_age_seconds:
+                self._delete(entry)
+                continue
+            if age > self.compact_after_seconds and entry["file"].endswith(".wav"):
+                entry = self._compact(entry)
+                if entry is None:
+                    continue
+            kept.append(entry)
+
+        sealed = []
+        if self.segments:
+            for segment, size, mtime in self.segments.sealed_segments():
+                if now - mtime > self.max_age_seconds:
+                    self._delete_segment(segment)
+                else:
+                    sealed.append((segment, size, mtime))
+
+        # Quota: drop whichever is older, the oldest loose file or the oldest sealed segment
+        total = sum(entry["bytes"] for entry in kept) + (self.segments.total_bytes if self.segments else 0)
+        while total > self.max_bytes and (kept or sealed):
+            if sealed and (not kept or sealed[0][2] <= kept[0]["started_at"]):
+                total -= self._delete_segment(sealed.pop(0)[0])
+            else:
+                oldest = kept.pop(0)
+                self._delete(oldest)
+                total -= oldest["bytes"]
+
+        with self._lock:
+            # Keep recordings added while this pass ran
+            self._entries = kept + self._entries[len(entries):]
+            self._write_manifest()
+        if self.segments:
+            # Purge records of deleted segments right away; otherwise merge once the journal is large
+            self.segments.merge_journal(force=self.deleted_segments > segments_deleted)
+
+    def _delete_segment(self, segment: int) -> int:
+        freed = self.segments.delete_segment(segment)
+        self.deleted_segments += 1
+        self.bytes_reclaimed += freed
+        return freed
+
+    async def _maintenance_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await loop.run_in_executor(None, self.maintain)
+            except Exception as e:
+                logger.error(f"Audio archive maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self):
+        if AUDIO_SEGMENT_STORE and self.segments is None:
+            await asyncio.get_running_loop().run_in_executor(None, self._open_segments)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        logger.info(f"🗄 Audio archive stats: {self.stats()}")
+
+    def stats(self) -> Dict:
+        return {
+            "recordings": len(self._entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "deleted": self.deleted,
+            "deleted_segments": self.deleted_segments,
+            "compacted": self.compacted,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "segment_store": self.segments.stats() if self.segments else None
+        }
+
+
+# Singleton instance for easy access
+audio_archive = AudioArchive()
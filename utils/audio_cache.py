@@ -0,0 +1,167 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import struct
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "tts_cache")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def normalize_tts_text(text: str) -> str:
+    """Text as it matters for synthesis: NFC, trimmed, whitespace runs collapsed"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+class AudioCache:
+    """Content-addressed store of synthesized audio on local disk.
+
+    Files are named by a hash of everything that determines the audio (voice,
+    style, format, sample rate and normalized text). An in-memory index keeps
+    them in LRU order and the least recently used files are deleted once the
+    directory exceeds ``max_bytes``. The index is rebuilt from the directory on
+    startup, ordered by modification time, which hits refresh.
+
+    Every method except ``key`` and ``stats`` touches the disk; async callers run
+    them in an executor. The index is guarded by a lock for that reason.
+    """
+
+    def __init__(self, directory: str = TTS_CACHE_DIR, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()  # key -> (filename, size)
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(voice_id: str, style: str, audio_format: str, sample_rate, text: str) -> str:
+        material = "\x1f".join([voice_id or "", style or "", (audio_format or "").upper(),
+                                str(sample_rate or ""), normalize_tts_text(text)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _load_index(self):
+        entries = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".tmp"):
+                continue
+            path = os.path.join(self.directory, filename)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, filename, stat.st_size))
+        for _, filename, size in sorted(entries):
+            self._index[filename.split(".", 1)[0]] = (filename, size)
+            self.bytes_used += size
+        self._evict()
+        if self._index:
+            logger.info(f"🗂 TTS cache loaded: {len(self._index)} entries, {self.bytes_used} bytes")
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Filename for a cached key (marking it recently used), or None"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            filename = entry[0]
+            path = os.path.join(self.directory, filename)
+            try:
+                os.utime(path)
+            except OSError:
+                # Deleted behind our back
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return filename
+
+    def read(self, key: str) -> Optional[bytes]:
+        filename = self.lookup(key)
+        if filename is None:
+            return None
+        try:
+            with open(os.path.join(self.directory, filename), "rb") as f:
+                return f.read()
+        except OSError:
+            with self._lock:
+                self._drop(key)
+            return None
+
+    def put(self, key: str, extension: str, data: bytes) -> str:
+        """Store audio for a key; written to a temp file and renamed so readers never see partial files"""
+        filename = f"{key}.{extension.lower()}"
+        path = os.path.join(self.directory, filename)
+        # Per-thread temp name: two turns may cache the same text at once
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._drop(key)
+            self._index[key] = (filename, len(data))
+            self.bytes_used += len(data)
+            self._evict()
+        return filename
+
+    # Streamed audio is stored as its sequence of chunks: 4-byte big-endian length + bytes
+    def read_chunks(self, key: str) -> Optional[List[bytes]]:
+        data = self.read(key)
+        if data is None:
+            return None
+        chunks, offset = [], 0
+        while offset + 4 <= len(data):
+            (length,) = struct.unpack_from(">I", data, offset)
+            offset += 4
+            chunks.append(data[offset:offset + length])
+            offset += length
+        return chunks
+
+    def put_chunks(self, key: str, chunks: List[bytes]) -> str:
+        return self.put(key, "chunks", b"".join(struct.pack(">I", len(c)) + c for c in chunks))
+
+    def _drop(self, key: str):
+        entry = self._index.pop(key, None)
+        if entry:
+            self.bytes_used -= entry[1]
+
+    def _evict(self):
+        while self.bytes_used > self.max_bytes and self._index:
+            key, (filename, size) = self._index.popitem(last=False)
+            self.bytes_used -= size
+            self.evictions += 1
+            try:
+                os.remove(os.path.join(self.directory, filename))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._index),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
+
+
+_shared_cache: Optional[AudioCache] = None
+
+
+def shared_audio_cache() -> AudioCache:
+    """Process-wide cache so the REST and WebSocket paths share one index"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = AudioCache()
+    return _shared_cache
@@ -0,0 +1,149 @@
+from datetime import datetime
+from typing import Callable, Optional
+import logging
+import os
+import queue
+import threading
+import time
+import wave
+
+logger = logging.getLogger(__name__)
+
+# Set RECORD_STREAMED_AUDIO=false to stop archiving microphone streams
+RECORD_STREAMED_AUDIO = os.getenv("RECORD_STREAMED_AUDIO", "true").lower() == "true"
+STREAMED_AUDIO_DIR = os.getenv("STREAMED_AUDIO_DIR", "streamed_audio")
+# Chunks waiting for the writer thread; beyond this, chunks are dropped rather than stalling ingest
+RECORDER_QUEUE_CHUNKS = int(os.getenv("RECORDER_QUEUE_CHUNKS", "512"))
+RECORDER_WRITE_BLOCK_BYTES = 256 * 1024
+
+# Format the browser client streams: 16 kHz mono 16-bit little-endian PCM
+STREAM_SAMPLE_RATE = 16000
+STREAM_CHANNELS = 1
+STREAM_SAMPLE_WIDTH = 2
+
+
+class WavRecorder:
+    """Records one audio stream to a WAV file without touching disk on the event loop.
+
+    ``write`` only puts the chunk on a bounded queue. A background thread joins
+    queued chunks into large blocks and writes them; the WAV header is patched
+    with the final length when the recording is closed. Recordings that received
+    no audio leave no file behind; for the others ``on_complete`` is called from
+    the writer thread once the file is final.
+    """
+
+    def __init__(self, path: str, sample_rate: int = STREAM_SAMPLE_RATE,
+                 channels: int = STREAM_CHANNELS, sample_width: int = STREAM_SAMPLE_WIDTH,
+                 max_queue: int = RECORDER_QUEUE_CHUNKS):
+        self.path = path
+        self.filename = os.path.basename(path)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.started_at = time.time()
+        self.bytes_written = 0
+        self.file_size = 0
+        self.dropped_chunks = 0
+        self.failed = False
+        self.on_complete: Optional[Callable[["WavRecorder"], None]] = None
+        self._queue: "queue.Queue[Optional[bytes]]" = queue.Queue(maxsize=max_queue)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f"recorder-{self.filename}", daemon=True)
+        self._thread.start()
+
+    @property
+    def duration(self) -> float:
+        return self.bytes_written / (self.sample_rate * self.channels * self.sample_width)
+
+    def write(self, chunk: bytes) -> bool:
+        """Queue a chunk for writing; False if it was dropped"""
+        if self._closed or self.failed:
+            return False
+        try:
+            self._queue.put_nowait(chunk)
+            return True
+        except queue.Full:
+            self.dropped_chunks += 1
+            return False
+
+    def close(self):
+        """Finish the recording; the writer thread drains the queue and patches the header"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # the writer notices _closed once it has drained the queue
+
+    def join(self, timeout: Optional[float] = None):
+        self._thread.join(timeout)
+
+    def _next_block(self) -> Optional[bytes]:
+        """Wait for at least one chunk and join it with whatever else is queued; None at the end"""
+        while True:
+            try:
+                chunk = self._queue.get(timeout=0.5)
+                break
+            except queue.Empty:
+                if self._closed:
+                    return None
+        if chunk is None:
+            return None
+        block = [chunk]
+        size = len(chunk)
+        while size < RECORDER_WRITE_BLOCK_BYTES:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                self._queue.put_nowait(None)  # end after this block
+                break
+            block.append(chunk)
+            size += len(chunk)
+        return b"".join(block)
+
+    def _run(self):
+        f = wav = None
+        try:
+            block = self._next_block()
+            if block is None:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            f = open(self.path, "wb", buffering=RECORDER_WRITE_BLOCK_BYTES)
+            wav = wave.open(f, "wb")
+            wav.setnchannels(self.channels)
+            wav.setsampwidth(self.sample_width)
+            wav.setframerate(self.sample_rate)
+            while block is not None:
+                wav.writeframesraw(block)
+                self.bytes_written += len(block)
+                block = self._next_block()
+        except Exception as e:
+            self.failed = True
+            logger.error(f"Audio recording to {self.path} failed: {e}")
+        finally:
+            try:
+                if wav is not None:
+                    wav.close()  # patches the RIFF and data lengths
+                if f is not None:
+                    f.close()
+                    self.file_size = os.path.getsize(self.path)
+            except Exception as e:
+                logger.error(f"Could not finalize recording {self.path}: {e}")
+            if f is not None and self.on_complete:
+                try:
+                    self.on_complete(self)
+                except Exception as e:
+                    logger.error(f"Recording completion callback failed: {e}")
+            if self.dropped_chunks:
+                logger.warning(f"⚠️ Recording {self.filename} dropped {self.dropped_chunks} chunks (writer behind)")
+
+
+def start_stream_recording(session_id: str, directory: str = STREAMED_AUDIO_DIR) -> Optional[WavRecorder]:
+    """Recorder for a session's microphone stream, or None when recording is disabled"""
+    if not RECORD_STREAMED_AUDIO:
+        return None
+    filename = f"streamed_audio_{session_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.wav"
+    return WavRecorder(os.path.join(directory, filename))
@@ -0,0 +1,50 @@
+from typing import Callable, List, Optional
+import asyncio
+
+# Characters that end a sentence (including the Devanagari danda), or a line
+SENTENCE_ENDINGS = (".", "!", "?", "।", "\n")
+
+
+class ChunkCoalescer:
+    """Batches streamed text chunks into fewer, larger messages.
+
+    Buffered text is emitted when ``window`` seconds have passed since the first
+    buffered chunk, when it reaches ``max_chars``, or as soon as a chunk ends a
+    sentence. Call ``flush()`` when the stream completes. ``emit`` receives the
+    batched text and the total number of characters emitted so far.
+    """
+
+    def __init__(self, emit: Callable[[str, int], None], window: float, max_chars: int):
+        self._emit = emit
+        self.window = window
+        self.max_chars = max_chars
+        self._buffer: List[str] = []
+        self._buffered_chars = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.emitted_chars = 0
+        self.chunks_in = 0
+        self.messages_out = 0
+
+    def add(self, text: str):
+        if not text:
+            return
+        self.chunks_in += 1
+        self._buffer.append(text)
+        self._buffered_chars += len(text)
+        if self._buffered_chars >= self.max_chars or text.rstrip(" ").endswith(SENTENCE_ENDINGS):
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self.emitted_chars += len(text)
+        self.messages_out += 1
+        self._emit(text, self.emitted_chars)
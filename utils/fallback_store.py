@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+import sys
+import time
+
+# Approximate cost of a StoredMessage (slots object + float + role string ref)
+_RECORD_OVERHEAD_BYTES = 96
+# Approximate cost of a FallbackSession and its list
+_SESSION_OVERHEAD_BYTES = 256
+# How often (seconds) appends sweep for sessions idle past the TTL
+_EXPIRE_SWEEP_INTERVAL = 30
+
+
+class StoredMessage:
+    """One chat message; timestamps are epoch seconds to avoid a datetime per message.
+
+    ``seq`` is set once MongoDB has assigned the message a sequence number, so a
+    replay that fails midway reuses it instead of reserving a new one.
+    """
+    __slots__ = ("role", "content", "ts", "seq")
+
+    def __init__(self, role: str, content: str, ts: float, seq: Optional[int] = None):
+        self.role = role
+        self.content = content
+        self.ts = ts
+        self.seq = seq
+
+    @property
+    def size(self) -> int:
+        return sys.getsizeof(self.content) + _RECORD_OVERHEAD_BYTES
+
+    def to_dict(self) -> Dict:
+        return {"role": self.role, "content": self.content, "timestamp": datetime.fromtimestamp(self.ts)}
+
+
+class FallbackSession:
+    __slots__ = ("messages", "created_at", "last_updated", "user_id", "size")
+
+    def __init__(self, created_at: float):
+        self.messages: List[StoredMessage] = []
+        self.created_at = created_at
+        self.last_updated = created_at
+        self.user_id: Optional[str] = None
+        self.size = _SESSION_OVERHEAD_BYTES
+
+    def summary(self, session_id: str) -> Dict:
+        return {
+            "session_id": session_id,
+            "user_id": self.user_id,
+            "created_at": datetime.fromtimestamp(self.created_at),
+            "last_updated": datetime.fromtimestamp(self.last_updated),
+            "message_count": len(self.messages)
+        }
+
+
+class FallbackStore:
+    """Bounded chat storage used while MongoDB is unavailable.
+
+    Sessions are kept in LRU order and dropped when idle longer than
+    ``ttl_seconds``, when there are more than ``max_sessions`` of them, or when
+    the estimated size exceeds ``max_bytes``. A single session larger than the
+    whole budget loses its oldest messages instead.
+    """
+
+    def __init__(self, max_bytes: int, max_sessions: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, FallbackSession]" = OrderedDict()
+        self.bytes_used = 0
+        self.evictions = 0
+        self._last_sweep = time.time()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def append(self, session_id: str, role: str, content: str, ts: Optional[float] = None,
+               user_id: Optional[str] = None, created_at: Optional[float] = None, seq: Optional[int] = None):
+        now = time.time()
+        ts = ts or now
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = FallbackSession(created_at or ts)
+            self._sessions[session_id] = session
+            self.bytes_used += session.size
+        else:
+            self._sessions.move_to_end(session_id)
+        record = StoredMessage(role, content, ts, seq)
+        session.messages.append(record)
+        session.size += record.size
+        session.last_updated = ts
+        if user_id:
+            session.user_id = user_id
+        self.bytes_used += record.size
+
+        if now - self._last_sweep >= _EXPIRE_SWEEP_INTERVAL:
+            self.expire(now)
+        self._enforce_limits(session_id)
+
+    def messages(self, session_id: str) -> List[Dict]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        return [m.to_dict() for m in session.messages]
+
+    def records(self, session_id: str) -> List[StoredMessage]:
+        session = self._sessions.get(session_id)
+        return list(session.messages) if session is not None else []
+
+    def owner(self, session_id: str) -> Optional[str]:
+        session = self._sessions.get(session_id)
+        return session.user_id if session is not None else None
+
+    def sessions(self) -> Iterator[Tuple[str, FallbackSession]]:
+        """Sessions, most recently used first"""
+        return iter(reversed(list(self._sessions.items())))
+
+    def delete(self, session_id: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        self.bytes_used -= session.size
+        return True
+
+    def remove(self, session_id: str, records: List[StoredMessage]):
+        """Drop specific records of a session (e.g. once persisted elsewhere); empty sessions are deleted"""
+        session = self._sessions.get(session_id)
+        if session is None:
+            return
+        done = {id(r) for r in records}
+        kept = [m for m in session.messages if id(m) not in done]
+        freed = sum(m.size for m in session.messages if id(m) in done)
+        session.messages = kept
+        session.size -= freed
+        self.bytes_used -= freed
+        if not kept:
+            self.delete(session_id)
+
+    def expire(self, now: Optional[float] = None):
+        now = now or time.time()
+        self._last_sweep = now
+        cutoff = now - self.ttl_seconds
+        expired = [sid for sid, s in self._sessions.items() if s.last_updated < cutoff]
+        for sid in expired:
+            self.delete(sid)
+            self.evictions += 1
+
+    def _enforce_limits(self, current: str):
+        while len(self._sessions) > self.max_sessions or self.bytes_used > self.max_bytes:
+            oldest = next(iter(self._sessions))
+            if oldest != current:
+                self.delete(oldest)
+                self.evictions += 1
+                continue
+            # Only the session being written is left: shed its oldest messages
+            session = self._sessions[current]
+            if len(session.messages) <= 1:
+                break
+            dropped = session.messages.pop(0)
+            session.size -= dropped.size
+            self.bytes_used -= dropped.size
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._sessions),
+            "messages": sum(len(s.messages) for s in self._sessions.values()),
+            "bytes": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
+
+
+class BoundedDict(OrderedDict):
+    """Dict that keeps at most ``max_items`` keys, dropping the least recently set"""
+
+    def __init__(self, max_items: int):
+        super().__init__()
+        self.max_items = max_items
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        while len(self) > self.max_items:
+            self.popitem(last=False)
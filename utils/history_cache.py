@@ -0,0 +1,83 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import sys
+
+# Rough per-message overhead of the dict and its keys on top of the content string
+_MESSAGE_OVERHEAD_BYTES = 200
+
+
+def _message_bytes(message: Dict) -> int:
+    return sys.getsizeof(message.get("content", "")) + _MESSAGE_OVERHEAD_BYTES
+
+
+class SessionHistoryCache:
+    """Bounded LRU of the most recent messages of hot sessions.
+
+    Each entry holds at most ``window`` {"role", "content"} messages. The cache is
+    bounded both by number of sessions and by an estimate of the bytes it holds;
+    least recently used sessions are evicted first.
+    """
+
+    def __init__(self, window: int, max_sessions: int, max_bytes: int):
+        self.window = window
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, session_id: str) -> Optional[List[Dict]]:
+        messages = self._entries.get(session_id)
+        if messages is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        return list(messages)
+
+    def put(self, session_id: str, messages: List[Dict]):
+        self._store(session_id, [{"role": m["role"], "content": m["content"]} for m in messages[-self.window:]])
+
+    def append(self, session_id: str, role: str, content: str):
+        """Append to a cached session; sessions not in the cache are left to the next read"""
+        messages = self._entries.get(session_id)
+        if messages is None:
+            return
+        messages.append({"role": role, "content": content})
+        self._store(session_id, messages[-self.window:])
+
+    def invalidate(self, session_id: str):
+        if session_id in self._entries:
+            del self._entries[session_id]
+            self.bytes_used -= self._sizes.pop(session_id)
+
+    def _store(self, session_id: str, messages: List[Dict]):
+        self.invalidate(session_id)
+        size = sum(_message_bytes(m) for m in messages)
+        if size > self.max_bytes:
+            return
+        self._entries[session_id] = messages
+        self._sizes[session_id] = size
+        self.bytes_used += size
+        while len(self._entries) > self.max_sessions or self.bytes_used > self.max_bytes:
+            evicted, _ = self._entries.popitem(last=False)
+            self.bytes_used -= self._sizes.pop(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "sessions": len(self._entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
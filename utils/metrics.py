@@ -0,0 +1,124 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "voice_agent"
+# Seconds; covers cache hits (sub-millisecond) through slow LLM turns
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+LabelKey = Tuple[str, str, str]  # (stage, outcome, path)
+
+
+class _Series:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int):
+        self.counts = [0] * (buckets + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+
+class StageMetrics:
+    """Latency histograms per (stage, outcome, path), rendered in the Prometheus text format.
+
+    ``path`` is "rest" or "ws" for the two voice pipelines and "internal" for
+    work the services do on their own. Observations may come from worker threads.
+    Gauge collectors registered with ``register_collector`` are read at scrape
+    time, so components expose the stats they already keep without extra bookkeeping.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._series: Dict[LabelKey, _Series] = {}
+        self._lock = threading.Lock()
+        self._collectors: Dict[str, Callable[[], Optional[Dict]]] = {}
+
+    def observe(self, stage: str, seconds: float, outcome: str = "ok", path: str = "internal"):
+        key = (stage, outcome, path)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.counts[bisect_left(self.buckets, seconds)] += 1
+            series.total += seconds
+            series.count += 1
+
+    @contextmanager
+    def timer(self, stage: str, path: str = "internal") -> Iterator[Dict]:
+        """Time a block. The outcome is "error" if it raises ("cancelled" if cancelled),
+        otherwise "ok" unless the block sets ``outcome`` on the yielded dict (e.g. "cache_hit")."""
+        labels = {"outcome": "ok"}
+        start = time.perf_counter()
+        try:
+            yield labels
+        except asyncio.CancelledError:
+            labels["outcome"] = "cancelled"
+            raise
+        except BaseException:
+            labels["outcome"] = "error"
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start, labels["outcome"], path)
+
+    def register_collector(self, name: str, collect: Callable[[], Optional[Dict]]):
+        """Export the numeric values of ``collect()`` as gauges named <prefix>_<name>_<key>"""
+        self._collectors[name] = collect
+
+    def render(self) -> str:
+        lines: List[str] = []
+        histogram = f"{METRIC_PREFIX}_stage_latency_seconds"
+        lines.append(f"# HELP {histogram} Time spent per stage of a voice turn or service call")
+        lines.append(f"# TYPE {histogram} histogram")
+        with self._lock:
+            snapshot = [(key, list(s.counts), s.total, s.count) for key, s in sorted(self._series.items())]
+        for (stage, outcome, path), counts, total, count in snapshot:
+            labels = f'stage="{_escape(stage)}",outcome="{_escape(outcome)}",path="{_escape(path)}"'
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f'{histogram}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{histogram}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{histogram}_sum{{{labels}}} {total}")
+            lines.append(f"{histogram}_count{{{labels}}} {count}")
+
+        for name, collect in list(self._collectors.items()):
+            try:
+                values = collect() or {}
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {e}")
+                continue
+            for key, value in _flatten(values):
+                metric = _metric_name(f"{METRIC_PREFIX}_{name}_{key}")
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(values: Dict, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    for key, value in values.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{name}_")
+        elif isinstance(value, bool):
+            yield name, int(value)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+
+def _metric_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_:]", "_", name)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Singleton instance for easy access
+stage_metrics = StageMetrics()
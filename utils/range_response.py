@@ -0,0 +1,86 @@
+from typing import Optional, Tuple
+import asyncio
+import os
+import re
+from starlette.responses import Response
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_READ_CHUNK_BYTES = 256 * 1024
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single byte range, or None to send everything.
+
+    Multi-range and malformed headers are ignored, which RFC 9110 allows.
+    """
+    if not header:
+        return None
+    match = _BYTE_RANGE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """Serves ``length`` bytes of a file starting at ``offset``, honouring a Range header.
+
+    Uses the ASGI zero-copy send extension when the server offers it (the kernel
+    sends straight from the page cache); otherwise reads off the event loop.
+    """
+
+    def __init__(self, path: str, offset: int, length: int, range_header: Optional[str] = None,
+                 media_type: str = "application/octet-stream", headers: Optional[dict] = None):
+        span = parse_range(range_header, length)  # raises RangeNotSatisfiable
+        start, end = span if span else (0, length - 1)
+        self.path = path
+        self.offset = offset + start
+        self.count = end - start + 1 if length else 0
+        self.status_code = 206 if span else 200
+        self.media_type = media_type
+        self.background = None
+        response_headers = {"accept-ranges": "bytes", "content-length": str(self.count)}
+        if span:
+            response_headers["content-range"] = f"bytes {start}-{end}/{length}"
+        response_headers.update(headers or {})
+        self.init_headers(response_headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope.get("method") == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, self.path, "rb")
+        try:
+            if "http.response.zerocopysend" in (scope.get("extensions") or {}):
+                await send({"type": "http.response.zerocopysend", "file": f,
+                            "offset": self.offset, "count": self.count, "more_body": False})
+                return
+            position, remaining = self.offset, self.count
+            while remaining > 0:
+                chunk = await loop.run_in_executor(None, os.pread, f.fileno(),
+                                                   min(_READ_CHUNK_BYTES, remaining), position)
+                if not chunk:
+                    break
+                position += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shorter than the index claims; end the response rather than hang
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            f.close()
@@ -0,0 +1,232 @@
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Tuple
+import hashlib
+import heapq
+import logging
+import mmap
+import os
+import re
+import shutil
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_MAX_BYTES = int(os.getenv("AUDIO_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+# Journal records merged into the sorted index once there are this many
+INDEX_MERGE_RECORDS = int(os.getenv("AUDIO_INDEX_MERGE_RECORDS", "10000"))
+
+# Index record: session key, start time (ms), segment number, offset, length.
+# Big-endian with key and start time first, so byte order is (session, time) order.
+_INDEX_RECORD = struct.Struct(">16sQIQI")
+_KEY_PREFIX = 24  # key + start time
+_SEGMENT_NAME = re.compile(r"^segment_(\d{8})\.seg$")
+INDEX_FILENAME = "index.bin"
+JOURNAL_FILENAME = "index.journal"
+
+
+class Recording(NamedTuple):
+    segment: int
+    offset: int
+    length: int
+    started_at: float
+
+
+def session_key(session_id: str) -> bytes:
+    return hashlib.blake2b(session_id.encode("utf-8"), digest_size=16).digest()
+
+
+class _IndexView:
+    """Sequence of record keys over a memory-mapped sorted index, for bisect"""
+
+    def __init__(self, buf):
+        self._buf = buf
+        self._count = len(buf) // _INDEX_RECORD.size if buf is not None else 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = i * _INDEX_RECORD.size
+        return self._buf[start:start + _KEY_PREFIX]
+
+    def record(self, i: int) -> Tuple:
+        return _INDEX_RECORD.unpack_from(self._buf, i * _INDEX_RECORD.size)
+
+    def find(self, key: bytes) -> List[Tuple]:
+        """Records for a session key; raises ValueError if the mapping was closed"""
+        records = []
+        i = bisect_left(self, key + bytes(8))
+        while i < self._count and self[i][:16] == key:
+            records.append(self.record(i))
+            i += 1
+        return records
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.close()
+
+
+class SegmentStore:
+    """Append-only store of recordings in large segment files.
+
+    Each recording is appended whole to the current segment, which rolls over
+    at ``SEGMENT_MAX_BYTES``, so millions of recordings take a few hundred files
+    instead of one file (and inode) each. Every append adds a fixed-size record
+    of (session key, start time, segment, offset, length) to a journal; journal
+    records are periodically merged into ``index.bin``, which is kept sorted and
+    memory-mapped so a session's recordings are found by binary search.
+
+    Retention removes whole sealed segments, oldest first. Index records that
+    point at removed segments are skipped on lookup and dropped on the next merge.
+    """
+
+    def __init__(self, directory: str, max_segment_bytes: int = SEGMENT_MAX_BYTES):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.index_path = os.path.join(directory, INDEX_FILENAME)
+        self.journal_path = os.path.join(directory, JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        self._segments: Dict[int, int] = {}   # segment number -> size
+        for filename in os.listdir(directory):
+            match = _SEGMENT_NAME.match(filename)
+            if match:
+                self._segments[int(match.group(1))] = os.path.getsize(os.path.join(directory, filename))
+        self._current = max(self._segments, default=1)
+        self._segments.setdefault(self._current, 0)
+
+        self._journal: List[bytes] = []
+        self._journal_keys: Dict[bytes, List[bytes]] = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                data = f.read()
+            whole = len(data) - len(data) % _INDEX_RECORD.size  # ignore a torn final record
+            for start in range(0, whole, _INDEX_RECORD.size):
+                self._remember(data[start:start + _INDEX_RECORD.size])
+        self._index = _IndexView(self._map_index())
+
+    def segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment_{segment:08d}.seg")
+
+    def _map_index(self):
+        if not os.path.exists(self.index_path) or os.path.getsize(self.index_path) == 0:
+            return None
+        with open(self.index_path, "rb") as f:
+            # The mapping stays valid after the file is closed or replaced; merges close it
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _remember(self, record: bytes):
+        self._journal.append(record)
+        self._journal_keys.setdefault(record[:16], []).append(record)
+
+    def append(self, session_id: str, source_path: str, started_at: float) -> Recording:
+        """Move a finished recording file into the current segment"""
+        length = os.path.getsize(source_path)
+        with self._lock:
+            if self._segments[self._current] and self._segments[self._current] + length > self.max_segment_bytes:
+                self._current += 1
+                self._segments[self._current] = 0
+            segment = self._current
+            offset = self._segments[segment]
+            with open(source_path, "rb") as src, open(self.segment_path(segment), "ab") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            self._segments[segment] = offset + length
+            record = _INDEX_RECORD.pack(session_key(session_id), int(started_at * 1000), segment, offset, length)
+            with open(self.journal_path, "ab") as f:
+                f.write(record)
+            self._remember(record)
+        os.remove(source_path)
+        return Recording(segment, offset, length, started_at)
+
+    def lookup(self, session_id: str) -> List[Recording]:
+        """A session's recordings, oldest first"""
+        key = session_key(session_id)
+        try:
+            records = self._index.find(key)
+        except ValueError:
+            # A merge closed the mapping mid-search; it swapped in the new index first
+            records = self._index.find(key)
+        records.extend(_INDEX_RECORD.unpack(r) for r in self._journal_keys.get(key, ()))
+        segments = self._segments
+        return sorted(Recording(segment, offset, length, start_ms / 1000)
+                      for _, start_ms, segment, offset, length in records if segment in segments)
+
+    def merge_journal(self, force: bool = False) -> bool:
+        """Fold journal records into the sorted index; blocking, run it off the event loop"""
+        with self._lock:
+            pending = list(self._journal)
+        if not pending or (len(pending) < INDEX_MERGE_RECORDS and not force):
+            return False
+
+        with self._lock:
+            live = set(self._segments)
+        old = self._index
+        merged = heapq.merge(
+            (old._buf[i * _INDEX_RECORD.size:(i + 1) * _INDEX_RECORD.size] for i in range(len(old))),
+            sorted(pending)
+        )
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "wb", buffering=1024 * 1024) as f:
+            for record in merged:
+                if _INDEX_RECORD.unpack_from(record)[2] in live:
+                    f.write(record)
+        os.replace(tmp, self.index_path)
+
+        with self._lock:
+            self._index = _IndexView(self._map_index())
+            # Keep records appended while merging
+            remaining = self._journal[len(pending):]
+            self._journal, self._journal_keys = [], {}
+            for record in remaining:
+                self._remember(record)
+            with open(self.journal_path + ".tmp", "wb") as f:
+                f.write(b"".join(remaining))
+            os.replace(self.journal_path + ".tmp", self.journal_path)
+        # Release the replaced index's mapping (and the old file's disk space) now, not at GC
+        old.close()
+        return True
+
+    def sealed_segments(self) -> List[Tuple[int, int, float]]:
+        """(segment, size, last modified) of segments no longer appended to, oldest first"""
+        # Snapshot under the lock: recorder threads add segments while maintenance runs
+        with self._lock:
+            segments, current = dict(self._segments), self._current
+        sealed = []
+        for segment, size in sorted(segments.items()):
+            if segment == current:
+                continue
+            try:
+                mtime = os.path.getmtime(self.segment_path(segment))
+            except OSError:
+                mtime = 0
+            sealed.append((segment, size, mtime))
+        return sealed
+
+    def delete_segment(self, segment: int) -> int:
+        """Remove a sealed segment and every recording in it; returns the bytes freed"""
+        with self._lock:
+            if segment == self._current or segment not in self._segments:
+                return 0
+            size = self._segments.pop(segment)
+        try:
+            os.remove(self.segment_path(segment))
+        except FileNotFoundError:
+            pass
+        return size
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(self._segments.values())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            segments = len(self._segments)
+        return {
+            "segments": segments,
+            "bytes": self.total_bytes,
+            "indexed_recordings": len(self._index) + len(self._journal),
+            "journal_records": len(self._journal)
+        }
@@ -0,0 +1,27 @@
+from typing import Dict, List
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~4 chars per token for ASCII, ~2 per token for other scripts (e.g. Devanagari)"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return (ascii_chars + 3) // 4 + (other_chars + 1) // 2
+
+
+def trim_messages_to_budget(messages: List[Dict], token_budget: int) -> List[Dict]:
+    """Keep the newest messages whose combined estimated size fits in token_budget"""
+    if token_budget is None or token_budget <= 0:
+        return list(messages)
+    kept = []
+    used = 0
+    for message in reversed(messages):
+        # +4 covers the "User: " / "Assistant: " prefix and newline added when formatting
+        cost = estimate_tokens(message.get("content", "")) + 4
+        if used + cost > token_budget:
+            break
+        kept.append(message)
+        used += cost
+    kept.reverse()
+    return kept
@@ -0,0 +1,170 @@
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Union
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+Payload = Union[str, bytes]
+
+
+class OutboundMessage:
+    __slots__ = ("payload", "coalesce_key", "droppable")
+
+    def __init__(self, payload: Payload, coalesce_key: Optional[str], droppable: bool):
+        self.payload = payload
+        self.coalesce_key = coalesce_key
+        self.droppable = droppable
+
+
+class SocketOutbox:
+    """Bounded queue of outbound messages for one WebSocket, drained by its own writer task.
+
+    ``put`` never waits on the network. When the queue is over ``max_messages`` or
+    ``max_bytes``:
+
+    - a message with a ``coalesce_key`` replaces the queued message with the same
+      key (it does so whenever one is queued, full or not: only the latest matters),
+    - a ``droppable`` message is discarded,
+    - otherwise queued droppable messages are shed to make room, and if that is not
+      enough the peer is too slow to keep up and ``on_overflow`` is called.
+
+    A send that fails or takes longer than ``send_timeout`` ends the writer and
+    calls ``on_failure``.
+    """
+
+    def __init__(self, websocket, max_messages: int, max_bytes: int, send_timeout: float,
+                 on_failure: Callable, on_overflow: Callable):
+        self.websocket = websocket
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes
+        self.send_timeout = send_timeout
+        self._on_failure = on_failure
+        self._on_overflow = on_overflow
+        self._queue: Deque[OutboundMessage] = deque()
+        self._keyed: Dict[str, OutboundMessage] = {}
+        self._wakeup = asyncio.Event()
+        self.bytes_queued = 0
+        self.max_depth = 0
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.closed = False
+        self._writer = asyncio.create_task(self._run())
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, payload: Payload, coalesce_key: Optional[str] = None, droppable: bool = False) -> bool:
+        """Queue a message; False if it was dropped or the outbox is closed"""
+        if self.closed:
+            return False
+        size = len(payload)
+        if coalesce_key is not None:
+            queued = self._keyed.get(coalesce_key)
+            if queued is not None:
+                self.bytes_queued += size - len(queued.payload)
+                queued.payload = payload
+                self.coalesced += 1
+                return True
+
+        if self._is_full(size):
+            if droppable:
+                self.dropped += 1
+                return False
+            self._shed_droppable()
+            if self._is_full(size):
+                logger.warning(f"⚠️ WebSocket send queue overflow ({len(self._queue)} messages, "
+                               f"{self.bytes_queued} bytes); disconnecting slow client")
+                self.abort()
+                self._on_overflow(self.websocket)
+                return False
+
+        message = OutboundMessage(payload, coalesce_key, droppable)
+        self._queue.append(message)
+        if coalesce_key is not None:
+            self._keyed[coalesce_key] = message
+        self.bytes_queued += size
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._wakeup.set()
+        return True
+
+    def _is_full(self, incoming: int) -> bool:
+        # An empty queue always accepts one message, however large
+        return bool(self._queue) and (len(self._queue) >= self.max_messages
+                                      or self.bytes_queued + incoming > self.max_bytes)
+
+    def _shed_droppable(self):
+        kept: Deque[OutboundMessage] = deque()
+        for message in self._queue:
+            if message.droppable:
+                self._forget(message)
+                self.dropped += 1
+            else:
+                kept.append(message)
+        self._queue = kept
+
+    def _forget(self, message: OutboundMessage):
+        self.bytes_queued -= len(message.payload)
+        if message.coalesce_key is not None and self._keyed.get(message.coalesce_key) is message:
+            del self._keyed[message.coalesce_key]
+
+    async def _run(self):
+        try:
+            while True:
+                while not self._queue:
+                    if self.closed:
+                        return
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                message = self._queue.popleft()
+                self._forget(message)
+                payload = message.payload
+                if isinstance(payload, bytes):
+                    await asyncio.wait_for(self.websocket.send_bytes(payload), self.send_timeout)
+                else:
+                    await asyncio.wait_for(self.websocket.send_text(payload), self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.error(f"WebSocket send timed out after {self.send_timeout}s")
+            self._fail()
+        except Exception as e:
+            logger.error(f"Error sending WebSocket message: {e}")
+            self._fail()
+
+    def _fail(self):
+        self.closed = True
+        self._discard()
+        self._on_failure(self.websocket)
+
+    def _discard(self):
+        self._queue.clear()
+        self._keyed.clear()
+        self.bytes_queued = 0
+
+    def close(self):
+        """Stop accepting messages; the writer exits once the queue is drained"""
+        self.closed = True
+        self._wakeup.set()
+
+    def abort(self):
+        """Stop immediately, discarding queued messages"""
+        self.closed = True
+        self._discard()
+        self._writer.cancel()
+
+    async def wait_closed(self, timeout: float) -> bool:
+        """Wait for the writer to drain after close(); aborts it after ``timeout``"""
+        try:
+            await asyncio.wait_for(asyncio.shield(self._writer), timeout)
+            return True
+        except asyncio.CancelledError:
+            if self._writer.cancelled():
+                return False
+            raise
+        except asyncio.TimeoutError:
+            self.abort()
+            return False
+